@@ -84,6 +84,67 @@ class AuditTrail:
             audit_log.save()
             return audit_log
 
+    @staticmethod
+    def record_many(
+        entries: list[dict[str, Any]],
+        user_id: int | None = None,
+        user_email: str = "system@bionexus.local",
+    ) -> list[AuditLog]:
+        """Record several mutations at once, chained exactly like ``record``.
+
+        Each entry holds the ``record`` arguments (entity_type, entity_id,
+        operation, changes, snapshot_before, snapshot_after). Entries are
+        chained in list order: the chain head is read ONCE per entity type
+        and all records are written with ONE bulk insert, instead of one
+        head query and one insert per mutation. The resulting chain is the
+        one consecutive ``record`` calls would have produced.
+
+        Returns:
+            list[AuditLog]: The records created, in ``entries`` order
+        """
+        if not entries:
+            return []
+
+        from django.utils import timezone
+
+        with transaction.atomic():
+            heads: dict[str, str | None] = {}
+            for entity_type in dict.fromkeys(e["entity_type"] for e in entries):
+                heads[entity_type] = AuditTrail.get_latest_signature(entity_type)
+
+            # One timestamp for the whole batch; (timestamp, id) still
+            # orders the chain because bulk insert ids follow list order.
+            now = timezone.now().replace(microsecond=0)
+            now_iso = now.isoformat()
+
+            logs = []
+            for entry in entries:
+                entity_type = entry["entity_type"]
+                previous_signature = heads[entity_type]
+                signature = AuditLog.calculate_signature(
+                    previous_signature=previous_signature,
+                    entity_type=entity_type,
+                    entity_id=entry["entity_id"],
+                    operation=entry["operation"],
+                    changes=entry["changes"],
+                    timestamp=now_iso,
+                )
+                heads[entity_type] = signature
+                logs.append(AuditLog(
+                    entity_type=entity_type,
+                    entity_id=entry["entity_id"],
+                    operation=entry["operation"],
+                    changes=entry["changes"],
+                    snapshot_before=entry.get("snapshot_before", {}),
+                    snapshot_after=entry.get("snapshot_after", {}),
+                    user_id=user_id,
+                    user_email=user_email,
+                    signature=signature,
+                    previous_signature=previous_signature,
+                    timestamp=now,
+                ))
+            return AuditLog.objects.bulk_create(logs)
+
     @staticmethod
     def get_entity_history(entity_type: str, entity_id: int) -> list[AuditLog]:
         """Fetch the complete audit history for an entity.
@@ -1,10 +1,19 @@
-"""Request-context middleware for audit trail.
+"""Request-level middleware.
 
-Stores the current request in thread-local storage so that Django signals
-can access the authenticated user and IP address without explicit passing.
+AuditMiddleware stores the current request in thread-local storage so that
+Django signals can access the authenticated user and IP address without
+explicit passing.
+
+GzipRequestMiddleware inflates ``Content-Encoding: gzip`` request bodies
+(BioNexus Box batch uploads) before any view or parser reads them.
 """
 
 import threading
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+from django.http import JsonResponse
 
 _thread_locals = threading.local()
 
@@ -50,3 +59,35 @@ class AuditMiddleware:
         finally:
             _thread_locals.request = None
         return response
+
+
+class GzipRequestMiddleware:
+    """Transparently decompress gzip-encoded request bodies.
+
+    The inflated size is capped at ``DATA_UPLOAD_MAX_MEMORY_SIZE`` so a
+    small compressed body cannot expand into an unbounded allocation.
+    Malformed or oversized bodies are rejected with HTTP 400.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        encoding = request.META.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if encoding == "gzip":
+            limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0  # 0 = unbounded
+            try:
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = inflater.decompress(request.body, limit)
+                if inflater.unconsumed_tail or not inflater.eof:
+                    raise ValueError("body is truncated or exceeds the upload limit")
+            except (zlib.error, ValueError) as exc:
+                return JsonResponse(
+                    {"detail": f"Invalid gzip request body: {exc}"}, status=400,
+                )
+            request._body = body
+            request._stream = BytesIO(body)
+            request._read_started = False
+            request.META["CONTENT_LENGTH"] = str(len(body))
+            del request.META["HTTP_CONTENT_ENCODING"]
+        return self.get_response(request)
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.GzipRequestMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -289,5 +290,32 @@ PERSISTENCE = {
     "CLOCK_DRIFT_THRESHOLD_MS": 5000,
     "SERVER_SLOW_MS": 2000,
     "SERVER_FAST_MS": 500,
+    # Batch sizing / send rate: "latency" (LatencyTargetController) or
+    # "threshold" (halve/double on SERVER_*_MS, MAX_BURST_PER_MINUTE)
+    "CONGESTION_CONTROL": "latency",
+    "LATENCY_TARGET_MS": 1000,
+    "BATCH_INCREASE": 5,
+    "SEND_RATE_PER_S": 20.0,
+    "SEND_BURST": 1000,
+    # Upper bound on items per POST /api/persistence/capture/batch/
+    "CAPTURE_BATCH_MAX": 500,
+    # Seconds a worker owns a claimed batch; expired claims are re-claimable
+    "LEASE_S": 120,
+    # Remote IngestView root for the HTTP transport (empty = in-process
+    # ingest), its timeout, and how many batches SyncEngine keeps in flight
+    "INGEST_URL": os.environ.get("BIONEXUS_INGEST_URL", ""),
+    "HTTP_TIMEOUT_S": 30.0,
+    "MAX_IN_FLIGHT": 1,
+    # Admission control on capture/ingest: 429 + Retry-After past these
+    # limits (per application process), see persistence/admission.py
+    "ADMISSION_MAX_IN_FLIGHT": 8,
+    "ADMISSION_LATENCY_MS": 3000,
+    "ADMISSION_RETRY_AFTER_S": 5,
+    # How long SyncEngine obeys a server X-BioNexus-Rate hint
+    "RATE_HINT_S": 60,
+    # archive_synced: synced WAL records captured more than this many days
+    # ago move to ArchivedMeasurement, this many per transaction
+    "ARCHIVE_AFTER_DAYS": 7,
+    "ARCHIVE_BATCH_SIZE": 1000,
 }
 
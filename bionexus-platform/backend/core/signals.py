@@ -5,6 +5,11 @@ every mutation in the immutable AuditLog with SHA-256 signature chaining.
 
 21 CFR Part 11 requires that all data changes are attributable, timestamped,
 and tamper-proof.  These signals ensure no write path can bypass audit.
+
+Bulk writers (bulk_create skips save()) build the same CREATE entries with
+``create_entry``, append them in one ``AuditTrail.record_many`` call, set
+``instance._audit_recorded`` and then send post_save themselves, so other
+receivers still run and the entry is not written twice.
 """
 
 from django.db.models.signals import post_save, pre_delete, pre_save
@@ -43,6 +48,19 @@ def _is_audited(sender) -> bool:
     return label in AUDITED_MODELS
 
 
+def create_entry(instance) -> dict:
+    """``AuditTrail.record`` arguments of the automatic CREATE for ``instance``."""
+    snapshot_after = _model_to_dict(instance)
+    return {
+        "entity_type": type(instance).__name__,
+        "entity_id": instance.pk,
+        "operation": "CREATE",
+        "changes": {k: {"before": None, "after": v} for k, v in snapshot_after.items()},
+        "snapshot_before": {},
+        "snapshot_after": snapshot_after,
+    }
+
+
 @receiver(pre_save)
 def capture_pre_save_state(sender, instance, **kwargs):
     """Capture the old state before save for change detection."""
@@ -63,26 +81,17 @@ def audit_post_save(sender, instance, created, **kwargs):
     """Record CREATE or UPDATE in the audit trail after save."""
     if not _is_audited(sender):
         return
+    if getattr(instance, "_audit_recorded", False):
+        instance._audit_recorded = False  # one save only: later updates are audited
+        return
 
     user_id, user_email = get_audit_user()
     entity_type = sender.__name__
-    snapshot_after = _model_to_dict(instance)
 
     if created:
-        changes = {
-            k: {"before": None, "after": v} for k, v in snapshot_after.items()
-        }
-        AuditTrail.record(
-            entity_type=entity_type,
-            entity_id=instance.pk,
-            operation="CREATE",
-            changes=changes,
-            snapshot_before={},
-            snapshot_after=snapshot_after,
-            user_id=user_id,
-            user_email=user_email,
-        )
+        AuditTrail.record(**create_entry(instance), user_id=user_id, user_email=user_email)
     else:
+        snapshot_after = _model_to_dict(instance)
         old_state = getattr(instance, "_audit_old_state", {})
         changes = {}
         for field, new_val in snapshot_after.items():
@@ -0,0 +1,165 @@
+"""Admission control (server-driven backpressure) for the persistence endpoints.
+
+Capture and ingest requests are admitted while the server keeps up. Two
+signals decide that, both kept in-process:
+
+- in-flight work: the number of persistence requests being handled now;
+- latency: a moving average (EWMA) of how long admitted requests take,
+  which under load is dominated by the database.
+
+When either is over its limit (``ADMISSION_MAX_IN_FLIGHT``,
+``ADMISSION_LATENCY_MS``), new requests get ``429 Too Many Requests``
+with:
+
+- ``Retry-After``: whole seconds to wait. It is drawn between one and two
+  times ``ADMISSION_RETRY_AFTER_S``, so hubs turned away together come
+  back spread out instead of in lockstep.
+- ``X-BioNexus-Rate``: a fair-share send rate in records/s for one hub.
+  It is the observed throughput divided among the hubs seen recently.
+
+A request arriving with nothing in flight is always admitted. That
+request probes whether latency has recovered, so the server cannot lock
+itself out on a stale average.
+
+State is per process: each application worker admits up to the limit.
+"""
+
+import math
+import random
+import threading
+import time
+
+from rest_framework.exceptions import Throttled
+
+from .sync_engine import _get_config
+from .transport import RATE_HEADER
+
+CLIENT_WINDOW_S = 60.0
+
+
+class ServerBusy(Throttled):
+    """429 raised by admission control; carries the rate hint."""
+
+    default_detail = "Server busy, retry later."
+
+    def __init__(self, wait: int, rate: float | None):
+        super().__init__(wait=wait)
+        self.rate = rate
+
+
+class AdmissionController:
+    """Counts in-flight persistence work and decides admit / 429."""
+
+    def __init__(
+        self,
+        max_in_flight: int | None = None,
+        latency_ms: float | None = None,
+        retry_after_s: float | None = None,
+        smoothing: float = 0.2,
+        clock=time.monotonic,
+    ):
+        self.max_in_flight = max_in_flight or _get_config("ADMISSION_MAX_IN_FLIGHT", 8)
+        self.latency_ms = latency_ms or _get_config("ADMISSION_LATENCY_MS", 3000)
+        self.retry_after_s = retry_after_s or _get_config("ADMISSION_RETRY_AFTER_S", 5)
+        self.smoothing = smoothing
+        self.clock = clock
+
+        self.in_flight = 0
+        self.avg_latency_ms: float | None = None
+        self.avg_records_per_s: float | None = None
+        self.rejected = 0
+        self._clients: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def saturated(self) -> bool:
+        """True when a new request should be turned away."""
+        if self.in_flight == 0:
+            return False
+        if self.in_flight >= self.max_in_flight:
+            return True
+        return self.avg_latency_ms is not None and self.avg_latency_ms > self.latency_ms
+
+    def enter(self, client: str) -> float:
+        """Take one in-flight slot or raise ServerBusy (429); returns a start token."""
+        now = self.clock()
+        with self._lock:
+            self._clients[client] = now
+            if self.saturated():
+                self.rejected += 1
+                raise ServerBusy(self.retry_after(), self.rate_hint(now))
+            self.in_flight += 1
+        return now
+
+    def leave(self, started: float, records: int = 1) -> None:
+        """Release the slot taken at ``started`` and learn from its duration."""
+        elapsed = self.clock() - started
+        with self._lock:
+            self.in_flight -= 1
+            self._observe(elapsed, records)
+
+    def retry_after(self) -> int:
+        """Seconds to wait before retrying, jittered to break up stampedes."""
+        return math.ceil(self.retry_after_s * random.uniform(1.0, 2.0))
+
+    def rate_hint(self, now: float) -> float | None:
+        """Fair per-hub send rate (records/s), or None before any estimate."""
+        if self.avg_records_per_s is None:
+            return None
+        cutoff = now - CLIENT_WINDOW_S
+        self._clients = {c: seen for c, seen in self._clients.items() if seen >= cutoff}
+        capacity = self.avg_records_per_s * self.max_in_flight
+        return round(capacity / max(1, len(self._clients)), 2)
+
+    def state(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "avg_latency_ms": self.avg_latency_ms,
+                "latency_limit_ms": self.latency_ms,
+                "avg_records_per_s": self.avg_records_per_s,
+                "rejected": self.rejected,
+            }
+
+    def _observe(self, elapsed_s: float, records: int) -> None:
+        self.avg_latency_ms = self._ewma(self.avg_latency_ms, elapsed_s * 1000)
+        self.avg_records_per_s = self._ewma(
+            self.avg_records_per_s, records / max(elapsed_s, 1e-3),
+        )
+
+    def _ewma(self, average: float | None, sample: float) -> float:
+        if average is None:
+            return sample
+        return average + self.smoothing * (sample - average)
+
+
+ADMISSION = AdmissionController()
+
+
+class AdmissionControlled:
+    """APIView mixin: POSTs take an ADMISSION slot for their whole handling.
+
+    The 429 itself (status, ``Retry-After``) is DRF's Throttled handling;
+    the mixin adds ``X-BioNexus-Rate``. The slot is released in
+    finalize_response, which runs for every outcome.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == "POST":
+            client = request.headers.get("X-Device-ID") or request.META.get("REMOTE_ADDR", "")
+            self._admitted_at = ADMISSION.enter(client)
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if isinstance(exc, ServerBusy) and exc.rate is not None:
+            response[RATE_HEADER] = str(exc.rate)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        started = getattr(self, "_admitted_at", None)
+        if started is not None:
+            self._admitted_at = None
+            data = getattr(request, "_full_data", None)
+            ADMISSION.leave(started, len(data) if isinstance(data, list) else 1)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,78 @@
+"""Hot/cold split of the WAL: archival of synced records.
+
+PendingMeasurement is the hot table every sync pass, the pending listing
+and /healthz query. Synced records are done with it, so archive_synced
+moves those captured more than ``ARCHIVE_AFTER_DAYS`` ago into
+ArchivedMeasurement (see models.py) and the WAL stays proportional to the
+actual backlog.
+
+Records move in chunks of ``batch_size``: each chunk is copied and
+deleted in one transaction, so a record is always in exactly one of the
+two tables. The candidate scan uses the (sync_status, created_at) index.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedMeasurement, PendingMeasurement
+from .sync_engine import _get_config
+
+ARCHIVED_FIELDS = (
+    "id",
+    "idempotency_key",
+    "sample_id",
+    "instrument_id",
+    "parameter",
+    "value",
+    "unit",
+    "data_hash",
+    "source_timestamp",
+    "hub_received_at",
+    "server_received_at",
+    "clock_drift_ms",
+    "drift_flagged",
+    "synced_measurement_id",
+    "retry_count",
+    "merkle_batch_id",
+    "merkle_index",
+    "created_at",
+)
+
+
+def archive_synced(
+    older_than: timedelta | None = None,
+    batch_size: int | None = None,
+    now=None,
+) -> int:
+    """Move synced WAL records older than ``older_than``; returns how many moved.
+
+    Args:
+        older_than: Minimum age (since capture); default ``ARCHIVE_AFTER_DAYS``.
+        batch_size: Records per transaction; default ``ARCHIVE_BATCH_SIZE``.
+        now: Reference time (default: timezone.now()).
+    """
+    if older_than is None:
+        older_than = timedelta(days=_get_config("ARCHIVE_AFTER_DAYS", 7))
+    batch_size = batch_size or _get_config("ARCHIVE_BATCH_SIZE", 1000)
+    cutoff = (now or timezone.now()) - older_than
+
+    candidates = PendingMeasurement.objects.filter(
+        sync_status="synced", created_at__lt=cutoff,
+    )
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.order_by("created_at", "pk")
+                .values(*ARCHIVED_FIELDS, "updated_at")[:batch_size]
+            )
+            if not rows:
+                return moved
+            ArchivedMeasurement.objects.bulk_create(
+                [ArchivedMeasurement(synced_at=row.pop("updated_at"), **row) for row in rows],
+                ignore_conflicts=True,
+            )
+            candidates.filter(pk__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
@@ -0,0 +1,151 @@
+"""Set-based ingest of hub measurements into Measurement.
+
+Shared by IngestView (HTTP) and SyncEngine._direct_transport (in-process).
+A batch costs a handful of queries whatever its size:
+
+1. ONE ``idempotency_key__in`` lookup resolves every duplicate
+2. ONE conflict-ignoring ``bulk_create`` writes the new Measurements,
+   with the hub's data_hash set at insert time (Measurement.save() is
+   bypassed, so the hash is never recomputed nor patched by a second
+   UPDATE), and ONE re-select by key tells the rows this call inserted
+   from those a concurrent ingest of the same keys won (``duplicate``)
+3. ONE batched audit append (AuditTrail.record_many) writes both the
+   automatic CREATE snapshot (core.signals.create_entry) and the
+   ``hub_sync`` entry of every new row, keeping the signature chain intact
+4. ``post_save`` is then sent for every new row, as save() would have,
+   so the LIMS / Vault connectors still push hub-synced measurements
+
+ACKs are identical to the per-item path: ``duplicate`` (with the stored
+hash and no drift) or ``created`` (with confirmation_hash and drift).
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.audit import AuditTrail
+from core.middleware import get_audit_user
+from core.signals import create_entry
+
+from .sync_engine import _get_config
+
+
+def _as_datetime(value):
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def ingest_batch(items: list[dict]) -> list[dict]:
+    """Ingest hub items (validated data or WAL payloads); one ACK per item, in order."""
+    from modules.measurements.models import Measurement
+
+    drift_threshold = _get_config("CLOCK_DRIFT_THRESHOLD_MS", 5000)
+    server_now = timezone.now()
+    keys = [str(item["idempotency_key"]) for item in items]
+
+    existing = {
+        str(key): (pk, data_hash)
+        for key, pk, data_hash in Measurement.objects.filter(
+            idempotency_key__in=keys
+        ).values_list("idempotency_key", "pk", "data_hash")
+    }
+
+    new: dict[str, tuple[Measurement, dict]] = {}
+    for key, item in zip(keys, items):
+        if key in existing or key in new:
+            continue
+        new[key] = (
+            Measurement(
+                sample_id=item["sample_id"],
+                instrument_id=item["instrument_id"],
+                parameter=item["parameter"],
+                value=Decimal(str(item["value"])),
+                unit=item["unit"],
+                measured_at=_as_datetime(item["source_timestamp"]),
+                idempotency_key=key,
+                data_hash=item["data_hash"],
+            ),
+            item,
+        )
+
+    if new:
+        with transaction.atomic():
+            Measurement.objects.bulk_create(
+                [m for m, _ in new.values()], ignore_conflicts=True,
+            )
+            # created_at (set in memory by bulk_create) identifies our rows.
+            for key, pk, data_hash, created_at in Measurement.objects.filter(
+                idempotency_key__in=list(new)
+            ).values_list("idempotency_key", "pk", "data_hash", "created_at"):
+                key = str(key)
+                measurement = new[key][0]
+                if created_at == measurement.created_at:
+                    measurement.pk = pk
+                else:
+                    existing[key] = (pk, data_hash)
+                    del new[key]
+
+            entries = []
+            for key, (measurement, item) in new.items():
+                entries.append(create_entry(measurement))
+                entries.append({
+                    "entity_type": "Measurement",
+                    "entity_id": measurement.pk,
+                    "operation": "CREATE",
+                    "changes": {"source": "hub_sync", "idempotency_key": key},
+                    "snapshot_before": {},
+                    "snapshot_after": {
+                        "parameter": item["parameter"],
+                        "value": str(item["value"]),
+                        "unit": item["unit"],
+                        "source_timestamp": str(measurement.measured_at),
+                        "data_hash": item["data_hash"],
+                    },
+                })
+            AuditTrail.record_many(entries, *get_audit_user())
+
+            for measurement, _ in new.values():
+                measurement._state.adding = False
+                measurement._audit_recorded = True
+                post_save.send(
+                    sender=Measurement, instance=measurement, created=True,
+                    update_fields=None, raw=False, using=measurement._state.db,
+                )
+
+    acks = []
+    created: set[str] = set()
+    for key, item in zip(keys, items):
+        if key in new and key not in created:
+            created.add(key)
+            measurement = new[key][0]
+            drift_ms = int(
+                (server_now - _as_datetime(item["hub_received_at"])).total_seconds() * 1000
+            )
+            acks.append({
+                "idempotency_key": key,
+                "measurement_id": measurement.pk,
+                "confirmation_hash": item["data_hash"],
+                "server_received_at": server_now.isoformat(),
+                "clock_drift_ms": drift_ms,
+                "drift_flagged": abs(drift_ms) > drift_threshold,
+                "status": "created",
+            })
+            continue
+
+        # Already stored, or repeated within this batch after its creation.
+        if key in existing:
+            pk, data_hash = existing[key]
+        else:
+            pk, data_hash = new[key][0].pk, new[key][0].data_hash
+        acks.append({
+            "idempotency_key": key,
+            "measurement_id": pk,
+            "confirmation_hash": data_hash,
+            "server_received_at": server_now.isoformat(),
+            "clock_drift_ms": 0,
+            "drift_flagged": False,
+            "status": "duplicate",
+        })
+    return acks
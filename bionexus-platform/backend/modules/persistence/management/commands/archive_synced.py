@@ -0,0 +1,43 @@
+"""Management command to move old synced WAL records to the archive.
+
+Usage:
+    python manage.py archive_synced              # older than ARCHIVE_AFTER_DAYS
+    python manage.py archive_synced --days 30    # older than 30 days
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from modules.persistence.archive import archive_synced
+from modules.persistence.sync_engine import _get_config
+
+
+class Command(BaseCommand):
+    help = "Move synced WAL records older than a threshold to ArchivedMeasurement."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=None,
+            help="Minimum age in days since capture (default: ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Records moved per transaction (default: ARCHIVE_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = _get_config("ARCHIVE_AFTER_DAYS", 7)
+        if days < 0:
+            raise CommandError("--days must not be negative.")
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        moved = archive_synced(timedelta(days=days), options["batch_size"])
+        self.stdout.write(f"Archived {moved} synced records older than {days:g} days.")
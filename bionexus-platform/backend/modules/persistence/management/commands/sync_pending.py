@@ -1,13 +1,14 @@
 """Management command to sync pending WAL records to the server.
 
 Usage:
-    python manage.py sync_pending          # continuous loop
-    python manage.py sync_pending --once   # single pass
+    python manage.py sync_pending               # continuous loop
+    python manage.py sync_pending --once        # single pass
+    python manage.py sync_pending --workers 4   # 4 engines in parallel
 """
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from modules.persistence.sync_engine import SyncEngine
+from modules.persistence.sync_engine import SyncEngine, run_workers
 
 
 class Command(BaseCommand):
@@ -19,19 +20,40 @@ class Command(BaseCommand):
             action="store_true",
             help="Run a single sync pass instead of a continuous loop.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of SyncEngines leasing batches concurrently (default: 1).",
+        )
 
     def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        if workers > 1:
+            if not options["once"]:
+                self.stdout.write(
+                    f"Starting {workers} sync workers (Ctrl+C to stop)..."
+                )
+            stats = run_workers(workers, once=options["once"])
+            self._report(stats)
+            return
+
         engine = SyncEngine()
 
         if options["once"]:
-            stats = engine.run_once()
-            self.stdout.write(
-                f"Sync pass complete: "
-                f"{stats['synced']} synced, "
-                f"{stats['failed']} failed, "
-                f"{stats['skipped']} skipped"
-            )
+            self._report(engine.run_once())
         else:
             self.stdout.write("Starting continuous sync loop (Ctrl+C to stop)...")
             engine.run_loop()
             self.stdout.write("Sync loop stopped.")
+
+    def _report(self, stats):
+        self.stdout.write(
+            f"Sync pass complete: "
+            f"{stats['synced']} synced, "
+            f"{stats['failed']} failed, "
+            f"{stats['skipped']} skipped"
+        )
@@ -0,0 +1,101 @@
+"""Merkle trees over sync batches (RFC 6962 / 9162 construction).
+
+Each reading keeps its own SHA-256 ``data_hash``; a batch additionally
+gets one Merkle root over its readings, in the order they were sent:
+
+    leaf = SHA256(0x00 || "<idempotency_key>:<data_hash>")
+    node = SHA256(0x01 || left || right)
+
+Leaves and nodes are domain-separated, and an odd batch is split at the
+largest power of two instead of duplicating its last leaf, so two
+different batches can never share a root. The box computes the same
+root (box_collector.merkle_root) and sends it in the
+``X-BioNexus-Merkle-Root`` header: the server checks a whole batch with
+one comparison, and can later prove any single reading's inclusion in
+it with ~log2(n) hashes.
+"""
+
+import hashlib
+
+MERKLE_ROOT_HEADER = "X-BioNexus-Merkle-Root"
+
+
+def leaf_hash(idempotency_key, data_hash) -> bytes:
+    """Leaf of one reading: binds its idempotency_key to its data_hash."""
+    return hashlib.sha256(
+        b"\x00" + f"{idempotency_key or ''}:{data_hash or ''}".encode("utf-8")
+    ).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _split(n: int) -> int:
+    """Largest power of two strictly smaller than ``n`` (n >= 2)."""
+    return 1 << ((n - 1).bit_length() - 1)
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    """Root of the tree over ``leaves`` (SHA-256 of nothing when empty)."""
+    if not leaves:
+        return hashlib.sha256(b"").digest()
+    level = list(leaves)
+    # Bottom-up, pairing left to right; a trailing odd node is promoted
+    # unchanged, which yields exactly the RFC 6962 split-tree root.
+    while len(level) > 1:
+        paired = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def inclusion_proof(leaves: list[bytes], index: int) -> list[bytes]:
+    """Audit path for ``leaves[index]``, leaf-side sibling first."""
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"Leaf {index} outside a tree of {len(leaves)}")
+    path: list[bytes] = []
+    lo, hi = 0, len(leaves)
+    # Walk down from the root; siblings are collected top-down, then reversed.
+    while hi - lo > 1:
+        k = _split(hi - lo)
+        if index < lo + k:
+            path.append(merkle_root(leaves[lo + k:hi]))
+            hi = lo + k
+        else:
+            path.append(merkle_root(leaves[lo:lo + k]))
+            lo = lo + k
+    path.reverse()
+    return path
+
+
+def verify_inclusion(
+    leaf: bytes, index: int, size: int, proof: list[bytes], root: bytes,
+) -> bool:
+    """Check an audit path (RFC 9162 §2.1.3.2) without the other leaves."""
+    if not 0 <= index < size:
+        return False
+    fn, sn = index, size - 1
+    node = leaf
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn % 2 == 1 or fn == sn:
+            node = _node(sibling, node)
+            if fn % 2 == 0:
+                while fn % 2 == 0 and fn != 0:
+                    fn >>= 1
+                    sn >>= 1
+        else:
+            node = _node(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node == root
+
+
+def batch_root(items: list[dict], hash_field: str = "data_hash") -> str:
+    """Hex root over ``items`` (dicts with idempotency_key + ``hash_field``)."""
+    return merkle_root([
+        leaf_hash(item.get("idempotency_key"), item.get(hash_field)) for item in items
+    ]).hex()
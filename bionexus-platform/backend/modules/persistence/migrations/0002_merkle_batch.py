@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persistence', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerkleBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root', models.CharField(db_index=True, help_text='Hex Merkle root over (idempotency_key, data_hash), send order', max_length=64)),
+                ('size', models.IntegerField(help_text='Number of leaves (items in the batch)')),
+                ('leaves', models.JSONField(default=list, help_text='Hex leaf hashes in send order')),
+                ('device_id', models.CharField(blank=True, help_text='X-Device-ID of the sending box, if any', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pendingmeasurement',
+            name='merkle_index',
+            field=models.IntegerField(blank=True, help_text='Leaf position of this record in its Merkle batch', null=True),
+        ),
+        migrations.AddField(
+            model_name='pendingmeasurement',
+            name='merkle_batch',
+            field=models.ForeignKey(blank=True, help_text='Batch whose Merkle root covers this record', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='measurements', to='persistence.merklebatch'),
+        ),
+    ]
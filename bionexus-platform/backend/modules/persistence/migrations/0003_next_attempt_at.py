@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:01
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_next_attempt_at(apps, schema_editor):
+    """Queue existing records in capture order; failed ones from their last attempt."""
+    PendingMeasurement = apps.get_model('persistence', 'PendingMeasurement')
+    PendingMeasurement.objects.update(next_attempt_at=F('created_at'))
+    PendingMeasurement.objects.filter(sync_status='failed').update(
+        next_attempt_at=F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persistence', '0002_merkle_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingmeasurement',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the record may be sent (capture time, then backoff)'),
+        ),
+        migrations.RunPython(backfill_next_attempt_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pendingmeasurement',
+            index=models.Index(fields=['sync_status', 'next_attempt_at'], name='persistence_sync_st_dcbf74_idx'),
+        ),
+    ]
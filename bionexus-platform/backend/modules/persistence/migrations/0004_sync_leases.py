@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:03
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def expire_ownerless_claims(apps, schema_editor):
+    """Records left 'syncing' before leases existed become re-claimable."""
+    PendingMeasurement = apps.get_model('persistence', 'PendingMeasurement')
+    PendingMeasurement.objects.filter(sync_status='syncing').update(
+        lease_expires_at=F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persistence', '0003_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingmeasurement',
+            name='claimed_by',
+            field=models.CharField(blank=True, help_text='SyncEngine worker holding the lease on this record', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='pendingmeasurement',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text="End of the worker's lease; an expired 'syncing' record is re-claimable", null=True),
+        ),
+        migrations.RunPython(expire_ownerless_claims, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='pendingmeasurement',
+            index=models.Index(fields=['sync_status', 'lease_expires_at'], name='persistence_sync_st_708f97_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('persistence', '0004_sync_leases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMeasurement',
+            fields=[
+                ('id', models.BigIntegerField(help_text='PendingMeasurement pk of the record before archival', primary_key=True, serialize=False)),
+                ('idempotency_key', models.UUIDField(unique=True)),
+                ('sample_id', models.IntegerField()),
+                ('instrument_id', models.IntegerField()),
+                ('parameter', models.CharField(max_length=255)),
+                ('value', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('unit', models.CharField(max_length=50)),
+                ('data_hash', models.CharField(max_length=64)),
+                ('source_timestamp', models.DateTimeField()),
+                ('hub_received_at', models.DateTimeField()),
+                ('server_received_at', models.DateTimeField(blank=True, null=True)),
+                ('clock_drift_ms', models.IntegerField(blank=True, null=True)),
+                ('drift_flagged', models.BooleanField(default=False)),
+                ('synced_measurement_id', models.IntegerField(blank=True, null=True)),
+                ('retry_count', models.IntegerField(default=0, help_text='Failed sync attempts before the record was ACKed')),
+                ('merkle_index', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(help_text='When the record was written to the WAL')),
+                ('synced_at', models.DateTimeField(help_text='Last update of the WAL record (its ACK)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('merkle_batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_measurements', to='persistence.merklebatch')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='persistence_created_ecb672_idx'), models.Index(fields=['drift_flagged'], name='persistence_drift_f_e9c1b5_idx')],
+            },
+        ),
+    ]
@@ -8,6 +8,42 @@ of network state.
 import uuid
 
 from django.db import models
+from django.utils import timezone
+
+
+class MerkleBatch(models.Model):
+    """One sync batch, committed to by a single Merkle root.
+
+    ``leaves`` keeps the batch's leaf hashes in send order (see merkle.py),
+    so an inclusion proof for any reading can be produced on demand
+    without re-reading the other measurements.
+    """
+
+    root = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="Hex Merkle root over (idempotency_key, data_hash), send order",
+    )
+    size = models.IntegerField(
+        help_text="Number of leaves (items in the batch)",
+    )
+    leaves = models.JSONField(
+        default=list,
+        help_text="Hex leaf hashes in send order",
+    )
+    device_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="X-Device-ID of the sending box, if any",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "persistence"
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return f"MerkleBatch {self.root[:12]} ({self.size} leaves)"
 
 
 class PendingMeasurement(models.Model):
@@ -102,6 +138,35 @@ class PendingMeasurement(models.Model):
         blank=True,
         help_text="Server-side Measurement PK after successful ACK",
     )
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the record may be sent (capture time, then backoff)",
+    )
+    claimed_by = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="SyncEngine worker holding the lease on this record",
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="End of the worker's lease; an expired 'syncing' record is re-claimable",
+    )
+
+    # --- Batch integrity (Merkle) ---
+    merkle_batch = models.ForeignKey(
+        MerkleBatch,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="measurements",
+        help_text="Batch whose Merkle root covers this record",
+    )
+    merkle_index = models.IntegerField(
+        null=True,
+        blank=True,
+        help_text="Leaf position of this record in its Merkle batch",
+    )
 
     # --- Timestamps ---
     created_at = models.DateTimeField(auto_now_add=True)
@@ -111,6 +176,8 @@ class PendingMeasurement(models.Model):
         app_label = "persistence"
         indexes = [
             models.Index(fields=["sync_status", "created_at"]),
+            models.Index(fields=["sync_status", "next_attempt_at"]),
+            models.Index(fields=["sync_status", "lease_expires_at"]),
             models.Index(fields=["drift_flagged"]),
         ]
         ordering = ["created_at"]
@@ -134,3 +201,76 @@ class PendingMeasurement(models.Model):
             "source_timestamp": self.source_timestamp.isoformat(),
             "hub_received_at": self.hub_received_at.isoformat(),
         }
+
+
+class ArchivedMeasurement(models.Model):
+    """Cold copy of a synced WAL record, moved out by archive.archive_synced.
+
+    Keeps the reading, its timestamps, the drift and ACK fields and its
+    Merkle position for forensics, but none of the sync bookkeeping
+    (status, retries, leases). The primary key is the original
+    PendingMeasurement pk, so ids handed out at capture stay valid.
+    """
+
+    id = models.BigIntegerField(
+        primary_key=True,
+        help_text="PendingMeasurement pk of the record before archival",
+    )
+    idempotency_key = models.UUIDField(unique=True)
+
+    # --- Raw measurement data ---
+    sample_id = models.IntegerField()
+    instrument_id = models.IntegerField()
+    parameter = models.CharField(max_length=255)
+    value = models.DecimalField(max_digits=20, decimal_places=10)
+    unit = models.CharField(max_length=50)
+    data_hash = models.CharField(max_length=64)
+
+    # --- Deterministic Timestamps (3-layer) ---
+    source_timestamp = models.DateTimeField()
+    hub_received_at = models.DateTimeField()
+    server_received_at = models.DateTimeField(null=True, blank=True)
+
+    # --- Clock Drift Detection ---
+    clock_drift_ms = models.IntegerField(null=True, blank=True)
+    drift_flagged = models.BooleanField(default=False)
+
+    # --- ACK ---
+    synced_measurement_id = models.IntegerField(null=True, blank=True)
+    retry_count = models.IntegerField(
+        default=0,
+        help_text="Failed sync attempts before the record was ACKed",
+    )
+
+    # --- Batch integrity (Merkle) ---
+    merkle_batch = models.ForeignKey(
+        MerkleBatch,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="archived_measurements",
+    )
+    merkle_index = models.IntegerField(null=True, blank=True)
+
+    # --- Timestamps ---
+    created_at = models.DateTimeField(
+        help_text="When the record was written to the WAL",
+    )
+    synced_at = models.DateTimeField(
+        help_text="Last update of the WAL record (its ACK)",
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = "persistence"
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["drift_flagged"]),
+        ]
+        ordering = ["created_at"]
+
+    def __str__(self) -> str:
+        return (
+            f"Archived {self.parameter}={self.value}{self.unit} "
+            f"({self.idempotency_key})"
+        )
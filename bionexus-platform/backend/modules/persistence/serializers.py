@@ -5,7 +5,7 @@ from decimal import Decimal
 
 from rest_framework import serializers
 
-from .models import PendingMeasurement
+from .models import ArchivedMeasurement, PendingMeasurement
 
 
 class CaptureSerializer(serializers.Serializer):
@@ -58,3 +58,16 @@ class PendingMeasurementSerializer(serializers.ModelSerializer):
     class Meta:
         model = PendingMeasurement
         fields = "__all__"
+
+
+class ArchivedMeasurementSerializer(serializers.ModelSerializer):
+    """Read-only serializer for an archived (synced) WAL record."""
+
+    sync_status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedMeasurement
+        fields = "__all__"
+
+    def get_sync_status(self, obj) -> str:
+        return "synced"
@@ -1,24 +1,61 @@
-"""Sync engine: BackoffCalculator, CongestionController, SyncEngine.
+"""Sync engine: BackoffCalculator, congestion control, SyncEngine.
 
-Handles retry with exponential backoff, adaptive batch sizing,
-burst limiting, and end-to-end ACK verification.
+Handles retry with exponential backoff, adaptive batch sizing
+(LatencyTargetController, or the threshold-based CongestionController),
+send-rate limiting, and end-to-end ACK verification.
 """
 
 import logging
+import os
 import random
 import signal
+import socket
+import threading
 import time
-from decimal import Decimal
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
 from typing import Any, Callable
 
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, TextField, Value, When
 from django.utils import timezone
 
+from .merkle import leaf_hash, merkle_root
 from .models import PendingMeasurement
+from .transport import Backpressure, HttpTransport
 
 logger = logging.getLogger("persistence.sync")
 
+# last_error of a record whose worker's lease ran out before it reported.
+LEASE_EXPIRED_ERROR = "lease expired"
+
+# Columns written by each WAL outcome class (one bulk UPDATE per class).
+# Both also release the worker's lease.
+SYNCED_FIELDS = [
+    "sync_status", "synced_measurement_id", "server_received_at",
+    "clock_drift_ms", "drift_flagged", "claimed_by", "lease_expires_at",
+    "updated_at",
+]
+FAILED_FIELDS = [
+    "sync_status", "retry_count", "last_error", "next_attempt_at",
+    "claimed_by", "lease_expires_at", "updated_at",
+]
+
+_SQLITE_LOCK = threading.RLock()
+
+
+def _db_turn():
+    """Serialise worker threads' WAL writes on SQLite (one writer at a time).
+
+    SQLite admits a single writer anyway; taking turns in-process avoids
+    "database is locked" errors while the transport calls, which are
+    where the time goes, still overlap. A no-op on other backends.
+    """
+    return _SQLITE_LOCK if connection.vendor == "sqlite" else nullcontext()
+
 
 def _get_config(key: str, default: Any = None) -> Any:
     """Get a persistence config value from settings.PERSISTENCE."""
@@ -113,132 +150,461 @@ class CongestionController:
             self._minute_start = now
 
 
+class LatencyTargetController:
+    """Latency-targeting batch sizing with a token-bucket send rate.
+
+    Drop-in replacement for CongestionController (same next_batch_size /
+    adjust / record_sent / delay_between_batches interface), without its
+    halve/double oscillation and per-minute cliff:
+
+    - Batch size (AIMD): a smoothed round-trip time (EWMA, like TCP's
+      SRTT) at or under ``target_ms`` grows the batch by ``increase``
+      records; above it the batch shrinks in proportion to the overshoot
+      (``size * target / srtt``, at most halving per sample).
+    - Send rate: a token bucket refilled at ``rate_per_s`` records/s and
+      holding up to ``burst`` records of credit. A backlog drains its
+      first ``burst`` records at once, then at exactly ``rate_per_s``,
+      so drain time is predictable (see drain_time_s) and the server
+      never sees more than the configured rate for long.
+
+    ``state()`` exposes the controller's internals for tuning.
+    """
+
+    def __init__(
+        self,
+        initial_batch_size: int | None = None,
+        min_batch_size: int = 5,
+        max_batch_size: int = 100,
+        target_ms: float | None = None,
+        increase: int | None = None,
+        rate_per_s: float | None = None,
+        burst: int | None = None,
+        smoothing: float = 0.25,
+    ):
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_ms = target_ms or _get_config("LATENCY_TARGET_MS", 1000)
+        self.increase = increase or _get_config("BATCH_INCREASE", 5)
+        self.rate_per_s = rate_per_s or _get_config("SEND_RATE_PER_S", 20.0)
+        self.burst = burst or _get_config("SEND_BURST", 1000)
+        self.smoothing = smoothing
+
+        self._size = float(initial_batch_size or _get_config("BATCH_SIZE", 50))
+        self.srtt_ms: float | None = None
+        self.tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._configured_rate = self.rate_per_s
+        self._rate_limited_until = 0.0
+
+    @property
+    def current_batch_size(self) -> int:
+        return int(self._size)
+
+    @current_batch_size.setter
+    def current_batch_size(self, value: int) -> None:
+        self._size = float(value)
+
+    def adjust(self, response_time_ms: float) -> None:
+        """Fold one round-trip time into SRTT and resize the batch."""
+        if self.srtt_ms is None:
+            self.srtt_ms = float(response_time_ms)
+        else:
+            self.srtt_ms += self.smoothing * (response_time_ms - self.srtt_ms)
+
+        if self.srtt_ms <= self.target_ms:
+            self._size += self.increase
+        else:
+            self._size *= max(0.5, self.target_ms / self.srtt_ms)
+        self._size = min(float(self.max_batch_size), max(float(self.min_batch_size), self._size))
+        logger.debug("Congestion state: %s", self.state())
+
+    def next_batch_size(self) -> int:
+        """Return batch size clamped by the tokens available now (0 = wait)."""
+        self._refill()
+        available = int(self.tokens)
+        if available < min(self.current_batch_size, self.min_batch_size):
+            return 0
+        return min(self.current_batch_size, available)
+
+    def record_sent(self, count: int) -> None:
+        """Spend ``count`` tokens (may go into debt with batches in flight)."""
+        self._refill()
+        self.tokens -= count
+
+    def delay_between_batches(self) -> float:
+        """Seconds until the bucket holds a full batch again (0 if it does)."""
+        self._refill()
+        missing = self.current_batch_size - self.tokens
+        return max(0.0, missing / self.rate_per_s)
+
+    def limit_rate(self, rate_per_s: float, duration_s: float) -> None:
+        """Obey a server rate hint for ``duration_s``; burst credit is forfeited."""
+        self._refill()
+        self.rate_per_s = min(self._configured_rate, rate_per_s)
+        self.tokens = min(self.tokens, 0.0)
+        self._rate_limited_until = time.monotonic() + duration_s
+
+    def drain_time_s(self, backlog: int) -> float:
+        """Predicted seconds to send ``backlog`` records at the current credit."""
+        self._refill()
+        return max(0.0, backlog - self.tokens) / self.rate_per_s
+
+    def state(self) -> dict:
+        """Internal state, for logs, status pages and tuning."""
+        self._refill()
+        return {
+            "batch_size": self.current_batch_size,
+            "srtt_ms": None if self.srtt_ms is None else round(self.srtt_ms, 1),
+            "target_ms": self.target_ms,
+            "rate_per_s": self.rate_per_s,
+            "tokens": round(self.tokens, 1),
+            "burst": self.burst,
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._rate_limited_until and now >= self._rate_limited_until:
+            self.rate_per_s = self._configured_rate
+            self._rate_limited_until = 0.0
+        self.tokens = min(
+            float(self.burst), self.tokens + (now - self._refilled_at) * self.rate_per_s,
+        )
+        self._refilled_at = now
+
+
+def make_congestion_controller():
+    """Controller selected by PERSISTENCE["CONGESTION_CONTROL"].
+
+    ``"latency"`` (default): LatencyTargetController.
+    ``"threshold"``: the original halve/double CongestionController.
+    """
+    if _get_config("CONGESTION_CONTROL", "latency") == "threshold":
+        return CongestionController()
+    return LatencyTargetController()
+
+
+@contextmanager
+def _shutdown_on_signal(engines: list["SyncEngine"]):
+    """Ask ``engines`` to finish their current batch on SIGTERM / SIGINT.
+
+    Signal handlers can only be installed from the main thread, so worker
+    threads never call this themselves.
+    """
+    original_sigterm = signal.getsignal(signal.SIGTERM)
+    original_sigint = signal.getsignal(signal.SIGINT)
+
+    def _handle_signal(signum, frame):
+        logger.info("Shutdown signal received, finishing current batch...")
+        for engine in engines:
+            engine._shutdown_requested = True
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, original_sigterm)
+        signal.signal(signal.SIGINT, original_sigint)
+
+
 class SyncEngine:
     """Orchestrates sync from local WAL to server.
 
     Supports two transport modes:
     - "direct": calls the ingest logic in-process (for MVP/SQLite)
-    - "http": POSTs to the server URL (for distributed deployments)
+    - "http": POSTs to the server URL (for distributed deployments),
+      see transport.HttpTransport; used when PERSISTENCE["INGEST_URL"]
+      is set. Up to ``max_in_flight`` batches are pipelined.
+
+    Batches are leased (claimed_by / lease_expires_at), so several engines
+    can drain the same WAL concurrently (see run_workers).
     """
 
-    def __init__(self, transport: Callable | None = None):
+    def __init__(
+        self,
+        transport: Callable | None = None,
+        worker_id: str | None = None,
+        lease_s: float | None = None,
+        max_in_flight: int | None = None,
+    ):
         """Initialize sync engine.
 
         Args:
             transport: Callable that accepts a list of measurement dicts
                        and returns a list of ACK dicts. If None, uses
                        the default direct transport.
+            worker_id: Owner name written to claimed records. Defaults to
+                       a unique host:pid:random id.
+            lease_s: Seconds this worker owns a claimed batch before any
+                     other worker may re-claim it.
+            max_in_flight: Batches sent concurrently per pass (K).
         """
         self.backoff = BackoffCalculator()
-        self.congestion = CongestionController()
-        self.transport = transport or self._direct_transport
+        self.congestion = make_congestion_controller()
+        self.transport = transport or self._default_transport()
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.lease_s = lease_s if lease_s is not None else _get_config("LEASE_S", 120)
+        self.max_in_flight = max(1, max_in_flight or _get_config("MAX_IN_FLIGHT", 1))
+        self._executor: ThreadPoolExecutor | None = None
+        self._resume_at = 0.0  # monotonic; set by a server 429
         self._shutdown_requested = False
 
     def run_once(self) -> dict:
-        """Single sync pass. Returns stats dict."""
+        """Single sync pass. Returns stats dict.
+
+        Claims up to ``max_in_flight`` batches and sends them concurrently.
+        Each batch's ACKs are matched to its own records by
+        idempotency_key, and each batch's round-trip time is fed to the
+        congestion controller as it completes.
+        """
         stats = {"synced": 0, "failed": 0, "skipped": 0}
 
-        batch_size = self.congestion.next_batch_size()
-        if batch_size <= 0:
-            logger.info("Burst limit reached, waiting for next minute window")
+        if self.paused_for() > 0:
             stats["skipped"] = 1
             return stats
 
-        records = self._pick_batch(batch_size)
-        if not records:
-            return stats
+        batches = []
+        while len(batches) < self.max_in_flight:
+            batch_size = self.congestion.next_batch_size()
+            if batch_size <= 0:
+                if not batches:
+                    logger.info("Send budget exhausted, waiting for it to refill")
+                    stats["skipped"] = 1
+                break
 
-        # Mark as syncing
-        pks = [r.pk for r in records]
-        PendingMeasurement.objects.filter(pk__in=pks).update(sync_status="syncing")
+            records = self._claim_batch(batch_size)
+            if not records:
+                break
+            # Charged when sent, so batches in flight share one budget.
+            self.congestion.record_sent(len(records))
+            batches.append(records)
+
+        if len(batches) == 1:
+            results = [self._send(batches[0])]
+        else:
+            pool = self._pool()
+            results = (
+                future.result()
+                for future in as_completed([pool.submit(self._send, r) for r in batches])
+            )
 
-        try:
-            payloads = [r.to_measurement_payload() for r in records]
-            start_ms = time.monotonic() * 1000
-            acks = self.transport(payloads)
-            elapsed_ms = time.monotonic() * 1000 - start_ms
+        for records, acks, elapsed_ms, error in results:
+            try:
+                if error is not None:
+                    raise error
+                self.congestion.adjust(elapsed_ms)
+                synced, failed = self._process_acks(records, acks)
+
+                stats["synced"] += synced
+                stats["failed"] += failed
+            except Backpressure as e:
+                self._back_off(records, e)
+                stats["skipped"] = 1
+            except Exception as e:
+                logger.error("Sync batch failed: %s", e)
+                self._handle_failure(records, str(e))
+                stats["failed"] += len(records)
+
+        return stats
 
-            self.congestion.adjust(elapsed_ms)
-            synced, failed = self._process_acks(records, acks)
-            self.congestion.record_sent(synced)
+    def paused_for(self) -> float:
+        """Seconds left of a server-requested pause (0 when free to send)."""
+        return max(0.0, self._resume_at - time.monotonic())
 
-            stats["synced"] = synced
-            stats["failed"] = failed
-        except Exception as e:
-            logger.error("Sync batch failed: %s", e)
-            self._handle_failure(records, str(e))
-            stats["failed"] = len(records)
+    def _back_off(self, records: list[PendingMeasurement], busy: Backpressure) -> None:
+        """Honour a 429: requeue the batch untouched, pause, obey the rate hint.
 
-        return stats
+        Not a failure: retry_count and last_error are left alone, the
+        records simply become due again after Retry-After.
+        """
+        logger.warning(
+            "Server busy: pausing %.0fs (rate hint: %s records/s), %d record(s) requeued",
+            busy.retry_after_s, busy.rate, len(records),
+        )
+        self._resume_at = max(self._resume_at, time.monotonic() + busy.retry_after_s)
+        limit_rate = getattr(self.congestion, "limit_rate", None)
+        if busy.rate and limit_rate is not None:
+            limit_rate(busy.rate, _get_config("RATE_HINT_S", 60))
+
+        now = timezone.now()
+        with _db_turn():
+            self._owned().filter(pk__in=[r.pk for r in records]).update(
+                sync_status="pending",
+                next_attempt_at=now + timedelta(seconds=busy.retry_after_s),
+                claimed_by="",
+                lease_expires_at=None,
+                updated_at=now,
+            )
+
+    def _send(self, records: list[PendingMeasurement]) -> tuple:
+        """Transport one batch: ``(records, acks, round_trip_ms, error)``."""
+        payloads = [r.to_measurement_payload() for r in records]
+        start_ms = time.monotonic() * 1000
+        try:
+            acks = self.transport(payloads)
+        except Exception as e:
+            return records, None, None, e
+        return records, acks, time.monotonic() * 1000 - start_ms, None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Sender threads for in-flight batches (kept, so sessions stay warm)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix="sync-send",
+            )
+        return self._executor
 
     def run_loop(self, max_iterations: int | None = None) -> None:
         """Continuous sync loop with graceful shutdown."""
         self._shutdown_requested = False
-        original_sigterm = signal.getsignal(signal.SIGTERM)
-        original_sigint = signal.getsignal(signal.SIGINT)
-
-        def _handle_signal(signum, frame):
-            logger.info("Shutdown signal received, finishing current batch...")
-            self._shutdown_requested = True
+        with _shutdown_on_signal([self]):
+            self._loop(max_iterations)
 
-        signal.signal(signal.SIGTERM, _handle_signal)
-        signal.signal(signal.SIGINT, _handle_signal)
+    def _loop(self, max_iterations: int | None = None) -> dict:
+        """Loop body of run_loop, without signal handling (worker threads).
 
+        Returns the stats summed over every pass.
+        """
+        totals = {"synced": 0, "failed": 0, "skipped": 0}
         iterations = 0
-        try:
-            while not self._shutdown_requested:
-                if max_iterations is not None and iterations >= max_iterations:
-                    break
-
-                stats = self.run_once()
-                iterations += 1
-
-                if stats["synced"] == 0 and stats["failed"] == 0:
-                    # Nothing to sync, sleep longer
-                    time.sleep(2.0)
-                else:
-                    time.sleep(self.congestion.delay_between_batches())
-        finally:
-            signal.signal(signal.SIGTERM, original_sigterm)
-            signal.signal(signal.SIGINT, original_sigint)
+        while not self._shutdown_requested:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+
+            stats = self.run_once()
+            iterations += 1
+            for key in totals:
+                totals[key] += stats[key]
+
+            if stats["skipped"]:
+                # Out of send budget, or told to wait by the server
+                time.sleep(max(self.congestion.delay_between_batches(), self.paused_for()))
+            elif stats["synced"] == 0 and stats["failed"] == 0:
+                # Nothing to sync, sleep longer
+                time.sleep(2.0)
+            else:
+                time.sleep(self.congestion.delay_between_batches())
 
         logger.info("Sync loop exited after %d iterations", iterations)
+        return totals
 
-    def _pick_batch(self, batch_size: int) -> list[PendingMeasurement]:
-        """Select records eligible for sync (pending or failed with backoff elapsed)."""
-        now = timezone.now()
-        eligible = []
+    @staticmethod
+    def _eligible(now) -> Q:
+        """Due records, plus 'syncing' ones whose worker's lease expired."""
+        return (
+            Q(sync_status__in=["pending", "failed"], next_attempt_at__lte=now)
+            | Q(sync_status="syncing", lease_expires_at__lte=now)
+        )
 
-        candidates = (
+    def _pick_batch(self, batch_size: int) -> list[PendingMeasurement]:
+        """Select records eligible for sync (pending or failed with backoff elapsed).
+
+        Backoff is stored on the record as next_attempt_at when it fails,
+        so eligibility is ONE ordered query on the (sync_status,
+        next_attempt_at) index: the batch always fills from whatever is
+        due, however many older records are still backing off. Records
+        stuck in 'syncing' by a crashed worker come back once its lease
+        expires.
+        """
+        return list(
             PendingMeasurement.objects
-            .filter(sync_status__in=["pending", "failed"])
-            .order_by("created_at")[:batch_size * 2]  # over-fetch to filter retries
+            .filter(self._eligible(timezone.now()))
+            .order_by("next_attempt_at", "pk")[:batch_size]
         )
 
-        for record in candidates:
-            if len(eligible) >= batch_size:
-                break
-
-            if record.sync_status == "pending":
-                eligible.append(record)
-            elif record.sync_status == "failed":
-                delay = self.backoff.delay_for(record.retry_count)
-                seconds_since_update = (now - record.updated_at).total_seconds()
-                if seconds_since_update >= delay:
-                    eligible.append(record)
+    def _claim_batch(self, batch_size: int) -> list[PendingMeasurement]:
+        """Lease up to ``batch_size`` eligible records to this worker.
+
+        ONE conditional UPDATE flips the picked records to 'syncing' with
+        ``claimed_by`` / ``lease_expires_at``; only records still eligible
+        are taken, so concurrent workers never share a record. On
+        PostgreSQL the pick is ``FOR UPDATE SKIP LOCKED``, so workers step
+        over each other's rows instead of waiting; SQLite serialises
+        writers, which makes the single UPDATE statement the equivalent
+        (worker threads take turns, see _db_turn). The claimed rows are
+        then read back by owner and lease.
+
+        Re-claiming a 'syncing' record whose lease expired counts as a
+        failed attempt (retry_count + 1, last_error "lease expired"), so
+        the attempts of a batch that keeps killing its worker are counted
+        and its backoff grows like any other failure's.
+        """
+        now = timezone.now()
+        lease = now + timedelta(seconds=self.lease_s)
+        due = (
+            PendingMeasurement.objects
+            .filter(self._eligible(now))
+            .order_by("next_attempt_at", "pk")
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
 
-        return eligible
+        with _db_turn():
+            with transaction.atomic():
+                claimed = (
+                    PendingMeasurement.objects
+                    .filter(self._eligible(now), pk__in=due.values("pk")[:batch_size])
+                    .update(
+                        retry_count=F("retry_count") + Case(
+                            When(sync_status="syncing", then=Value(1)), default=Value(0),
+                        ),
+                        last_error=Case(
+                            When(sync_status="syncing", then=Value(LEASE_EXPIRED_ERROR)),
+                            default=F("last_error"),
+                            output_field=TextField(),
+                        ),
+                        sync_status="syncing",
+                        claimed_by=self.worker_id,
+                        lease_expires_at=lease,
+                    )
+                )
+            if not claimed:
+                return []
+
+            return list(
+                PendingMeasurement.objects
+                .filter(
+                    sync_status="syncing",
+                    claimed_by=self.worker_id,
+                    lease_expires_at=lease,
+                )
+                .order_by("next_attempt_at", "pk")
+            )
 
     def _process_acks(
         self,
         records: list[PendingMeasurement],
         acks: list[dict],
     ) -> tuple[int, int]:
-        """Match ACKs to records by idempotency_key, verify and update."""
+        """Match ACKs to records by idempotency_key, verify and update.
+
+        The whole batch is verified first with one Merkle root comparison
+        (our data_hashes vs the confirmation_hashes, in record order); the
+        per-record hash checks only run when the roots differ, to find
+        which records are missing or mismatched.
+        """
         ack_map = {str(a["idempotency_key"]): a for a in acks}
-        synced = 0
-        failed = 0
 
+        expected_root = merkle_root([
+            leaf_hash(r.idempotency_key, r.data_hash) for r in records
+        ])
+        confirmed_root = merkle_root([
+            leaf_hash(
+                r.idempotency_key,
+                ack_map.get(str(r.idempotency_key), {}).get("confirmation_hash"),
+            )
+            for r in records
+        ])
+        batch_verified = expected_root == confirmed_root
+
+        # Outcomes are decided in memory, then written with one UPDATE per
+        # outcome class (bulk_update emits a CASE per field, so per-record
+        # errors and drift are kept) instead of one save() per record.
+        now = timezone.now()
+        synced: list[PendingMeasurement] = []
+        failed: list[PendingMeasurement] = []
         for record in records:
             key = str(record.idempotency_key)
             ack = ack_map.get(key)
@@ -247,24 +613,20 @@ class SyncEngine:
                 record.sync_status = "failed"
                 record.retry_count += 1
                 record.last_error = "No ACK received for this record"
-                record.save(update_fields=[
-                    "sync_status", "retry_count", "last_error", "updated_at",
-                ])
-                failed += 1
+                self._schedule_retry(record, now)
+                failed.append(record)
                 continue
 
             # Verify confirmation_hash matches our original data_hash
-            if ack.get("confirmation_hash") != record.data_hash:
+            if not batch_verified and ack.get("confirmation_hash") != record.data_hash:
                 record.sync_status = "failed"
                 record.retry_count += 1
                 record.last_error = (
                     f"Hash mismatch: expected {record.data_hash}, "
                     f"got {ack.get('confirmation_hash')}"
                 )
-                record.save(update_fields=[
-                    "sync_status", "retry_count", "last_error", "updated_at",
-                ])
-                failed += 1
+                self._schedule_retry(record, now)
+                failed.append(record)
                 continue
 
             # ACK verified — mark as synced
@@ -273,27 +635,60 @@ class SyncEngine:
             record.server_received_at = ack.get("server_received_at")
             record.clock_drift_ms = ack.get("clock_drift_ms")
             record.drift_flagged = ack.get("drift_flagged", False)
-            record.save(update_fields=[
-                "sync_status", "synced_measurement_id", "server_received_at",
-                "clock_drift_ms", "drift_flagged", "updated_at",
-            ])
-            synced += 1
+            self._release(record, now)
+            synced.append(record)
+
+        # A verified ACK is final whoever holds the lease now; a failure
+        # is only written while this worker still owns the record.
+        with _db_turn(), transaction.atomic():
+            if synced:
+                PendingMeasurement.objects.bulk_update(synced, SYNCED_FIELDS)
+            if failed:
+                self._owned().bulk_update(failed, FAILED_FIELDS)
 
-        return synced, failed
+        return len(synced), len(failed)
 
     def _handle_failure(
         self,
         records: list[PendingMeasurement],
         error: str,
     ) -> None:
-        """Mark all records in batch as failed."""
+        """Mark all records in batch as failed, with ONE UPDATE."""
+        now = timezone.now()
         for record in records:
             record.sync_status = "failed"
             record.retry_count += 1
             record.last_error = error
-            record.save(update_fields=[
-                "sync_status", "retry_count", "last_error", "updated_at",
-            ])
+            self._schedule_retry(record, now)
+        with _db_turn():
+            self._owned().bulk_update(records, FAILED_FIELDS)
+
+    def _schedule_retry(self, record: PendingMeasurement, now) -> None:
+        """Push a failed record's next_attempt_at out by its backoff delay."""
+        record.next_attempt_at = now + timedelta(
+            seconds=self.backoff.delay_for(record.retry_count)
+        )
+        self._release(record, now)
+
+    @staticmethod
+    def _release(record: PendingMeasurement, now) -> None:
+        record.claimed_by = ""
+        record.lease_expires_at = None
+        record.updated_at = now
+
+    def _owned(self):
+        """Records whose lease this worker still holds."""
+        return PendingMeasurement.objects.filter(
+            sync_status="syncing", claimed_by=self.worker_id,
+        )
+
+    @classmethod
+    def _default_transport(cls) -> Callable:
+        """HttpTransport to PERSISTENCE["INGEST_URL"] if set, else in-process."""
+        url = _get_config("INGEST_URL")
+        if url:
+            return HttpTransport(url, timeout_s=_get_config("HTTP_TIMEOUT_S", 30.0))
+        return cls._direct_transport
 
     @staticmethod
     def _direct_transport(payloads: list[dict]) -> list[dict]:
@@ -301,85 +696,49 @@ class SyncEngine:
 
         Used for MVP/single-machine deployments with SQLite.
         """
-        from modules.measurements.models import Measurement
-        from core.audit import AuditTrail
-
-        drift_threshold = _get_config("CLOCK_DRIFT_THRESHOLD_MS", 5000)
-        server_now = timezone.now()
-        acks = []
-
-        for payload in payloads:
-            idem_key = payload["idempotency_key"]
-
-            # Check for existing (idempotent)
-            existing = Measurement.objects.filter(idempotency_key=idem_key).first()
-            if existing:
-                acks.append({
-                    "idempotency_key": idem_key,
-                    "measurement_id": existing.pk,
-                    "confirmation_hash": existing.data_hash,
-                    "server_received_at": server_now.isoformat(),
-                    "clock_drift_ms": 0,
-                    "drift_flagged": False,
-                    "status": "duplicate",
-                })
-                continue
-
-            # Create Measurement
-            from django.utils.dateparse import parse_datetime
-            source_ts = payload["source_timestamp"]
-            if isinstance(source_ts, str):
-                source_ts = parse_datetime(source_ts)
+        from .ingest import ingest_batch
 
-            hub_ts = payload["hub_received_at"]
-            if isinstance(hub_ts, str):
-                hub_ts = parse_datetime(hub_ts)
+        with _db_turn():
+            return ingest_batch(payloads)
 
-            with transaction.atomic():
-                measurement = Measurement(
-                    sample_id=payload["sample_id"],
-                    instrument_id=payload["instrument_id"],
-                    parameter=payload["parameter"],
-                    value=Decimal(payload["value"]),
-                    unit=payload["unit"],
-                    measured_at=source_ts,
-                    idempotency_key=idem_key,
-                )
-                measurement.save()
 
-                # Preserve original data_hash (bypass auto-compute)
-                Measurement.objects.filter(pk=measurement.pk).update(
-                    data_hash=payload["data_hash"]
-                )
+def run_workers(
+    workers: int,
+    once: bool = False,
+    transport: Callable | None = None,
+    max_iterations: int | None = None,
+) -> dict:
+    """Drain the WAL with ``workers`` SyncEngines in parallel threads.
 
-                # Record audit trail
-                AuditTrail.record(
-                    entity_type="Measurement",
-                    entity_id=measurement.pk,
-                    operation="CREATE",
-                    changes={"source": "hub_sync", "idempotency_key": idem_key},
-                    snapshot_before={},
-                    snapshot_after={
-                        "parameter": payload["parameter"],
-                        "value": payload["value"],
-                        "unit": payload["unit"],
-                        "source_timestamp": str(source_ts),
-                        "data_hash": payload["data_hash"],
-                    },
-                )
+    Each engine leases its own batches (see SyncEngine._claim_batch), so
+    workers never send the same record twice, and a batch abandoned by a
+    dead worker is picked up again once its lease expires. ``once`` runs
+    a single pass per worker. Returns the summed stats of every pass.
+    """
+    engines = [SyncEngine(transport=transport) for _ in range(workers)]
+    totals = {"synced": 0, "failed": 0, "skipped": 0}
+    lock = threading.Lock()
 
-            # Clock drift
-            drift_ms = int((server_now - hub_ts).total_seconds() * 1000)
-            flagged = abs(drift_ms) > drift_threshold
-
-            acks.append({
-                "idempotency_key": idem_key,
-                "measurement_id": measurement.pk,
-                "confirmation_hash": payload["data_hash"],
-                "server_received_at": server_now.isoformat(),
-                "clock_drift_ms": drift_ms,
-                "drift_flagged": flagged,
-                "status": "created",
-            })
-
-        return acks
+    def _work(engine: SyncEngine) -> None:
+        try:
+            stats = engine.run_once() if once else engine._loop(max_iterations)
+            with lock:
+                for key in totals:
+                    totals[key] += stats[key]
+        finally:
+            # Each thread has its own DB connection; don't leak it.
+            connection.close()
+
+    threads = [
+        threading.Thread(target=_work, args=(engine,), name=f"sync-worker-{i}")
+        for i, engine in enumerate(engines)
+    ]
+    with _shutdown_on_signal(engines):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            # join() with a timeout keeps the main thread responsive to signals
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+
+    return totals
@@ -0,0 +1,181 @@
+"""Tests for admission control (429 backpressure) and its clients.
+
+Verifies:
+1. Requests are admitted until in-flight work or latency is over its limit;
+   a request with nothing in flight is always admitted
+2. Retry-After is jittered between one and two base periods; the rate hint
+   is the observed throughput shared among recently seen hubs
+3. Saturated capture / ingest endpoints answer 429 with Retry-After and
+   X-BioNexus-Rate; slots are released whatever the outcome
+4. HttpTransport turns a 429 into Backpressure
+5. SyncEngine requeues a throttled batch without counting a failure,
+   pauses for Retry-After and obeys the rate hint
+"""
+
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from modules.persistence import admission
+from modules.persistence.admission import AdmissionController, ServerBusy
+from modules.persistence.models import PendingMeasurement
+from modules.persistence.sync_engine import LatencyTargetController, SyncEngine
+from modules.persistence.transport import RATE_HEADER, Backpressure, HttpTransport
+
+from .test_offline import _make_payload
+from .test_transport import FakeResponse, FakeSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmissionController(SimpleTestCase):
+    """Test admit / reject decisions and the hints."""
+
+    def _ctrl(self, **kwargs):
+        defaults = {"max_in_flight": 2, "latency_ms": 500, "retry_after_s": 4}
+        defaults.update(kwargs)
+        return AdmissionController(clock=FakeClock(), **defaults)
+
+    def test_rejects_past_max_in_flight(self):
+        ctrl = self._ctrl()
+        ctrl.enter("box-1")
+        ctrl.enter("box-2")
+
+        with self.assertRaises(ServerBusy):
+            ctrl.enter("box-3")
+        assert (ctrl.in_flight, ctrl.rejected) == (2, 1)
+
+    def test_rejects_while_latency_over_limit(self):
+        ctrl = self._ctrl(max_in_flight=10)
+        started = ctrl.enter("box-1")
+        ctrl.clock.now += 2.0  # a 2 s request
+        ctrl.leave(started, records=100)
+
+        ctrl.enter("box-1")
+        with self.assertRaises(ServerBusy):
+            ctrl.enter("box-2")
+
+    def test_idle_server_always_admits(self):
+        ctrl = self._ctrl()
+        ctrl.avg_latency_ms = 60_000.0
+
+        ctrl.leave(ctrl.enter("box-1"))
+        assert ctrl.in_flight == 0
+
+    def test_retry_after_is_jittered(self):
+        ctrl = self._ctrl(retry_after_s=4)
+        waits = {ctrl.retry_after() for _ in range(200)}
+
+        assert min(waits) >= 4 and max(waits) <= 8
+        assert len(waits) > 1
+
+    def test_rate_hint_is_a_fair_share(self):
+        ctrl = self._ctrl(max_in_flight=2)
+        for client in ("box-1", "box-2", "box-3", "box-4"):
+            started = ctrl.enter(client)
+            ctrl.clock.now += 0.5
+            ctrl.leave(started, records=100)  # 200 records/s per slot
+
+        # 2 slots x 200 records/s shared by 4 hubs
+        assert ctrl.rate_hint(ctrl.clock.now) == 100.0
+
+        ctrl.clock.now += admission.CLIENT_WINDOW_S + 1
+        ctrl._clients["box-1"] = ctrl.clock.now
+        assert ctrl.rate_hint(ctrl.clock.now) == 400.0
+
+
+class TestAdmissionOnEndpoints(TestCase):
+    """Test 429 responses on the persistence endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.ctrl = AdmissionController(max_in_flight=1, latency_ms=500, retry_after_s=3)
+        patcher = patch.object(admission, "ADMISSION", self.ctrl)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_saturated_endpoints_answer_429(self):
+        self.ctrl.in_flight = 1
+        self.ctrl.avg_records_per_s = 40.0
+
+        for url, body in (
+            ("/api/persistence/capture/", _make_payload()),
+            ("/api/persistence/capture/batch/", [_make_payload()]),
+            ("/api/persistence/ingest/", []),
+        ):
+            resp = self.client.post(url, body, format="json", HTTP_X_DEVICE_ID="BNX-1")
+            assert resp.status_code == 429, url
+            assert 3 <= int(resp["Retry-After"]) <= 6
+            assert float(resp[RATE_HEADER]) > 0
+
+        assert PendingMeasurement.objects.count() == 0
+        assert self.ctrl.in_flight == 1
+
+    def test_reads_are_not_admission_controlled(self):
+        self.ctrl.in_flight = 1
+        assert self.client.get("/api/persistence/pending/").status_code == 200
+
+    def test_slot_released_on_success_and_error(self):
+        resp = self.client.post("/api/persistence/capture/", _make_payload(), format="json")
+        assert resp.status_code == 201
+        resp = self.client.post("/api/persistence/capture/", {"value": "x"}, format="json")
+        assert resp.status_code == 400
+
+        assert self.ctrl.in_flight == 0
+        assert self.ctrl.avg_latency_ms is not None
+
+
+class TestSyncEngineBackpressure(TestCase):
+    """Test SyncEngine and HttpTransport honouring a 429."""
+
+    def test_transport_raises_backpressure(self):
+        transport = HttpTransport("http://server.test")
+        transport._local.session = FakeSession(lambda data, headers: FakeResponse(
+            429, {"detail": "busy"}, {"Retry-After": "9", RATE_HEADER: "25.5"},
+        ))
+
+        with self.assertRaises(Backpressure) as ctx:
+            transport([{"idempotency_key": str(uuid.uuid4()), "data_hash": "a" * 64}])
+        assert (ctx.exception.retry_after_s, ctx.exception.rate) == (9.0, 25.5)
+
+    def test_throttled_batch_is_requeued_not_failed(self):
+        now = timezone.now()
+        for _ in range(3):
+            PendingMeasurement.objects.create(
+                sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+                unit="pH", data_hash="a" * 64, source_timestamp=now, hub_received_at=now,
+            )
+        calls = []
+
+        def transport(payloads):
+            calls.append(len(payloads))
+            raise Backpressure(30.0, rate=2.0)
+
+        engine = SyncEngine(transport=transport)
+        engine.congestion = LatencyTargetController(rate_per_s=20.0, burst=100)
+
+        stats = engine.run_once()
+
+        assert stats == {"synced": 0, "failed": 0, "skipped": 1}
+        for record in PendingMeasurement.objects.all():
+            assert (record.sync_status, record.retry_count, record.claimed_by) == (
+                "pending", 0, "",
+            )
+            assert record.next_attempt_at >= timezone.now() + timedelta(seconds=25)
+        assert 25 < engine.paused_for() <= 30
+        assert engine.congestion.rate_per_s == 2.0
+        assert engine.congestion.tokens <= 0
+
+        assert engine.run_once()["skipped"] == 1
+        assert calls == [3]
@@ -0,0 +1,156 @@
+"""Tests for archival of synced WAL records (hot/cold split).
+
+Verifies:
+1. Only synced records captured before the cutoff are moved; pending,
+   failed and recent synced records stay in the WAL
+2. Archived copies keep the reading, drift, ACK and Merkle fields and
+   the original pk
+3. Records move in chunks and a rerun is a no-op
+4. A capture retried after archival (single object or array) is still
+   reported as existing
+5. Merkle proofs are served for archived records
+6. The archive_synced management command
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from modules.persistence.archive import archive_synced
+from modules.persistence.merkle import leaf_hash, verify_inclusion
+from modules.persistence.models import ArchivedMeasurement, PendingMeasurement
+
+from .test_offline import _make_payload
+
+
+def _record(status="synced", age_days=10, **kwargs):
+    now = timezone.now()
+    record = PendingMeasurement.objects.create(
+        sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+        unit="pH", data_hash="a" * 64, source_timestamp=now, hub_received_at=now,
+        sync_status=status, **kwargs,
+    )
+    PendingMeasurement.objects.filter(pk=record.pk).update(
+        created_at=now - timedelta(days=age_days),
+    )
+    return record
+
+
+class TestArchiveSynced(TestCase):
+    """Test moving synced records out of the WAL."""
+
+    def test_moves_only_old_synced_records(self):
+        old = _record()
+        kept = [
+            _record(age_days=1),
+            _record(status="pending"),
+            _record(status="failed"),
+            _record(status="syncing"),
+        ]
+
+        assert archive_synced(timedelta(days=7)) == 1
+
+        assert list(ArchivedMeasurement.objects.values_list("pk", flat=True)) == [old.pk]
+        assert set(PendingMeasurement.objects.values_list("pk", flat=True)) == {
+            r.pk for r in kept
+        }
+
+    def test_keeps_forensic_fields(self):
+        now = timezone.now()
+        record = _record(
+            server_received_at=now, clock_drift_ms=9000, drift_flagged=True,
+            synced_measurement_id=42, retry_count=3, merkle_index=2,
+        )
+        record.refresh_from_db()
+
+        archive_synced(timedelta(days=7))
+
+        archived = ArchivedMeasurement.objects.get(pk=record.pk)
+        assert archived.idempotency_key == record.idempotency_key
+        assert (archived.value, archived.data_hash) == (record.value, record.data_hash)
+        assert (archived.clock_drift_ms, archived.drift_flagged) == (9000, True)
+        assert (archived.synced_measurement_id, archived.retry_count) == (42, 3)
+        assert (archived.server_received_at, archived.merkle_index) == (now, 2)
+        assert archived.created_at == record.created_at
+        assert archived.synced_at == record.updated_at
+
+    def test_moves_in_chunks_and_is_idempotent(self):
+        for _ in range(5):
+            _record()
+
+        with CaptureQueriesContext(connection) as ctx:
+            moved = archive_synced(timedelta(days=7), batch_size=2)
+
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        assert (moved, len(inserts)) == (5, 3)
+        assert ArchivedMeasurement.objects.count() == 5
+        assert not PendingMeasurement.objects.exists()
+        assert archive_synced(timedelta(days=7)) == 0
+
+
+class TestArchivedLookups(TestCase):
+    """Test capture idempotency and Merkle proofs across the archive."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.payload = _make_payload()
+        resp = self.client.post("/api/persistence/capture/batch/", [self.payload], format="json")
+        self.pk = resp.data[0]["id"]
+        PendingMeasurement.objects.filter(pk=self.pk).update(
+            sync_status="synced", created_at=timezone.now() - timedelta(days=30),
+        )
+        archive_synced(timedelta(days=7))
+
+    def test_retried_capture_is_existing(self):
+        resp = self.client.post(
+            "/api/persistence/capture/batch/", [self.payload, _make_payload()], format="json",
+        )
+
+        assert [r["status"] for r in resp.data] == ["existing", "created"]
+        assert resp.data[0]["id"] == self.pk
+        assert PendingMeasurement.objects.count() == 1
+
+    def test_retried_single_capture_returns_archived_record(self):
+        resp = self.client.post("/api/persistence/capture/", self.payload, format="json")
+
+        assert resp.status_code == 200
+        assert (resp.data["id"], resp.data["sync_status"]) == (self.pk, "synced")
+        assert resp.data["idempotency_key"] == self.payload["idempotency_key"]
+        assert not PendingMeasurement.objects.exists()
+
+    def test_proof_for_archived_record(self):
+        resp = self.client.get(f"/api/persistence/proofs/{self.payload['idempotency_key']}/")
+
+        assert resp.status_code == 200
+        leaf = leaf_hash(self.payload["idempotency_key"], self.payload["data_hash"])
+        assert resp.data["leaf"] == leaf.hex()
+        assert verify_inclusion(
+            leaf, resp.data["index"], resp.data["size"],
+            [bytes.fromhex(node) for node in resp.data["proof"]],
+            bytes.fromhex(resp.data["root"]),
+        )
+
+
+class TestArchiveCommand(TestCase):
+    """Test the archive_synced management command."""
+
+    def test_days_option(self):
+        _record(age_days=10)
+        _record(age_days=3)
+        out = StringIO()
+
+        call_command("archive_synced", "--days", "2", stdout=out)
+
+        assert "Archived 2 synced records older than 2 days" in out.getvalue()
+        assert not PendingMeasurement.objects.exists()
+
+    def test_rejects_negative_days(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_synced", "--days", "-1")
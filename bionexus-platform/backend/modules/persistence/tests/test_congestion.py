@@ -6,18 +6,27 @@ Verifies:
 3. Burst limit respected (never > max_burst_per_minute)
 4. Clock drift calculated correctly
 5. Drift flagged when exceeding threshold
+6. Latency-target controller: additive increase under the target,
+   proportional decrease over it, token bucket with burst credit,
+   predictable drain time and exposed state
 """
 
 import uuid
 from decimal import Decimal
 from unittest.mock import patch
 
+import pytest
+
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework.test import APIClient
 
 from modules.instruments.models import Instrument
-from modules.persistence.sync_engine import CongestionController
+from modules.persistence.sync_engine import (
+    CongestionController,
+    LatencyTargetController,
+    SyncEngine,
+)
 from modules.samples.models import Sample
 
 
@@ -94,6 +103,88 @@ class TestCongestionController(TestCase):
         assert ctrl.next_batch_size() == 50
 
 
+class TestLatencyTargetController(TestCase):
+    """Test AIMD batch sizing and the token-bucket send rate."""
+
+    def _ctrl(self, **kwargs):
+        defaults = {
+            "initial_batch_size": 40, "min_batch_size": 5, "max_batch_size": 100,
+            "target_ms": 1000, "increase": 5, "rate_per_s": 10.0, "burst": 300,
+            "smoothing": 1.0,  # no smoothing: each sample counts fully
+        }
+        defaults.update(kwargs)
+        return LatencyTargetController(**defaults)
+
+    def test_additive_increase_under_target(self):
+        ctrl = self._ctrl()
+
+        for _ in range(3):
+            ctrl.adjust(400)
+
+        assert ctrl.current_batch_size == 55
+
+    def test_proportional_decrease_over_target(self):
+        ctrl = self._ctrl()
+
+        ctrl.adjust(1250)  # 25% over target -> x0.8
+        assert ctrl.current_batch_size == 32
+
+        ctrl.adjust(10_000)  # far over target: at most halved
+        assert ctrl.current_batch_size == 16
+
+    def test_settles_instead_of_oscillating(self):
+        """Around the target the size moves by small steps, never x2 / /2."""
+        ctrl = self._ctrl(smoothing=0.25)
+        sizes = []
+        for rtt in [900, 1100, 950, 1050, 1000, 1080, 920] * 3:
+            ctrl.adjust(rtt)
+            sizes.append(ctrl.current_batch_size)
+
+        steps = [abs(b - a) for a, b in zip(sizes, sizes[1:])]
+        assert max(steps) <= 5
+        assert 5 <= min(sizes) and max(sizes) <= 100
+
+    def test_burst_credit_then_steady_rate(self):
+        ctrl = self._ctrl(initial_batch_size=100)
+
+        for _ in range(3):
+            assert ctrl.next_batch_size() == 100
+            ctrl.record_sent(100)
+        assert ctrl.next_batch_size() == 0
+
+        ctrl._refilled_at -= 5  # 5 s at 10/s -> 50 tokens
+        assert ctrl.next_batch_size() == 50
+        assert ctrl.delay_between_batches() == pytest.approx(5.0, abs=0.01)
+
+    def test_tokens_capped_at_burst(self):
+        ctrl = self._ctrl()
+        ctrl._refilled_at -= 3600
+
+        assert ctrl.state()["tokens"] == 300
+
+    def test_drain_time_is_predictable(self):
+        ctrl = self._ctrl()
+
+        # 300 records of credit, then 10 records/s
+        assert ctrl.drain_time_s(250) == 0
+        assert ctrl.drain_time_s(900) == pytest.approx(60.0, abs=0.01)
+
+    def test_state_exposed(self):
+        ctrl = self._ctrl()
+        ctrl.adjust(500)
+
+        state = ctrl.state()
+        assert state["batch_size"] == 45
+        assert state["srtt_ms"] == 500
+        assert (state["target_ms"], state["rate_per_s"], state["burst"]) == (1000, 10.0, 300)
+        assert state["tokens"] == pytest.approx(300, abs=0.1)
+
+    def test_engine_selects_controller_from_settings(self):
+        assert isinstance(SyncEngine().congestion, LatencyTargetController)
+        with self.settings(PERSISTENCE={"CONGESTION_CONTROL": "threshold"}):
+            assert isinstance(SyncEngine().congestion, CongestionController)
+
+
 class TestClockDrift(TestCase):
     """Test clock drift detection via the ingest endpoint."""
 
@@ -0,0 +1,143 @@
+"""Tests for lease-based claiming and parallel SyncEngine workers.
+
+Verifies:
+1. Concurrent engines claim disjoint batches, stamped with owner and lease
+2. A 'syncing' record is re-claimed only once its lease has expired, and
+   the re-claim counts as a failed attempt
+3. A worker that lost its lease cannot overwrite the new owner's claim
+4. run_workers / sync_pending --workers drain the WAL with no record sent twice
+"""
+
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from modules.persistence.models import PendingMeasurement
+from modules.persistence.sync_engine import SyncEngine, run_workers
+
+
+def _create(count):
+    now = timezone.now()
+    return [
+        PendingMeasurement.objects.create(
+            sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+            unit="pH", data_hash=f"{i:064x}", source_timestamp=now,
+            hub_received_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _ack_all(payloads):
+    return [
+        {
+            "idempotency_key": p["idempotency_key"],
+            "measurement_id": i + 1,
+            "confirmation_hash": p["data_hash"],
+            "server_received_at": timezone.now().isoformat(),
+            "clock_drift_ms": 0,
+            "drift_flagged": False,
+            "status": "created",
+        }
+        for i, p in enumerate(payloads)
+    ]
+
+
+class TestClaiming(TestCase):
+    """Test lease claims between engines."""
+
+    def test_engines_claim_disjoint_batches(self):
+        _create(10)
+        first = SyncEngine(worker_id="w1")
+        second = SyncEngine(worker_id="w2")
+
+        a = first._claim_batch(6)
+        b = second._claim_batch(6)
+
+        assert (len(a), len(b)) == (6, 4)
+        assert not {r.pk for r in a} & {r.pk for r in b}
+        assert {r.claimed_by for r in a} == {"w1"}
+        assert all(r.sync_status == "syncing" and r.lease_expires_at for r in b)
+        assert SyncEngine(worker_id="w3")._claim_batch(6) == []
+
+    def test_expired_lease_is_reclaimed(self):
+        _create(3)
+        crashed = SyncEngine(worker_id="crashed", lease_s=60)
+        crashed._claim_batch(3)
+        survivor = SyncEngine(worker_id="survivor", transport=_ack_all)
+
+        assert survivor.run_once()["synced"] == 0
+
+        PendingMeasurement.objects.update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        assert survivor.run_once()["synced"] == 3
+        assert set(PendingMeasurement.objects.values_list("claimed_by", flat=True)) == {""}
+        assert not PendingMeasurement.objects.filter(lease_expires_at__isnull=False).exists()
+
+    def test_stale_worker_failure_does_not_clobber_new_owner(self):
+        [record] = _create(1)
+        stale = SyncEngine(worker_id="stale", lease_s=0)
+        records = stale._claim_batch(1)
+        SyncEngine(worker_id="owner")._claim_batch(1)
+
+        stale._handle_failure(records, "timed out")
+
+        record.refresh_from_db()
+        assert (record.sync_status, record.claimed_by) == ("syncing", "owner")
+        # Bumped once by the owner's re-claim, not by the stale failure.
+        assert (record.retry_count, record.last_error) == (1, "lease expired")
+
+    def test_reclaim_after_expired_lease_counts_as_attempt(self):
+        [record] = _create(1)
+        for attempt in range(1, 4):
+            SyncEngine(worker_id=f"w{attempt}", lease_s=0)._claim_batch(1)
+            record.refresh_from_db()
+            assert record.retry_count == attempt - 1
+
+        assert record.last_error == "lease expired"
+        engine = SyncEngine(worker_id="w4", transport=lambda payloads: [])
+        engine.backoff.jitter_s = 0
+        engine.run_once()
+
+        record.refresh_from_db()
+        assert (record.sync_status, record.retry_count) == ("failed", 4)
+        assert record.next_attempt_at - record.updated_at == timedelta(
+            seconds=engine.backoff.delay_for(4),
+        )
+
+
+class TestWorkers(TransactionTestCase):
+    """Test parallel draining (real threads, committed rows)."""
+
+    def setUp(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def _transport(self, payloads):
+        with self.lock:
+            self.sent.extend(p["idempotency_key"] for p in payloads)
+        return _ack_all(payloads)
+
+    def test_workers_drain_without_duplicates(self):
+        _create(120)
+
+        stats = run_workers(3, once=True, transport=self._transport)
+
+        assert stats["synced"] == 120
+        assert len(self.sent) == len(set(self.sent)) == 120
+        assert PendingMeasurement.objects.filter(sync_status="synced").count() == 120
+
+    def test_sync_pending_workers_option(self):
+        _create(4)
+        out = StringIO()
+
+        call_command("sync_pending", "--once", "--workers", "2", stdout=out)
+
+        assert "Sync pass complete" in out.getvalue()
+        assert not PendingMeasurement.objects.filter(sync_status="pending").exists()
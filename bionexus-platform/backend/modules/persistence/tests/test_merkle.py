@@ -0,0 +1,226 @@
+"""Tests for Merkle-batched integrity proofs.
+
+Verifies:
+1. Root matches the RFC 6962 split-tree construction and the box's vector
+2. Every inclusion proof verifies; a wrong leaf or index does not
+3. Batch capture accepts a matching X-BioNexus-Merkle-Root and echoes it;
+   a single-object capture stores no batch
+4. Batch capture rejects a mismatched root without writing anything
+5. Proof endpoint returns a proof that verifies against the stored root
+6. Ingest ACKs carry the batch root; SyncEngine falls back to per-record
+   checks only when the roots differ
+"""
+
+import hashlib
+import uuid
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from modules.persistence.merkle import (
+    MERKLE_ROOT_HEADER,
+    batch_root,
+    inclusion_proof,
+    leaf_hash,
+    merkle_root,
+    verify_inclusion,
+)
+from modules.persistence.models import MerkleBatch, PendingMeasurement
+from modules.persistence.sync_engine import SyncEngine
+
+from .test_offline import _make_payload
+from .test_sync import _create_instrument, _create_sample, _make_ingest_payload
+
+# Shared with box/tests/test_merkle.py: both sides must agree on the root.
+VECTOR_ITEMS = [
+    {"idempotency_key": f"00000000-0000-0000-0000-00000000000{i}", "data_hash": str(i) * 64}
+    for i in range(5)
+]
+VECTOR_ROOT = "b6010167a213d4960dceae841f4b8fa225314563dfc4c123e515c385b3924742"
+
+
+def _reference_root(leaves):
+    """RFC 6962 §2.1 definition, recursive (for cross-checking only)."""
+    if len(leaves) == 1:
+        return leaves[0]
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return hashlib.sha256(
+        b"\x01" + _reference_root(leaves[:k]) + _reference_root(leaves[k:])
+    ).digest()
+
+
+class TestMerkleTree(TestCase):
+    """Test the tree construction and audit paths."""
+
+    def test_known_vector(self):
+        assert batch_root(VECTOR_ITEMS) == VECTOR_ROOT
+
+    def test_root_matches_reference_construction(self):
+        for size in range(1, 34):
+            leaves = [leaf_hash(str(i), f"{i:064x}") for i in range(size)]
+            assert merkle_root(leaves) == _reference_root(leaves)
+
+    def test_every_proof_verifies(self):
+        for size in (1, 2, 3, 7, 8, 13):
+            leaves = [leaf_hash(str(i), f"{i:064x}") for i in range(size)]
+            root = merkle_root(leaves)
+            for index in range(size):
+                proof = inclusion_proof(leaves, index)
+                assert verify_inclusion(leaves[index], index, size, proof, root)
+                assert len(proof) <= (size - 1).bit_length()
+
+    def test_tampered_leaf_or_index_rejected(self):
+        leaves = [leaf_hash(str(i), f"{i:064x}") for i in range(6)]
+        root = merkle_root(leaves)
+        proof = inclusion_proof(leaves, 2)
+
+        assert not verify_inclusion(leaf_hash("2", "f" * 64), 2, 6, proof, root)
+        assert not verify_inclusion(leaves[2], 3, 6, proof, root)
+        assert not verify_inclusion(leaves[2], 2, 6, proof[:-1], root)
+
+
+class TestMerkleBatchCapture(TestCase):
+    """Test root verification on /api/persistence/capture/batch/."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/api/persistence/capture/batch/"
+
+    def test_matching_root_accepted_and_echoed(self):
+        payloads = [_make_payload(data_hash=f"{i:064x}") for i in range(4)]
+        root = batch_root(payloads)
+
+        resp = self.client.post(
+            self.url, payloads, format="json", HTTP_X_BIONEXUS_MERKLE_ROOT=root,
+            HTTP_X_DEVICE_ID="BNX-TEST",
+        )
+
+        assert resp.status_code == 200
+        assert resp[MERKLE_ROOT_HEADER] == root
+        batch = MerkleBatch.objects.get()
+        assert (batch.root, batch.size, batch.device_id) == (root, 4, "BNX-TEST")
+        assert sorted(
+            PendingMeasurement.objects.values_list("merkle_index", flat=True)
+        ) == [0, 1, 2, 3]
+
+    def test_mismatched_root_rejected(self):
+        payloads = [_make_payload() for _ in range(3)]
+        root = batch_root(payloads)
+        payloads[1]["data_hash"] = "f" * 64  # altered in transit
+
+        resp = self.client.post(
+            self.url, payloads, format="json", HTTP_X_BIONEXUS_MERKLE_ROOT=root,
+        )
+
+        assert resp.status_code == 400
+        assert resp.json()["expected_root"] == batch_root(payloads)
+        assert PendingMeasurement.objects.count() == 0
+        assert MerkleBatch.objects.count() == 0
+
+    def test_proof_endpoint_verifies_against_root(self):
+        payloads = [_make_payload(data_hash=f"{i:064x}") for i in range(5)]
+        self.client.post(self.url, payloads, format="json")
+        target = payloads[3]
+
+        resp = self.client.get(f"/api/persistence/proofs/{target['idempotency_key']}/")
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["root"] == batch_root(payloads)
+        assert (body["index"], body["size"]) == (3, 5)
+        leaf = leaf_hash(target["idempotency_key"], target["data_hash"])
+        assert body["leaf"] == leaf.hex()
+        assert verify_inclusion(
+            leaf, body["index"], body["size"],
+            [bytes.fromhex(node) for node in body["proof"]],
+            bytes.fromhex(body["root"]),
+        )
+
+    def test_single_capture_stores_no_batch(self):
+        payload = _make_payload()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post("/api/persistence/capture/", payload, format="json")
+
+        assert resp.status_code == 201
+        assert resp.data["merkle_batch"] is None
+        assert not MerkleBatch.objects.exists()
+        # WAL lookup + archive lookup, then the INSERT; no read-back.
+        selects = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        assert len(selects) == 2
+        resp = self.client.get(f"/api/persistence/proofs/{payload['idempotency_key']}/")
+        assert resp.status_code == 404
+
+    def test_proof_404_outside_a_batch(self):
+        now = timezone.now()
+        record = PendingMeasurement.objects.create(
+            sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+            unit="pH", data_hash="a" * 64, source_timestamp=now, hub_received_at=now,
+        )
+
+        resp = self.client.get(f"/api/persistence/proofs/{record.idempotency_key}/")
+        assert resp.status_code == 404
+        resp = self.client.get(f"/api/persistence/proofs/{uuid.uuid4()}/")
+        assert resp.status_code == 404
+
+
+class TestMerkleAcks(TestCase):
+    """Test batch-level ACK verification in SyncEngine."""
+
+    def _create_pending(self, count):
+        now = timezone.now()
+        return [
+            PendingMeasurement.objects.create(
+                sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+                unit="pH", data_hash=f"{i:064x}", source_timestamp=now,
+                hub_received_at=now,
+            )
+            for i in range(count)
+        ]
+
+    def _acks(self, records, tamper=None):
+        tamper = tamper or {}
+        return [
+            {
+                "idempotency_key": str(r.idempotency_key),
+                "measurement_id": i + 1,
+                "confirmation_hash": tamper.get(i, r.data_hash),
+                "server_received_at": timezone.now().isoformat(),
+                "clock_drift_ms": 0,
+                "drift_flagged": False,
+                "status": "created",
+            }
+            for i, r in enumerate(records)
+        ]
+
+    def test_matching_roots_sync_whole_batch(self):
+        records = self._create_pending(4)
+        engine = SyncEngine(transport=lambda payloads: self._acks(records))
+
+        stats = engine.run_once()
+
+        assert (stats["synced"], stats["failed"]) == (4, 0)
+
+    def test_mismatch_pinpoints_the_bad_record(self):
+        records = self._create_pending(4)
+        engine = SyncEngine(transport=lambda payloads: self._acks(records, {2: "0" * 64}))
+
+        stats = engine.run_once()
+
+        assert (stats["synced"], stats["failed"]) == (3, 1)
+        bad = PendingMeasurement.objects.get(pk=records[2].pk)
+        assert bad.sync_status == "failed"
+        assert "Hash mismatch" in bad.last_error
+
+    def test_ingest_response_carries_ack_root(self):
+        instrument = _create_instrument()
+        sample = _create_sample(instrument)
+        payloads = [_make_ingest_payload(sample.pk, instrument.pk) for _ in range(2)]
+
+        resp = APIClient().post("/api/persistence/ingest/", payloads, format="json")
+
+        assert resp.status_code == 200
+        assert resp[MERKLE_ROOT_HEADER] == batch_root(payloads)
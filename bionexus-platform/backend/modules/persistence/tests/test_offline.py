@@ -6,18 +6,26 @@ Verifies:
 3. source_timestamp preserved verbatim
 4. data_hash preserved verbatim
 5. Two different keys → two records
+6. Batch capture: per-item created / existing / invalid results
+7. Batch capture accepts gzip-encoded bodies
+8. Capture accepts a JSON array with per-item created / existing results
+9. A concurrent insert of the same key is reported "existing", not an error
 """
 
+import gzip
+import json
 import uuid
 from datetime import timezone as dt_tz
 from decimal import Decimal
 
+from unittest.mock import patch
+
 import pytest
 from django.test import TestCase
 from django.utils import timezone
 from rest_framework.test import APIClient
 
-from modules.persistence.models import PendingMeasurement
+from modules.persistence.models import MerkleBatch, PendingMeasurement
 
 
 def _make_payload(**overrides):
@@ -103,3 +111,124 @@ class TestOfflineCapture(TestCase):
         self.client.post(self.url, payload2, format="json")
 
         assert PendingMeasurement.objects.count() == 2
+
+    def test_capture_accepts_array(self):
+        """An array is captured in one request with per-item status."""
+        first = _make_payload()
+        self.client.post(self.url, first, format="json")
+        payloads = [first] + [_make_payload() for _ in range(3)]
+
+        resp = self.client.post(self.url, payloads, format="json")
+
+        assert resp.status_code == 200
+        results = resp.json()
+        assert [r["status"] for r in results] == ["existing"] + ["created"] * 3
+        assert [r["idempotency_key"] for r in results] == [
+            p["idempotency_key"] for p in payloads
+        ]
+        assert PendingMeasurement.objects.count() == 4
+
+    def test_concurrent_insert_reported_existing(self):
+        """A row inserted by a racing retry after the lookup is not an error."""
+        payload = _make_payload()
+        create_batch = MerkleBatch.objects.create
+
+        def racing_retry(**kwargs):
+            PendingMeasurement.objects.create(**{
+                **payload, "value": Decimal(payload["value"]),
+                "source_timestamp": timezone.now(), "hub_received_at": timezone.now(),
+            })
+            return create_batch(**kwargs)
+
+        with patch.object(MerkleBatch.objects, "create", side_effect=racing_retry):
+            resp = self.client.post(self.url, [payload, _make_payload()], format="json")
+
+        assert resp.status_code == 200
+        assert [r["status"] for r in resp.json()] == ["existing", "created"]
+        assert PendingMeasurement.objects.count() == 2
+
+
+class TestBatchCapture(TestCase):
+    """Test the /api/persistence/capture/batch/ endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/api/persistence/capture/batch/"
+
+    def test_batch_creates_all_items(self):
+        payloads = [_make_payload() for _ in range(5)]
+        resp = self.client.post(self.url, payloads, format="json")
+
+        assert resp.status_code == 200
+        results = resp.json()
+        assert [r["status"] for r in results] == ["created"] * 5
+        assert [r["idempotency_key"] for r in results] == [
+            p["idempotency_key"] for p in payloads
+        ]
+        assert PendingMeasurement.objects.count() == 5
+        assert all(r["id"] is not None for r in results)
+
+    def test_batch_reports_existing_items(self):
+        first = _make_payload()
+        self.client.post("/api/persistence/capture/", first, format="json")
+
+        resp = self.client.post(self.url, [first, _make_payload()], format="json")
+        results = resp.json()
+
+        assert [r["status"] for r in results] == ["existing", "created"]
+        assert results[0]["id"] == PendingMeasurement.objects.get(
+            idempotency_key=first["idempotency_key"]
+        ).pk
+        assert PendingMeasurement.objects.count() == 2
+
+    def test_batch_duplicate_key_within_batch_created_once(self):
+        payload = _make_payload()
+        resp = self.client.post(self.url, [payload, payload], format="json")
+        results = resp.json()
+
+        assert [r["status"] for r in results] == ["created", "existing"]
+        assert results[0]["id"] == results[1]["id"]
+        assert PendingMeasurement.objects.count() == 1
+
+    def test_invalid_item_does_not_reject_batch(self):
+        bad = _make_payload(value="not-a-number")
+        resp = self.client.post(self.url, [bad, _make_payload()], format="json")
+        results = resp.json()
+
+        assert resp.status_code == 200
+        assert results[0]["status"] == "invalid"
+        assert "value" in results[0]["errors"]
+        assert results[1]["status"] == "created"
+        assert PendingMeasurement.objects.count() == 1
+
+    def test_non_array_body_rejected(self):
+        resp = self.client.post(self.url, _make_payload(), format="json")
+        assert resp.status_code == 400
+
+    def test_oversized_batch_rejected(self):
+        with self.settings(PERSISTENCE={"CAPTURE_BATCH_MAX": 2}):
+            resp = self.client.post(
+                self.url, [_make_payload() for _ in range(3)], format="json",
+            )
+        assert resp.status_code == 400
+        assert PendingMeasurement.objects.count() == 0
+
+    def test_gzip_encoded_body(self):
+        payloads = [_make_payload() for _ in range(3)]
+        body = gzip.compress(json.dumps(payloads).encode("utf-8"))
+        resp = self.client.generic(
+            "POST", self.url, body,
+            content_type="application/json",
+            HTTP_CONTENT_ENCODING="gzip",
+        )
+
+        assert resp.status_code == 200
+        assert [r["status"] for r in resp.json()] == ["created"] * 3
+
+    def test_corrupt_gzip_body_rejected(self):
+        resp = self.client.generic(
+            "POST", self.url, b"definitely not gzip",
+            content_type="application/json",
+            HTTP_CONTENT_ENCODING="gzip",
+        )
+        assert resp.status_code == 400
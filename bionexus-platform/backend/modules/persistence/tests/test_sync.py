@@ -7,18 +7,32 @@ Verifies:
 4. SyncEngine.run_once() syncs pending records
 5. Transport error → failed + retry_count++ + last_error
 6. Backoff: retry_count=0→~1s, 1→~2s, 5→~32s, cap at 300s
+7. Bulk ingest: constant query count per batch, intact audit chain,
+   duplicates within a batch and drift ACKs unchanged, post_save sent for
+   every created row, a key inserted concurrently ACKed as duplicate
+8. WAL transitions are set-based: one UPDATE per outcome class, with
+   per-record last_error and drift preserved
+9. Eligibility: failures store next_attempt_at from the backoff, and one
+   indexed query fills the batch even behind many backing-off records
 """
 
 import uuid
+from datetime import timedelta
 from decimal import Decimal
 from unittest.mock import patch
 
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
+from core.audit import AuditTrail
+from core.models import AuditLog
 from modules.instruments.models import Instrument
 from modules.measurements.models import Measurement
+from modules.persistence.ingest import ingest_batch
 from modules.persistence.models import PendingMeasurement
 from modules.persistence.sync_engine import BackoffCalculator, SyncEngine
 from modules.samples.models import Sample
@@ -111,6 +125,125 @@ class TestIngestEndpoint(TestCase):
         assert acks[0]["confirmation_hash"] == expected_hash
 
 
+class TestBulkIngest(TestCase):
+    """Test the set-based ingest path (IngestView and direct transport)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/api/persistence/ingest/"
+        self.instrument = _create_instrument()
+        self.sample = _create_sample(self.instrument)
+
+    def _payloads(self, count, **overrides):
+        return [
+            _make_ingest_payload(self.sample.pk, self.instrument.pk, **overrides)
+            for _ in range(count)
+        ]
+
+    def test_500_item_batch_costs_a_handful_of_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(self.url, self._payloads(500), format="json")
+
+        assert resp.status_code == 200
+        assert Measurement.objects.count() == 500
+        # 1 lookup + 1 re-select of the inserted keys + 1 chain head + the
+        # bulk INSERTs (split only by the backend's bound-parameter limit
+        # on SQLite) + savepoints.
+        selects = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        assert len(selects) == 3
+        assert len(ctx.captured_queries) <= 30
+
+    def test_audit_chain_intact_after_bulk_ingest(self):
+        AuditTrail.record(
+            entity_type="Measurement", entity_id=0, operation="CREATE",
+            changes={"source": "manual"}, snapshot_before={}, snapshot_after={},
+        )
+        self.client.post(self.url, self._payloads(3), format="json")
+        self.client.post(self.url, self._payloads(2), format="json")
+
+        # Per row: the automatic CREATE snapshot and the hub_sync entry.
+        assert AuditLog.objects.filter(entity_type="Measurement").count() == 11
+        valid, message = AuditTrail.verify_chain_integrity("Measurement")
+        assert valid, message
+
+    def test_hub_hash_written_at_insert(self):
+        payloads = self._payloads(3, data_hash="d" * 64)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, payloads, format="json")
+
+        assert not any(
+            q["sql"].startswith("UPDATE") and "measurements" in q["sql"]
+            for q in ctx.captured_queries
+        )
+        assert set(Measurement.objects.values_list("data_hash", flat=True)) == {"d" * 64}
+
+    def test_mixed_batch_acks(self):
+        stored = self._payloads(1)[0]
+        self.client.post(self.url, [stored], format="json")
+        fresh = self._payloads(1, hub_received_at="2020-01-01T00:00:00Z")[0]
+
+        acks = self.client.post(
+            self.url, [stored, fresh, fresh], format="json",
+        ).json()
+
+        assert [a["status"] for a in acks] == ["duplicate", "created", "duplicate"]
+        assert acks[0]["clock_drift_ms"] == 0 and acks[0]["drift_flagged"] is False
+        assert acks[1]["drift_flagged"] is True
+        assert acks[2]["measurement_id"] == acks[1]["measurement_id"]
+        assert acks[2]["confirmation_hash"] == fresh["data_hash"]
+        assert Measurement.objects.count() == 2
+
+    def test_post_save_sent_for_every_created_row(self):
+        stored = self._payloads(1)[0]
+        self.client.post(self.url, [stored], format="json")
+        seen = []
+
+        def receiver(sender, instance, created, **kwargs):
+            seen.append((instance.pk, str(instance.idempotency_key), created))
+
+        post_save.connect(receiver, sender=Measurement)
+        self.addCleanup(post_save.disconnect, receiver, sender=Measurement)
+        fresh = self._payloads(3)
+        acks = self.client.post(self.url, [stored, *fresh], format="json").json()
+
+        assert seen == [
+            (a["measurement_id"], a["idempotency_key"], True) for a in acks[1:]
+        ]
+        assert AuditLog.objects.filter(
+            entity_type="Measurement", operation="CREATE", changes__has_key="parameter",
+        ).count() == 4
+
+    def test_concurrent_insert_of_same_key_is_a_duplicate(self):
+        payloads = self._payloads(2)
+        real_bulk_create = Measurement.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # A concurrent ingest commits the first key between our
+            # duplicate lookup and our insert.
+            real_bulk_create([Measurement(
+                sample_id=self.sample.pk, instrument_id=self.instrument.pk,
+                parameter="pH", value=Decimal("7.0"), unit="pH",
+                measured_at=timezone.now(), data_hash="e" * 64,
+                idempotency_key=payloads[0]["idempotency_key"],
+            )])
+            return real_bulk_create(objs, **kwargs)
+
+        with patch.object(Measurement.objects, "bulk_create", side_effect=racing_bulk_create):
+            acks = ingest_batch(payloads)
+
+        assert [a["status"] for a in acks] == ["duplicate", "created"]
+        assert acks[0]["confirmation_hash"] == "e" * 64
+        assert Measurement.objects.count() == 2
+
+    def test_direct_transport_uses_bulk_path(self):
+        payloads = self._payloads(50)
+        with CaptureQueriesContext(connection) as ctx:
+            acks = SyncEngine._direct_transport(payloads)
+
+        assert [a["status"] for a in acks] == ["created"] * 50
+        assert len(ctx.captured_queries) <= 10
+
+
 class TestSyncEngine(TestCase):
     """Test SyncEngine logic."""
 
@@ -170,3 +303,132 @@ class TestSyncEngine(TestCase):
         assert calc.delay_for(1) == 2.0    # 1 * 2^1 = 2
         assert calc.delay_for(5) == 32.0   # 1 * 2^5 = 32
         assert calc.delay_for(10) == 300.0  # 1 * 2^10 = 1024 → capped at 300
+
+
+class TestBulkTransitions(TestCase):
+    """Test set-based WAL status transitions in SyncEngine."""
+
+    def _create_pending(self, count):
+        now = timezone.now()
+        return [
+            PendingMeasurement.objects.create(
+                sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+                unit="pH", data_hash=f"{i:064x}", source_timestamp=now,
+                hub_received_at=now,
+            )
+            for i in range(count)
+        ]
+
+    def _updates(self, ctx):
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+
+    def test_100_record_batch_one_update_per_outcome(self):
+        records = self._create_pending(100)
+
+        def transport(payloads):
+            return [
+                {
+                    "idempotency_key": p["idempotency_key"],
+                    "measurement_id": i + 1,
+                    "confirmation_hash": "0" * 64 if i == 7 else p["data_hash"],
+                    "server_received_at": timezone.now().isoformat(),
+                    "clock_drift_ms": i * 100,
+                    "drift_flagged": i * 100 > 5000,
+                    "status": "created",
+                }
+                for i, p in enumerate(payloads)
+                if i != 3  # no ACK for the 4th record
+            ]
+
+        engine = SyncEngine(transport=transport)
+        engine.congestion.current_batch_size = 100
+
+        with CaptureQueriesContext(connection) as ctx:
+            stats = engine.run_once()
+
+        assert (stats["synced"], stats["failed"]) == (98, 2)
+        # syncing mark + synced class + failed class
+        assert len(self._updates(ctx)) == 3
+
+        by_pk = PendingMeasurement.objects.in_bulk([r.pk for r in records])
+        missing, mismatched = by_pk[records[3].pk], by_pk[records[7].pk]
+        assert missing.last_error == "No ACK received for this record"
+        assert mismatched.last_error.startswith("Hash mismatch")
+        assert (missing.retry_count, mismatched.retry_count) == (1, 1)
+        late = by_pk[records[80].pk]
+        assert (late.sync_status, late.clock_drift_ms, late.drift_flagged) == (
+            "synced", 8000, True,
+        )
+        assert late.synced_measurement_id == 81
+        assert late.server_received_at is not None
+        assert by_pk[records[1].pk].drift_flagged is False
+
+    def test_transport_failure_is_one_update(self):
+        records = self._create_pending(50)
+        PendingMeasurement.objects.filter(pk=records[0].pk).update(retry_count=4)
+
+        def failing_transport(payloads):
+            raise ConnectionError("Network down")
+
+        with CaptureQueriesContext(connection) as ctx:
+            SyncEngine(transport=failing_transport).run_once()
+
+        # syncing mark + one failure UPDATE for the whole batch
+        assert len(self._updates(ctx)) == 2
+        retries = dict(PendingMeasurement.objects.values_list("pk", "retry_count"))
+        assert retries[records[0].pk] == 5
+        assert retries[records[1].pk] == 1
+        assert set(PendingMeasurement.objects.values_list("last_error", flat=True)) == {
+            "Network down",
+        }
+
+
+class TestEligibility(TestCase):
+    """Test next_attempt_at scheduling and batch selection."""
+
+    def _create(self, count, **kwargs):
+        now = timezone.now()
+        return [
+            PendingMeasurement.objects.create(
+                sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+                unit="pH", data_hash="e" * 64, source_timestamp=now,
+                hub_received_at=now, **kwargs,
+            )
+            for _ in range(count)
+        ]
+
+    def test_backing_off_records_do_not_starve_the_batch(self):
+        later = timezone.now() + timedelta(minutes=5)
+        self._create(200, sync_status="failed", retry_count=8, next_attempt_at=later)
+        fresh = self._create(30)
+        engine = SyncEngine()
+
+        with CaptureQueriesContext(connection) as ctx:
+            batch = engine._pick_batch(20)
+
+        assert len(ctx.captured_queries) == 1
+        assert [r.pk for r in batch] == [r.pk for r in fresh[:20]]
+
+    def test_due_failed_record_is_picked_in_order(self):
+        [failed] = self._create(
+            1, sync_status="failed", retry_count=1,
+            next_attempt_at=timezone.now() - timedelta(seconds=1),
+        )
+        pending = self._create(2)
+
+        batch = SyncEngine()._pick_batch(10)
+
+        assert [r.pk for r in batch] == [failed.pk] + [r.pk for r in pending]
+
+    def test_failure_schedules_next_attempt_from_backoff(self):
+        [record] = self._create(1)
+        engine = SyncEngine(transport=lambda payloads: [])
+        engine.backoff = BackoffCalculator(base_s=10.0, max_s=300.0, jitter_s=0.0)
+        before = timezone.now()
+
+        engine.run_once()
+
+        record.refresh_from_db()
+        assert record.sync_status == "failed"
+        assert record.next_attempt_at >= before + timedelta(seconds=20)
+        assert engine._pick_batch(10) == []
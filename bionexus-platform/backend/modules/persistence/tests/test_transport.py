@@ -0,0 +1,235 @@
+"""Tests for the SyncEngine HTTP transport and in-flight batches.
+
+Verifies:
+1. Bodies are gzip-compressed above the threshold, plain below
+2. Non-200 responses and ACK bodies that do not match the Merkle root
+   header raise TransportError (the batch is marked failed)
+3. Each sending thread reuses its own keep-alive session
+4. SyncEngine keeps up to max_in_flight batches in flight, matches ACKs
+   per batch and feeds each round-trip time to the congestion controller
+5. End to end through the gzip middleware and IngestView
+"""
+
+import gzip
+import json
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from modules.measurements.models import Measurement
+from modules.persistence.merkle import MERKLE_ROOT_HEADER, batch_root
+from modules.persistence.models import PendingMeasurement
+from modules.persistence.sync_engine import SyncEngine
+from modules.persistence.transport import HttpTransport, TransportError
+
+from .test_sync import _create_instrument, _create_sample
+
+
+def _acks(payloads):
+    return [
+        {
+            "idempotency_key": p["idempotency_key"],
+            "measurement_id": i + 1,
+            "confirmation_hash": p["data_hash"],
+            "server_received_at": timezone.now().isoformat(),
+            "clock_drift_ms": 0,
+            "drift_flagged": False,
+            "status": "created",
+        }
+        for i, p in enumerate(payloads)
+    ]
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, respond):
+        self.respond = respond
+        self.posts = []
+
+    def post(self, url, data, headers, timeout):
+        self.posts.append({"url": url, "data": data, "headers": headers})
+        return self.respond(data, headers)
+
+
+def _echo(data, headers):
+    if headers.get("Content-Encoding") == "gzip":
+        data = gzip.decompress(data)
+    acks = _acks(json.loads(data))
+    return FakeResponse(body=acks, headers={
+        MERKLE_ROOT_HEADER: batch_root(acks, "confirmation_hash"),
+    })
+
+
+def _payloads(count):
+    return [
+        {"idempotency_key": str(uuid.uuid4()), "data_hash": f"{i:064x}", "value": "7.0"}
+        for i in range(count)
+    ]
+
+
+class TestHttpTransport(SimpleTestCase):
+    """Test request encoding and response checks."""
+
+    def _transport(self, respond=_echo, **kwargs):
+        transport = HttpTransport("http://server.test/", **kwargs)
+        session = FakeSession(respond)
+        transport._local.session = session
+        return transport, session
+
+    def test_posts_to_ingest_and_returns_acks(self):
+        transport, session = self._transport()
+        payloads = _payloads(2)
+
+        acks = transport(payloads)
+
+        assert [a["idempotency_key"] for a in acks] == [p["idempotency_key"] for p in payloads]
+        assert session.posts[0]["url"] == "http://server.test/api/persistence/ingest/"
+
+    def test_large_bodies_are_gzipped(self):
+        transport, session = self._transport(gzip_min_bytes=1024)
+
+        transport(_payloads(1))
+        transport(_payloads(50))
+
+        small, large = session.posts
+        assert "Content-Encoding" not in small["headers"]
+        assert large["headers"]["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(large["data"]))) == 50
+
+    def test_error_status_raises(self):
+        transport, _ = self._transport(lambda data, headers: FakeResponse(503, {"detail": "down"}))
+
+        with self.assertRaisesMessage(TransportError, "Ingest HTTP 503"):
+            transport(_payloads(1))
+
+    def test_ack_root_mismatch_raises(self):
+        def truncated(data, headers):
+            response = _echo(data, headers)
+            response._body = response._body[:-1]
+            return response
+
+        transport, _ = self._transport(truncated)
+
+        with self.assertRaises(TransportError):
+            transport(_payloads(3))
+
+    def test_one_session_per_thread(self):
+        transport = HttpTransport("http://server.test")
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(transport.session()))
+        thread.start()
+        thread.join()
+
+        assert transport.session() is transport.session()
+        assert seen[0] is not transport.session()
+        transport.close()
+        assert transport._sessions == []
+
+
+class TestInFlight(TestCase):
+    """Test pipelined batches in SyncEngine."""
+
+    def setUp(self):
+        now = timezone.now()
+        PendingMeasurement.objects.bulk_create([
+            PendingMeasurement(
+                sample_id=1, instrument_id=1, parameter="pH", value=Decimal("7.0"),
+                unit="pH", data_hash=f"{i:064x}", source_timestamp=now,
+                hub_received_at=now,
+            )
+            for i in range(30)
+        ])
+
+    def test_batches_overlap_and_rtts_are_fed(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def transport(payloads):
+            barrier.wait()  # only passes if all three batches are in flight
+            time.sleep(0.05)
+            return list(reversed(_acks(payloads)))  # ACK order is irrelevant
+
+        engine = SyncEngine(transport=transport, max_in_flight=3)
+        engine.congestion.current_batch_size = 10
+        rtts = []
+        engine.congestion.adjust = rtts.append
+
+        stats = engine.run_once()
+
+        assert (stats["synced"], stats["failed"]) == (30, 0)
+        assert len(rtts) == 3 and all(rtt >= 50 for rtt in rtts)
+        assert not PendingMeasurement.objects.exclude(sync_status="synced").exists()
+
+    def test_one_failed_batch_does_not_fail_the_others(self):
+        calls = []
+
+        def transport(payloads):
+            calls.append(len(payloads))
+            if len(calls) == 2:
+                raise ConnectionError("reset by peer")
+            return _acks(payloads)
+
+        engine = SyncEngine(transport=transport, max_in_flight=3)
+        engine.congestion.current_batch_size = 10
+
+        stats = engine.run_once()
+
+        assert (stats["synced"], stats["failed"]) == (20, 10)
+        assert PendingMeasurement.objects.filter(
+            sync_status="failed", last_error="reset by peer",
+        ).count() == 10
+
+
+class ClientSession:
+    """Routes HttpTransport through the Django test client (middleware + view)."""
+
+    def __init__(self):
+        self.client = Client()
+
+    def post(self, url, data, headers, timeout):
+        extra = {"HTTP_CONTENT_ENCODING": headers["Content-Encoding"]} if headers else {}
+        return self.client.post(
+            url.replace("http://server.test", ""), data,
+            content_type="application/json", **extra,
+        )
+
+
+class TestHttpEndToEnd(TestCase):
+    """SyncEngine -> HttpTransport -> GzipRequestMiddleware -> IngestView."""
+
+    def test_drains_wal_through_ingest(self):
+        instrument = _create_instrument()
+        sample = _create_sample(instrument)
+        now = timezone.now()
+        for i in range(40):
+            PendingMeasurement.objects.create(
+                sample_id=sample.pk, instrument_id=instrument.pk, parameter="pH",
+                value=Decimal("7.0"), unit="pH", data_hash=f"{i:064x}",
+                source_timestamp=now, hub_received_at=now,
+            )
+
+        with override_settings(PERSISTENCE={"INGEST_URL": "http://server.test"}):
+            engine = SyncEngine()
+        assert isinstance(engine.transport, HttpTransport)
+        engine.transport._local.session = ClientSession()
+        engine.congestion.current_batch_size = 20
+
+        assert engine.run_once()["synced"] == 20
+        assert engine.run_once()["synced"] == 20
+        assert Measurement.objects.count() == 40
+        assert set(Measurement.objects.values_list("data_hash", flat=True)) == {
+            f"{i:064x}" for i in range(40)
+        }
@@ -0,0 +1,150 @@
+"""HTTP transport for SyncEngine (hub and server on different machines).
+
+HttpTransport is a drop-in replacement for SyncEngine._direct_transport:
+it POSTs one batch of WAL payloads to ``/api/persistence/ingest/`` and
+returns the server's per-item ACKs.
+
+- Each sending thread keeps its own keep-alive ``requests.Session``, so
+  a SyncEngine with K batches in flight reuses K pooled connections
+  instead of paying a TCP/TLS handshake per batch.
+- Bodies above ``gzip_min_bytes`` are gzip-compressed (inflated on the
+  server by core.middleware.GzipRequestMiddleware).
+- The ``X-BioNexus-Merkle-Root`` response header is checked against the
+  ACK body, so a truncated or altered response fails the batch instead
+  of half-confirming it.
+- A ``429`` (server admission control) raises Backpressure with the
+  server's ``Retry-After`` and ``X-BioNexus-Rate`` hint, which
+  SyncEngine honours instead of counting the batch as failed.
+"""
+
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from .merkle import MERKLE_ROOT_HEADER, batch_root
+
+INGEST_PATH = "/api/persistence/ingest/"
+# Fair-share send rate (records/s) suggested by the server with a 429.
+RATE_HEADER = "X-BioNexus-Rate"
+GZIP_MIN_BYTES = 1024
+
+
+class TransportError(Exception):
+    """The server did not return a usable ACK list for a batch."""
+
+
+class Backpressure(TransportError):
+    """429 from the server: wait ``retry_after_s``, send at most ``rate`` records/s."""
+
+    def __init__(self, retry_after_s: float, rate: float | None = None):
+        super().__init__(f"Server busy, retry after {retry_after_s:.0f}s")
+        self.retry_after_s = retry_after_s
+        self.rate = rate
+
+
+def parse_retry_after(value: str | None, default: float = 5.0) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_rate(value: str | None) -> float | None:
+    """Records/s from an X-BioNexus-Rate header, None if absent or invalid."""
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return rate if rate > 0 else None
+
+
+class HttpTransport:
+    """POST WAL batches to a remote IngestView; callable like a transport."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_s: float = 30.0,
+        headers: dict | None = None,
+        gzip_min_bytes: int = GZIP_MIN_BYTES,
+    ):
+        """Initialize the transport.
+
+        Args:
+            base_url: Server root, e.g. ``https://lab.example.com``.
+            timeout_s: Per-request connect/read timeout.
+            headers: Extra headers sent with every batch (e.g. auth).
+            gzip_min_bytes: Bodies at least this large are gzip-compressed.
+        """
+        self.url = f"{base_url.rstrip('/')}{INGEST_PATH}"
+        self.timeout_s = timeout_s
+        self.headers = dict(headers or {})
+        self.gzip_min_bytes = gzip_min_bytes
+        self._local = threading.local()
+        self._sessions: list[requests.Session] = []
+        self._lock = threading.Lock()
+
+    def session(self) -> requests.Session:
+        """Keep-alive session of the calling thread (created on first use)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Content-Type": "application/json", **self.headers})
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def encode(self, payloads: list[dict]) -> tuple[bytes, dict]:
+        """Serialize a batch, gzip-compressed when it is worth it."""
+        body = json.dumps(payloads, default=str, separators=(",", ":")).encode("utf-8")
+        if len(body) < self.gzip_min_bytes:
+            return body, {}
+        return gzip.compress(body, compresslevel=6), {"Content-Encoding": "gzip"}
+
+    def __call__(self, payloads: list[dict]) -> list[dict]:
+        body, headers = self.encode(payloads)
+        resp = self.session().post(
+            self.url, data=body, headers=headers, timeout=self.timeout_s,
+        )
+        if resp.status_code == 429:
+            raise Backpressure(
+                parse_retry_after(resp.headers.get("Retry-After")),
+                parse_rate(resp.headers.get(RATE_HEADER)),
+            )
+        if resp.status_code != 200:
+            raise TransportError(f"Ingest HTTP {resp.status_code}: {resp.text[:200]}")
+
+        try:
+            acks = resp.json()
+        except ValueError as exc:
+            raise TransportError(f"Ingest returned invalid JSON: {exc}") from exc
+        if not isinstance(acks, list):
+            raise TransportError("Ingest returned no ACK list")
+
+        root = resp.headers.get(MERKLE_ROOT_HEADER)
+        if root is not None and root != batch_root(acks, "confirmation_hash"):
+            raise TransportError("ACK Merkle root does not match the ACK body")
+        return acks
+
+    def close(self) -> None:
+        """Close every thread's session and its pooled connections."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
@@ -6,6 +6,16 @@ from . import views
 
 urlpatterns = [
     path("capture/", views.CaptureView.as_view(), name="persistence-capture"),
+    path(
+        "capture/batch/",
+        views.CaptureBatchView.as_view(),
+        name="persistence-capture-batch",
+    ),
     path("ingest/", views.IngestView.as_view(), name="persistence-ingest"),
     path("pending/", views.PendingListView.as_view(), name="persistence-pending"),
+    path(
+        "proofs/<uuid:idempotency_key>/",
+        views.MerkleProofView.as_view(),
+        name="persistence-merkle-proof",
+    ),
 ]
@@ -1,22 +1,31 @@
 """Views for the persistence (WAL) module.
 
 CaptureView  — Hub writes measurement to local WAL (always available, even offline)
+CaptureBatchView — Same, for an array of measurements with per-item results
 IngestView   — SyncEngine posts batch to server, receives per-item ACKs
 PendingListView — Debug/admin listing of pending WAL records
+MerkleProofView — Inclusion proof of one record in its batch's Merkle root
+                  (WAL or archive)
+
+The three POST endpoints go through admission control (admission.py):
+when the server is saturated they answer 429 with Retry-After and an
+X-BioNexus-Rate hint instead of slowing down for everyone.
 """
 
-from decimal import Decimal
+import uuid
 
-from django.db import transaction
-from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from core.audit import AuditTrail
-
-from .models import PendingMeasurement
+from .admission import AdmissionControlled
+from .ingest import ingest_batch
+from .merkle import MERKLE_ROOT_HEADER, batch_root, inclusion_proof, leaf_hash, merkle_root
+from .models import ArchivedMeasurement, MerkleBatch, PendingMeasurement
 from .serializers import (
+    ArchivedMeasurementSerializer,
     CaptureSerializer,
     IngestItemSerializer,
     IngestResponseItemSerializer,
@@ -25,52 +34,236 @@ from .serializers import (
 from .sync_engine import _get_config
 
 
-class CaptureView(APIView):
+def _pending_record(data: dict, **fields) -> PendingMeasurement:
+    """Unsaved WAL record for one validated capture item."""
+    return PendingMeasurement(
+        idempotency_key=data["idempotency_key"],
+        sample_id=data["sample_id"],
+        instrument_id=data["instrument_id"],
+        parameter=data["parameter"],
+        value=data["value"],
+        unit=data["unit"],
+        data_hash=data["data_hash"],
+        source_timestamp=data["source_timestamp"],
+        hub_received_at=data["hub_received_at"],
+        sync_status="pending",
+        **fields,
+    )
+
+
+def _store_capture(data: dict) -> tuple[PendingMeasurement | ArchivedMeasurement, str]:
+    """Write one validated capture; returns ``(record, created|existing)``.
+
+    Single-object path of CaptureView. No MerkleBatch is stored (a 1-leaf
+    batch proves nothing the data_hash does not), and the insert itself
+    tells created from existing: a concurrent retry that won the race
+    makes it fail on the unique idempotency_key, inside a savepoint.
+    Readings already archived are returned from the archive.
+    """
+    key = data["idempotency_key"]
+    record = (
+        PendingMeasurement.objects.filter(idempotency_key=key).first()
+        or ArchivedMeasurement.objects.filter(idempotency_key=key).first()
+    )
+    if record is not None:
+        return record, "existing"
+    try:
+        with transaction.atomic():
+            record = _pending_record(data)
+            record.save(force_insert=True)
+            return record, "created"
+    except IntegrityError:
+        return PendingMeasurement.objects.get(idempotency_key=key), "existing"
+
+
+def _store_captures(
+    valid: list[tuple[int, dict]],
+    leaves: list[bytes],
+    device_id: str = "",
+) -> dict[uuid.UUID, tuple[int, str]]:
+    """Write validated capture items; returns ``{key: (pk, created|existing)}``.
+
+    ``valid`` holds ``(position in request, validated data)``. Existing
+    keys are resolved with ONE lookup (plus one in the archive for the
+    keys not in the WAL) and the new records are written
+    with ONE conflict-ignoring bulk insert on idempotency_key, so
+    concurrent retries of the same readings can neither duplicate them
+    nor fail with an IntegrityError. The MerkleBatch created for the
+    request doubles as an insertion token: a row is "created" only if it
+    carries this request's batch, otherwise a concurrent request won the
+    race and the row is reported as "existing".
+    """
+    keys = [data["idempotency_key"] for _, data in valid]
+    stored = {
+        key: (pk, "existing")
+        for key, pk in PendingMeasurement.objects.filter(
+            idempotency_key__in=keys
+        ).values_list("idempotency_key", "pk")
+    }
+    # Readings synced and archived long ago are still duplicates.
+    unseen = [key for key in keys if key not in stored]
+    if unseen:
+        stored.update(
+            (key, (pk, "existing"))
+            for key, pk in ArchivedMeasurement.objects.filter(
+                idempotency_key__in=unseen
+            ).values_list("idempotency_key", "pk")
+        )
+
+    new: dict[uuid.UUID, PendingMeasurement] = {}
+    for index, data in valid:
+        key = data["idempotency_key"]
+        if key in stored or key in new:
+            continue
+        new[key] = _pending_record(data, merkle_index=index)
+    if not new:
+        return stored
+
+    with transaction.atomic():
+        batch = MerkleBatch.objects.create(
+            root=merkle_root(leaves).hex(),
+            size=len(leaves),
+            leaves=[leaf.hex() for leaf in leaves],
+            device_id=device_id[:255],
+        )
+        for record in new.values():
+            record.merkle_batch = batch
+        PendingMeasurement.objects.bulk_create(list(new.values()), ignore_conflicts=True)
+
+    for key, pk, batch_id in PendingMeasurement.objects.filter(
+        idempotency_key__in=list(new)
+    ).values_list("idempotency_key", "pk", "merkle_batch_id"):
+        stored[key] = (pk, "created" if batch_id == batch.pk else "existing")
+    return stored
+
+
+def _capture_many(request, items) -> Response:
+    """Shared array path of CaptureView and CaptureBatchView."""
+    max_items = _get_config("CAPTURE_BATCH_MAX", 500)
+    if len(items) > max_items:
+        return Response(
+            {"detail": f"Batch too large: {len(items)} items (max {max_items})."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    leaves = [
+        leaf_hash(item.get("idempotency_key"), item.get("data_hash"))
+        if isinstance(item, dict) else leaf_hash(None, None)
+        for item in items
+    ]
+    root = merkle_root(leaves).hex()
+    claimed = request.headers.get(MERKLE_ROOT_HEADER)
+    if claimed is not None and claimed.strip().lower() != root:
+        return Response(
+            {"detail": "Merkle root mismatch.", "expected_root": root},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results: list[dict] = []
+    valid: list[tuple[int, dict]] = []
+    for item in items:
+        serializer = CaptureSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((len(results), serializer.validated_data))
+            results.append({})
+        else:
+            key = item.get("idempotency_key") if isinstance(item, dict) else None
+            results.append({
+                "idempotency_key": key,
+                "status": "invalid",
+                "errors": serializer.errors,
+            })
+
+    stored = _store_captures(valid, leaves, request.headers.get("X-Device-ID", ""))
+
+    seen: set[uuid.UUID] = set()
+    for index, data in valid:
+        key = data["idempotency_key"]
+        pk, item_status = stored[key]
+        if key in seen:
+            # Same key twice in one request: created once, then "existing".
+            item_status = "existing"
+        seen.add(key)
+        results[index] = {"idempotency_key": str(key), "status": item_status, "id": pk}
+
+    return Response(
+        results, status=status.HTTP_200_OK, headers={MERKLE_ROOT_HEADER: root},
+    )
+
+
+class CaptureView(AdmissionControlled, APIView):
     """POST /api/persistence/capture/
 
     Hub sends a measurement here FIRST (before any network attempt to the
     server). This writes to the local WAL (SQLite) and is always available.
 
     Idempotent: if the idempotency_key already exists, returns the existing
-    record with HTTP 200 instead of 201.
+    record (from the archive once it has been archived) with HTTP 200
+    instead of 201.
+
+    A JSON array is also accepted and handled exactly like
+    CaptureBatchView (per-item created / existing / invalid results), so
+    hubs can hand over hundreds of readings per request; only arrays are
+    stored as a MerkleBatch. A single object is inserted in a savepoint,
+    an array through a conflict-ignoring bulk insert, so concurrent
+    retries never duplicate a reading nor surface an IntegrityError.
     """
 
     def post(self, request):
+        if isinstance(request.data, list):
+            return _capture_many(request, request.data)
+
         serializer = CaptureSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
-
-        # Idempotent check
-        existing = PendingMeasurement.objects.filter(
-            idempotency_key=data["idempotency_key"]
-        ).first()
-
-        if existing:
-            return Response(
-                PendingMeasurementSerializer(existing).data,
-                status=status.HTTP_200_OK,
-            )
 
-        record = PendingMeasurement.objects.create(
-            idempotency_key=data["idempotency_key"],
-            sample_id=data["sample_id"],
-            instrument_id=data["instrument_id"],
-            parameter=data["parameter"],
-            value=data["value"],
-            unit=data["unit"],
-            data_hash=data["data_hash"],
-            source_timestamp=data["source_timestamp"],
-            hub_received_at=data["hub_received_at"],
-            sync_status="pending",
+        record, item_status = _store_capture(serializer.validated_data)
+        serializer_class = (
+            ArchivedMeasurementSerializer if isinstance(record, ArchivedMeasurement)
+            else PendingMeasurementSerializer
         )
 
         return Response(
-            PendingMeasurementSerializer(record).data,
-            status=status.HTTP_201_CREATED,
+            serializer_class(record).data,
+            status=(
+                status.HTTP_201_CREATED if item_status == "created"
+                else status.HTTP_200_OK
+            ),
         )
 
 
-class IngestView(APIView):
+class CaptureBatchView(AdmissionControlled, APIView):
+    """POST /api/persistence/capture/batch/
+
+    Batch variant of CaptureView for hubs draining a backlog: accepts a
+    JSON array (optionally ``Content-Encoding: gzip``) and returns one
+    result per item, in request order::
+
+        {"idempotency_key": ..., "status": "created" | "existing", "id": ...}
+        {"idempotency_key": ..., "status": "invalid", "errors": {...}}
+
+    Invalid items do not reject the batch. Existing keys are resolved
+    with ONE lookup and new records are written with ONE bulk insert,
+    instead of one round-trip per reading.
+
+    Batch integrity: the hub may send ``X-BioNexus-Merkle-Root``, the
+    Merkle root over the items' (idempotency_key, data_hash) in request
+    order. The whole batch is checked with one root comparison (400 on
+    mismatch); the accepted root is echoed in the same response header
+    and stored as a MerkleBatch so per-record inclusion proofs can be
+    served later (MerkleProofView).
+    """
+
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"detail": "Expected a JSON array of measurements."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return _capture_many(request, items)
+
+
+class IngestView(AdmissionControlled, APIView):
     """POST /api/persistence/ingest/
 
     SyncEngine sends a batch of measurements. For each item:
@@ -79,101 +272,33 @@ class IngestView(APIView):
     3. Preserve original data_hash (bypass auto-compute)
     4. Calculate clock_drift_ms = (server_now - hub_received_at)
     5. Return per-item ACK with confirmation_hash
+
+    The work is set-based (see ingest.ingest_batch): one duplicate lookup,
+    one bulk insert and one audit append per batch, not per item.
+
+    The response also carries ``X-BioNexus-Merkle-Root``, the root over
+    the ACKs' (idempotency_key, confirmation_hash), so the caller can
+    confirm the whole batch with one comparison.
     """
 
     def post(self, request):
         # Accept list of items
         serializer = IngestItemSerializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
-        items = serializer.validated_data
-
-        from modules.measurements.models import Measurement
-
-        drift_threshold = _get_config("CLOCK_DRIFT_THRESHOLD_MS", 5000)
-        server_now = timezone.now()
-        acks = []
-
-        for item in items:
-            idem_key = str(item["idempotency_key"])
-
-            # Idempotent: check existing Measurement
-            existing = Measurement.objects.filter(
-                idempotency_key=idem_key
-            ).first()
-
-            if existing:
-                acks.append({
-                    "idempotency_key": idem_key,
-                    "measurement_id": existing.pk,
-                    "confirmation_hash": existing.data_hash,
-                    "server_received_at": server_now.isoformat(),
-                    "clock_drift_ms": 0,
-                    "drift_flagged": False,
-                    "status": "duplicate",
-                })
-                continue
-
-            # Parse timestamps
-            source_ts = item["source_timestamp"]
-            hub_ts = item["hub_received_at"]
-
-            with transaction.atomic():
-                measurement = Measurement(
-                    sample_id=item["sample_id"],
-                    instrument_id=item["instrument_id"],
-                    parameter=item["parameter"],
-                    value=Decimal(str(item["value"])),
-                    unit=item["unit"],
-                    measured_at=source_ts,
-                    idempotency_key=idem_key,
-                )
-                measurement.save()
-
-                # Preserve original data_hash (bypass auto-compute)
-                Measurement.objects.filter(pk=measurement.pk).update(
-                    data_hash=item["data_hash"]
-                )
-
-                # Audit trail
-                AuditTrail.record(
-                    entity_type="Measurement",
-                    entity_id=measurement.pk,
-                    operation="CREATE",
-                    changes={
-                        "source": "hub_sync",
-                        "idempotency_key": idem_key,
-                    },
-                    snapshot_before={},
-                    snapshot_after={
-                        "parameter": item["parameter"],
-                        "value": str(item["value"]),
-                        "unit": item["unit"],
-                        "source_timestamp": str(source_ts),
-                        "data_hash": item["data_hash"],
-                    },
-                )
-
-            # Clock drift
-            drift_ms = int((server_now - hub_ts).total_seconds() * 1000)
-            flagged = abs(drift_ms) > drift_threshold
-
-            acks.append({
-                "idempotency_key": idem_key,
-                "measurement_id": measurement.pk,
-                "confirmation_hash": item["data_hash"],
-                "server_received_at": server_now.isoformat(),
-                "clock_drift_ms": drift_ms,
-                "drift_flagged": flagged,
-                "status": "created",
-            })
+        acks = ingest_batch(serializer.validated_data)
 
-        return Response(acks, status=status.HTTP_200_OK)
+        return Response(
+            acks,
+            status=status.HTTP_200_OK,
+            headers={MERKLE_ROOT_HEADER: batch_root(acks, "confirmation_hash")},
+        )
 
 
 class PendingListView(generics.ListAPIView):
     """GET /api/persistence/pending/
 
-    Debug/admin endpoint listing WAL records. Supports filtering:
+    Debug/admin endpoint listing WAL records (archived records are not
+    listed, see archive.py). Supports filtering:
       ?sync_status=pending
       ?drift_flagged=true
     """
@@ -192,3 +317,41 @@ class PendingListView(generics.ListAPIView):
             qs = qs.filter(drift_flagged=drift_flagged.lower() == "true")
 
         return qs
+
+
+class MerkleProofView(APIView):
+    """GET /api/persistence/proofs/<idempotency_key>/
+
+    Inclusion proof of one WAL record in the Merkle root of the batch it
+    arrived in. Built on demand from the batch's stored leaves; anyone
+    holding the root can check it with merkle.verify_inclusion and
+    ~log2(size) hashes. Archived records are looked up in the archive.
+    404 when the record is unknown or did not arrive through a
+    Merkle-rooted batch.
+    """
+
+    def get(self, request, idempotency_key):
+        record = PendingMeasurement.objects.select_related("merkle_batch").filter(
+            idempotency_key=idempotency_key,
+        ).first() or get_object_or_404(
+            ArchivedMeasurement.objects.select_related("merkle_batch"),
+            idempotency_key=idempotency_key,
+        )
+        batch = record.merkle_batch
+        if batch is None or record.merkle_index is None:
+            return Response(
+                {"detail": "Record is not part of a Merkle batch."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        leaves = [bytes.fromhex(leaf) for leaf in batch.leaves]
+        return Response({
+            "idempotency_key": str(record.idempotency_key),
+            "data_hash": record.data_hash,
+            "batch_id": batch.pk,
+            "root": batch.root,
+            "size": batch.size,
+            "index": record.merkle_index,
+            "leaf": leaves[record.merkle_index].hex(),
+            "proof": [node.hex() for node in inclusion_proof(leaves, record.merkle_index)],
+        })
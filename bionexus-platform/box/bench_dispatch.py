@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: parser dispatch throughput on the BioNexus Box.
+
+Compares the legacy ordered walk over PARSERS (``can_parse`` then
+``extract`` on every parser) against :class:`ParserDispatcher` (shape
+index + single strict ``extract`` + parser affinity), using the frame
+generators of ``simulate_instrument.py`` as the workload.
+
+Two stages are measured per protocol:
+  - match : line → (parser, ParsedReading), the part the dispatcher changes
+  - full  : parse_line end to end (payload, UUID, SHA-256 included)
+
+Run it on the target hardware (Raspberry-class boxes) to see the gain
+where it matters:
+
+    python bench_dispatch.py
+    python bench_dispatch.py --lines 50000 --repeat 7 --protocol sics
+"""
+
+import argparse
+import logging
+import random
+import time
+
+import box_collector
+from box_collector import PARSERS, CaptureContext, ParserDispatcher, parse_line
+from simulate_instrument import PROTOCOLS
+
+# Lines no parser claims: operator chatter, banners, half-written frames.
+UNMATCHED_LINES = [
+    "!!! garbage !!!",
+    "# Agilent ChemStation Peak Report",
+    "Peak,RetTime,Area,Height,Name,Unit",
+    "Balance ready",
+    "S S",
+    "KF,water_content",
+]
+
+
+def legacy_match(line: str):
+    """The pre-dispatcher parse_line loop, without payload building."""
+    for parser in PARSERS:
+        if parser.can_parse(line):
+            reading = parser.extract(line)
+            if reading is not None:
+                return parser, reading
+    return None, None
+
+
+def legacy_parse_line(line: str, context: CaptureContext):
+    for parser in PARSERS:
+        if parser.can_parse(line):
+            result = parser.parse(line, context)
+            if result:
+                return result
+    return None
+
+
+def build_workloads(lines: int) -> dict[str, list[str]]:
+    workloads = {}
+    for key, (_, frame_gen) in PROTOCOLS.items():
+        workloads[key] = frame_gen(lines)
+    mixed = [line for frames in workloads.values() for line in frames]
+    random.shuffle(mixed)
+    workloads["mixed"] = mixed[:lines]
+    workloads["unmatched"] = (UNMATCHED_LINES * (lines // len(UNMATCHED_LINES) + 1))[:lines]
+    return workloads
+
+
+def best_rate(fn, frames: list[str], repeat: int) -> float:
+    """Best-of-N lines/sec for ``fn`` applied to every frame."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in frames:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best if best > 0 else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark Box parser dispatch (lines/sec)",
+    )
+    parser.add_argument(
+        "--lines", type=int, default=20000,
+        help="Lines per protocol workload. Default: 20000",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5,
+        help="Repetitions per measurement, best run kept. Default: 5",
+    )
+    parser.add_argument(
+        "--protocol", choices=[*PROTOCOLS.keys(), "mixed", "unmatched"],
+        help="Only benchmark this workload. Default: all",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1234,
+        help="Random seed for the frame generators. Default: 1234",
+    )
+    args = parser.parse_args()
+
+    # Per-line INFO/WARNING logging would dominate the measurement.
+    box_collector.log.setLevel(logging.ERROR)
+    random.seed(args.seed)
+    context = CaptureContext(instrument_id=1, sample_id=1, operator="OP-BENCH")
+
+    workloads = build_workloads(args.lines)
+    if args.protocol:
+        workloads = {args.protocol: workloads[args.protocol]}
+
+    print("=" * 78)
+    print("BioNexus Box — parser dispatch benchmark")
+    print(f"Lines/workload: {args.lines}   repeat: {args.repeat} (best kept)")
+    print("=" * 78)
+    print(
+        f"{'workload':<12} {'stage':<6} {'legacy l/s':>14} "
+        f"{'dispatch l/s':>14} {'speedup':>9}"
+    )
+
+    for name, frames in workloads.items():
+        # A fresh dispatcher per workload == one instrument connection.
+        dispatcher = ParserDispatcher()
+        legacy = best_rate(legacy_match, frames, args.repeat)
+        indexed = best_rate(dispatcher.match, frames, args.repeat)
+        print(
+            f"{name:<12} {'match':<6} {legacy:>14,.0f} "
+            f"{indexed:>14,.0f} {indexed / legacy:>8.2f}x"
+        )
+
+        dispatcher = ParserDispatcher()
+        legacy = best_rate(
+            lambda line: legacy_parse_line(line, context), frames, args.repeat,
+        )
+        indexed = best_rate(
+            lambda line: parse_line(line, context, dispatcher), frames, args.repeat,
+        )
+        print(
+            f"{'':<12} {'full':<6} {legacy:>14,.0f} "
+            f"{indexed:>14,.0f} {indexed / legacy:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-line cost of every parser and of the capture hash.
+
+Measures ns/line on the per-line hot path of the BioNexus Box:
+  - <parser>/match       : can_parse + extract on lines the parser claims
+  - <parser>/miss        : can_parse + extract on other instruments' lines
+  - <parser>/adversarial : the same on pathological lines (very long
+                           fields, separator floods, binary noise) —
+                           catches regex backtracking regressions
+  - parse/<parser>       : BaseParser.parse (extract + payload + hash)
+  - compute_capture_hash : SHA-256 over the canonical reading + context
+  - parse_line/<load>    : full dispatch (ParserDispatcher) on a mixed
+                           and on an unmatched workload
+
+Results are compared with a stored baseline (bench_parsers_baseline.json).
+Timings are normalized by a fixed pure-Python calibration loop measured
+in the same run, so a baseline recorded on a laptop still flags a real
+regression on a Raspberry-class box instead of the hardware difference.
+With BIONEXUS_BENCH=1 the pytest suite (tests/test_bench_parsers.py)
+runs a short version and fails on any regression; it is opt-in because
+wall-clock timings are unreliable on shared CI runners. Refresh the
+baseline after an intended change:
+
+    BIONEXUS_BENCH=1 python -m pytest tests/test_bench_parsers.py
+    python bench_parsers.py
+    python bench_parsers.py --update-baseline
+    python bench_parsers.py --lines 5000 --repeat 7 --tolerance 1.5
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Optional
+
+import box_collector
+from box_collector import (
+    PARSERS,
+    CaptureContext,
+    ParsedReading,
+    ParserDispatcher,
+    compute_capture_hash,
+    parse_line,
+)
+from simulate_instrument import PROTOCOLS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "bench_parsers_baseline.json")
+DEFAULT_TOLERANCE = 2.0
+
+# Workload (simulate_instrument protocol) whose lines each parser claims.
+PARSER_PROTOCOLS = {
+    "mettler_sics_v1": "sics",
+    "sartorius_sbi_v1": "sbi",
+    "generic_csv_v1": "csv",
+    "karl_fischer_v1": "kf",
+    "agilent_chemstation_v1": "agilent",
+    "waters_empower_v1": "empower",
+    "dissolution_ascii_v1": "dissolution",
+}
+
+UNMATCHED_LINES = [
+    "!!! garbage !!!",
+    "# Agilent ChemStation Peak Report",
+    "Peak,RetTime,Area,Height,Name,Unit",
+    "Balance ready",
+    "S S",
+    "KF,water_content",
+]
+
+ADVERSARIAL_LINES = [
+    "S S " + " " * 4000 + "1.0 g",
+    "S S " + "9" * 4000 + " g",
+    "+" + " " * 4000 + "1 g",
+    "," * 4000,
+    "1," * 2000,
+    "KF," + "1," * 2000 + "%",
+    "DISS," + "1," * 2000 + "%",
+    "|" * 4000,
+    "a|" * 2000 + "%",
+    "1" * 4000,
+    "1." * 2000 + " g",
+    "Sample: " + "x" * 4000 + "\nWater content: 1 %",
+    "Sample: S-1\n" + "Label: value\n" * 30 + "Water content: 1 %",
+    "\x00" * 4000,
+    "é" * 2000,
+]
+
+CONTEXT = CaptureContext(
+    instrument_id=1, sample_id=1, operator="OP-BENCH", lot_number="LOT-1", method="USP <621>",
+)
+
+
+def ns_per_call(fn: Callable, items: list, repeat: int) -> float:
+    """Best-of-N nanoseconds per ``fn(item)`` over ``items``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(items)
+
+
+def calibration_ns(repeat: int = 5) -> float:
+    """ns per iteration of a fixed string / dict workload (the unit of 'rel')."""
+    items = [f"S S {i:10.4f} g" for i in range(2000)]
+
+    def work(line: str) -> dict:
+        parts = line.split()
+        return {"value": parts[2].strip(), "unit": parts[-1].lower(), "n": len(parts)}
+
+    return ns_per_call(work, items, repeat)
+
+
+def _tile(lines: list[str], count: int) -> list[str]:
+    return (lines * (count // max(1, len(lines)) + 1))[:count]
+
+
+def build_workloads(lines: int, seed: int = 1234) -> dict[str, list[str]]:
+    random.seed(seed)
+    frames = {key: gen(lines) for key, (_, gen) in PROTOCOLS.items()}
+    mixed = [line for batch in frames.values() for line in batch]
+    random.shuffle(mixed)
+    return {**frames, "mixed": mixed[:lines], "unmatched": _tile(UNMATCHED_LINES, lines)}
+
+
+def run_suite(lines: int = 2000, repeat: int = 5, seed: int = 1234) -> dict:
+    """Measure every case; returns ``{"calibration_ns", "cases": {key: {ns, rel}}}``."""
+    level = box_collector.log.level
+    # Per-line INFO/WARNING logging would dominate the measurement.
+    box_collector.log.setLevel(logging.ERROR)
+    try:
+        workloads = build_workloads(lines, seed)
+        unit = calibration_ns(repeat)
+        timings: dict[str, float] = {}
+
+        for parser in PARSERS:
+            own = PARSER_PROTOCOLS[parser.name]
+            claimed = [line for line in workloads[own] if parser.extract(line) is not None]
+            others = [
+                line for key in PARSER_PROTOCOLS.values() if key != own
+                for line in workloads[key]
+                if not (parser.can_parse(line) and parser.extract(line) is not None)
+            ]
+
+            def match(line, parser=parser):
+                return parser.can_parse(line) and parser.extract(line)
+
+            timings[f"{parser.name}/match"] = ns_per_call(match, _tile(claimed, lines), repeat)
+            timings[f"{parser.name}/miss"] = ns_per_call(
+                match, _tile(others + UNMATCHED_LINES, lines), repeat,
+            )
+            timings[f"{parser.name}/adversarial"] = ns_per_call(
+                match, _tile(ADVERSARIAL_LINES, lines // 4 or 1), repeat,
+            )
+            timings[f"parse/{parser.name}"] = ns_per_call(
+                lambda line, parser=parser: parser.parse(line, CONTEXT),
+                _tile(claimed, lines), repeat,
+            )
+
+        reading = ParsedReading("weight", "12.3456", "g", "2026-04-23T10:00:00+00:00", "raw")
+        timings["compute_capture_hash"] = ns_per_call(
+            lambda _: compute_capture_hash(reading, CONTEXT), range(lines), repeat,
+        )
+        for load in ("mixed", "unmatched"):
+            dispatcher = ParserDispatcher()
+            timings[f"parse_line/{load}"] = ns_per_call(
+                lambda line: parse_line(line, CONTEXT, dispatcher), workloads[load], repeat,
+            )
+    finally:
+        box_collector.log.setLevel(level)
+
+    return {
+        "calibration_ns": round(unit, 1),
+        "cases": {
+            key: {"ns": round(ns, 1), "rel": round(ns / unit, 3)}
+            for key, ns in timings.items()
+        },
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Cases whose normalized cost exceeds ``tolerance`` x the baseline."""
+    regressions = []
+    for key, now in results["cases"].items():
+        before = baseline.get("cases", {}).get(key)
+        if before and before["rel"] > 0 and now["rel"] > before["rel"] * tolerance:
+            regressions.append(
+                f"{key}: {now['ns']:,.0f} ns/line, {now['rel'] / before['rel']:.2f}x "
+                f"baseline (limit {tolerance:g}x)"
+            )
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_baseline(results: dict, path: str = BASELINE_PATH) -> None:
+    with open(box_collector.__file__, "rb") as fh:
+        source = hashlib.sha256(fh.read()).hexdigest()[:12]
+    body = {
+        **results,
+        "recorded": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "box_collector_sha256": source,
+        },
+    }
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(body, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Box parsers (ns/line)")
+    parser.add_argument(
+        "--lines", type=int, default=2000, help="Lines per workload. Default: 2000",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5,
+        help="Repetitions per measurement, best run kept. Default: 5",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+        help=f"Regression threshold vs baseline (x). Default: {DEFAULT_TOLERANCE:g}",
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON path")
+    parser.add_argument(
+        "--update-baseline", action="store_true",
+        help="Store this run as the new baseline",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.lines, args.repeat)
+    baseline = load_baseline(args.baseline)
+    before = (baseline or {}).get("cases", {})
+
+    print("=" * 78)
+    print("BioNexus Box — parser / hash benchmark")
+    print(f"Lines/workload: {args.lines}   repeat: {args.repeat} (best kept)   "
+          f"calibration: {results['calibration_ns']:.0f} ns")
+    print("=" * 78)
+    print(f"{'case':<38} {'ns/line':>12} {'rel':>9} {'vs base':>9}")
+    for key, now in results["cases"].items():
+        ratio = f"{now['rel'] / before[key]['rel']:.2f}x" if key in before else "-"
+        print(f"{key:<38} {now['ns']:>12,.0f} {now['rel']:>9.2f} {ratio:>9}")
+
+    if args.update_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        print("\nNo baseline yet: run with --update-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
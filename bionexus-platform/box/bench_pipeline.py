@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark: virtual instruments → Box collector → cloud.
+
+Runs N virtual instruments, each a TCP client sending frames at a fixed
+rate to a running ``box_collector.py --mode tcp``, and follows every
+frame through the pipeline:
+
+  - parse    : the Box stamped ``hub_received_at`` on the reading
+  - commit   : the row is visible to an independent reader of the Box
+               queue DB (i.e. committed)
+  - ack      : the row is ``synced`` in the Box queue (cloud ACK)
+  - visible  : the backend lists the record as synced to a Measurement
+               (``/api/persistence/pending/?sync_status=synced``; needs
+               ``manage.py sync_pending`` running)
+
+Latencies are measured from the moment the frame was written to the
+socket, so each stage is cumulative. ``parse`` compares the Box clock
+with this host's: run the harness on the Box (the queue DB must be
+readable anyway) or keep both NTP-synced. ``commit`` / ``ack`` /
+``visible`` are observed by polling, so their resolution is the poll
+interval.
+
+Every frame carries a unique value token so it can be matched to its
+queue row by the verbatim ``raw`` line. Results are printed as a table
+and, with ``--output``, written as JSON for release-to-release
+comparison:
+
+    python box_collector.py --mode tcp --port 9600 --db /tmp/bench.db &
+    python bench_pipeline.py --queue-db /tmp/bench.db --instruments 8 \\
+        --rate 5 --duration 60 --output bench-results.json
+"""
+
+import argparse
+import json
+import platform
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import requests
+
+from box_collector import RecordCodec
+
+# value token: <instrument:03d><sequence:06d>.5 — unique per run, and
+# within PendingMeasurement.value's 10 integer digits.
+FRAME_TEMPLATES = {
+    "sics": "S S     {token} g",
+    "csv": "pH,{token},pH",
+    "kf": "KF,water_content,{token},%",
+    "dissolution": "DISS,1,15,{token},%",
+}
+
+STAGES = ("parse", "commit", "ack", "visible")
+
+
+def frame_token(instrument: int, seq: int) -> str:
+    return f"{instrument:03d}{seq:06d}.5"
+
+
+def percentiles(values: list[float]) -> dict:
+    """p50/p90/p95/p99/max in milliseconds (None when empty)."""
+    if not values:
+        return {"count": 0, "p50_ms": None, "p90_ms": None, "p95_ms": None,
+                "p99_ms": None, "max_ms": None}
+    ordered = sorted(values)
+
+    def pick(pct: float) -> float:
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return round(ordered[index] * 1000.0, 3)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(50),
+        "p90_ms": pick(90),
+        "p95_ms": pick(95),
+        "p99_ms": pick(99),
+        "max_ms": round(ordered[-1] * 1000.0, 3),
+    }
+
+
+class Tracker:
+    """Per-frame stage timestamps, keyed by the raw line sent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent: dict[str, float] = {}
+        self.stages: dict[str, dict[str, float]] = {stage: {} for stage in STAGES}
+        self.keys: dict[str, str] = {}  # idempotency_key → raw line
+
+    def record_sent(self, raw: str, at: float) -> None:
+        with self._lock:
+            self.sent[raw] = at
+
+    def record(self, stage: str, raw: str, at: float) -> None:
+        with self._lock:
+            if raw in self.sent:
+                self.stages[stage].setdefault(raw, at)
+
+    def latencies(self, stage: str) -> list[float]:
+        with self._lock:
+            return [at - self.sent[raw] for raw, at in self.stages[stage].items()]
+
+    def pending(self, stage: str) -> int:
+        with self._lock:
+            return len(self.sent) - len(self.stages[stage])
+
+
+def run_instrument(
+    index: int,
+    host: str,
+    port: int,
+    protocol: str,
+    rate: float,
+    duration: float,
+    tracker: Tracker,
+) -> None:
+    """One virtual instrument: paced frames on its own connection."""
+    template = FRAME_TEMPLATES[protocol]
+    interval = 1.0 / rate
+    with socket.create_connection((host, port), timeout=10) as sock:
+        start = time.monotonic()
+        seq = 0
+        while True:
+            due = start + seq * interval
+            if due - start >= duration:
+                break
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            raw = template.format(token=frame_token(index, seq))
+            tracker.record_sent(raw, time.time())
+            sock.sendall(raw.encode("utf-8") + b"\r\n")
+            seq += 1
+
+
+def poll_queue(
+    db_path: str,
+    tracker: Tracker,
+    stop: threading.Event,
+    poll_s: float,
+) -> None:
+    """Follow the Box queue: new committed rows, then synced rows."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    codec = RecordCodec()
+    try:
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM pending_queue").fetchone()[0]
+        unacked: dict[int, str] = {}
+        while not stop.is_set():
+            now = time.time()
+            for row_id, payload in conn.execute(
+                "SELECT id, payload FROM pending_queue WHERE id > ? ORDER BY id",
+                (last_id,),
+            ):
+                last_id = row_id
+                measurement = codec.decode(conn, payload)
+                raw = measurement.get("raw", "")
+                tracker.record("commit", raw, now)
+                received = measurement.get("hub_received_at")
+                if received:
+                    tracker.record(
+                        "parse", raw, datetime.fromisoformat(received).timestamp(),
+                    )
+                tracker.keys[measurement["idempotency_key"]] = raw
+                unacked[row_id] = raw
+            if unacked:
+                ids = list(unacked)
+                placeholders = ",".join("?" * len(ids))
+                for (row_id,) in conn.execute(
+                    f"SELECT id FROM pending_queue WHERE status = 'synced' "
+                    f"AND id IN ({placeholders})",
+                    ids,
+                ).fetchall():
+                    tracker.record("ack", unacked.pop(row_id), now)
+            stop.wait(poll_s)
+    finally:
+        conn.close()
+
+
+def poll_backend(
+    api_url: str,
+    tracker: Tracker,
+    stop: threading.Event,
+    poll_s: float,
+) -> None:
+    """Follow the backend: records synced into Measurement rows."""
+    url = f"{api_url.rstrip('/')}/api/persistence/pending/"
+    session = requests.Session()
+    while not stop.is_set():
+        try:
+            resp = session.get(url, params={"sync_status": "synced"}, timeout=10)
+            now = time.time()
+            if resp.status_code == 200:
+                body = resp.json()
+                records = body.get("results", body) if isinstance(body, dict) else body
+                for record in records:
+                    raw = tracker.keys.get(str(record.get("idempotency_key")))
+                    if raw and record.get("synced_measurement_id"):
+                        tracker.record("visible", raw, now)
+        except (requests.RequestException, ValueError):
+            pass
+        stop.wait(poll_s)
+    session.close()
+
+
+def run_benchmark(
+    host: str,
+    ports: list[int],
+    queue_db: str,
+    instruments: int = 4,
+    rate: float = 5.0,
+    duration: float = 30.0,
+    protocol: str = "sics",
+    api_url: str = "",
+    drain_s: float = 30.0,
+    poll_ms: float = 20.0,
+    backend_poll_ms: float = 500.0,
+) -> dict:
+    """Run the load, wait for the pipeline to drain, return the results."""
+    tracker = Tracker()
+    stop = threading.Event()
+    pollers = [
+        threading.Thread(
+            target=poll_queue, args=(queue_db, tracker, stop, poll_ms / 1000.0),
+            daemon=True,
+        ),
+    ]
+    if api_url:
+        pollers.append(threading.Thread(
+            target=poll_backend,
+            args=(api_url, tracker, stop, backend_poll_ms / 1000.0),
+            daemon=True,
+        ))
+    for poller in pollers:
+        poller.start()
+
+    started = time.time()
+    senders = [
+        threading.Thread(
+            target=run_instrument,
+            args=(i, host, ports[i % len(ports)], protocol, rate, duration, tracker),
+            daemon=True,
+        )
+        for i in range(instruments)
+    ]
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+    send_done = time.time()
+
+    # Let the pipeline drain: wait until the last tracked stage caught up.
+    last_stage = "visible" if api_url else "ack"
+    deadline = time.monotonic() + drain_s
+    while tracker.pending(last_stage) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    for poller in pollers:
+        poller.join(timeout=5)
+
+    sent = len(tracker.sent)
+    stages = {stage: percentiles(tracker.latencies(stage)) for stage in STAGES}
+    acked = tracker.stages["ack"]
+    ack_window = (max(acked.values()) - started) if acked else 0.0
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": platform.node(),
+        "config": {
+            "instruments": instruments,
+            "rate_per_instrument": rate,
+            "duration_s": duration,
+            "protocol": protocol,
+            "ports": ports,
+            "backend": bool(api_url),
+            "poll_ms": poll_ms,
+        },
+        "sent": sent,
+        "offered_readings_per_s": round(sent / max(send_done - started, 1e-9), 2),
+        "acked_readings_per_s": round(len(acked) / ack_window, 2) if ack_window else 0.0,
+        "lost": {stage: sent - stages[stage]["count"] for stage in STAGES},
+        "stages": stages,
+    }
+
+
+def print_results(results: dict) -> None:
+    config = results["config"]
+    print("=" * 78)
+    print("BioNexus Box — end-to-end pipeline benchmark")
+    print(
+        f"{config['instruments']} instrument(s) x {config['rate_per_instrument']:g}/s "
+        f"for {config['duration_s']:g}s ({config['protocol']})"
+    )
+    print(
+        f"Sent: {results['sent']}   offered: {results['offered_readings_per_s']:.1f}/s   "
+        f"acked: {results['acked_readings_per_s']:.1f}/s"
+    )
+    print("=" * 78)
+    print(
+        f"{'stage':<8} {'count':>7} {'p50 ms':>10} {'p90 ms':>10} "
+        f"{'p99 ms':>10} {'max ms':>10} {'missing':>8}"
+    )
+    for stage, stats in results["stages"].items():
+        if not stats["count"]:
+            print(f"{stage:<8} {0:>7} {'-':>10} {'-':>10} {'-':>10} {'-':>10} "
+                  f"{results['lost'][stage]:>8}")
+            continue
+        print(
+            f"{stage:<8} {stats['count']:>7} {stats['p50_ms']:>10.1f} "
+            f"{stats['p90_ms']:>10.1f} {stats['p99_ms']:>10.1f} "
+            f"{stats['max_ms']:>10.1f} {results['lost'][stage]:>8}"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Box capture pipeline end to end",
+    )
+    parser.add_argument("--host", default="localhost", help="Box host. Default: localhost")
+    parser.add_argument(
+        "--port", type=int, nargs="+", default=[9600],
+        help="Box TCP port(s); instruments are spread round-robin. Default: 9600",
+    )
+    parser.add_argument(
+        "--queue-db", required=True,
+        help="Path of the Box SQLite queue (box_collector.py --db)",
+    )
+    parser.add_argument(
+        "--api-url", default="",
+        help="Backend URL to also measure Measurement visibility (optional)",
+    )
+    parser.add_argument("--instruments", type=int, default=4, help="Default: 4")
+    parser.add_argument(
+        "--rate", type=float, default=5.0,
+        help="Frames per second per instrument. Default: 5",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds. Default: 30")
+    parser.add_argument(
+        "--protocol", choices=sorted(FRAME_TEMPLATES), default="sics",
+        help="Frame format sent by the virtual instruments. Default: sics",
+    )
+    parser.add_argument(
+        "--drain", type=float, default=30.0,
+        help="Max seconds to wait for the pipeline to drain. Default: 30",
+    )
+    parser.add_argument(
+        "--poll-ms", type=float, default=20.0,
+        help="Queue DB poll interval (commit / ack resolution). Default: 20",
+    )
+    parser.add_argument(
+        "--output", default="",
+        help="Write the results as JSON to this file",
+    )
+    args = parser.parse_args(argv)
+    # box_collector turns SIGINT into a graceful-shutdown flag on import;
+    # the benchmark should stop on Ctrl-C.
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    results = run_benchmark(
+        host=args.host,
+        ports=args.port,
+        queue_db=args.queue_db,
+        instruments=args.instruments,
+        rate=args.rate,
+        duration=args.duration,
+        protocol=args.protocol,
+        api_url=args.api_url,
+        drain_s=args.drain,
+        poll_ms=args.poll_ms,
+    )
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
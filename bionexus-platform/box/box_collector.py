@@ -6,8 +6,23 @@ parses it, computes SHA-256 integrity hash that covers BOTH the raw
 reading AND the operational context (operator, lot, method, instrument),
 and POSTs to the BioNexus cloud API via /api/persistence/capture/.
 
-Offline-safe: if the cloud is unreachable, measurements are stored in
-a local SQLite queue and retried with exponential backoff on reconnect.
+Every reading goes through the local SQLite queue: the capture stage
+(serial / TCP listeners) only parses and enqueues, and a separate sender
+thread, woken on each new row, pushes batches to the cloud. A slow or
+offline cloud therefore never stalls the instrument reader; queued rows
+are retried with exponential backoff on reconnect. Synced rows are kept
+for ``--retention-days`` and then moved to gzip archive segments listed in
+a hash-chained manifest, so the hot queue stays small over years of uptime.
+Queue rows are compact binary records (interned context, fixed numeric
+header, optionally zlib-compressed body); JSON is only produced for the
+request body. A single writer thread owns the queue and group-commits writes
+(``--durability grouped``, the default) or commits every reading before
+acknowledging it (``--durability strict``). The queue has a disk budget:
+past it, readings spill to rotating append-only segments; past the spill
+budget, a local alarm is raised and the instruments are held back (TCP
+reads stop, serial XOFF) instead of readings being lost. A loopback HTTP
+endpoint (``--status-port``) reports queue depth, parse and push metrics
+kept in memory, so an outage can be told apart from saturation on site.
 
 ---------------------------------------------------------------------------
 SHA-256 scope (LBN-CONF-001 decision):
@@ -31,21 +46,33 @@ Usage:
 """
 
 import argparse
+import bisect
+import gzip
 import hashlib
+import http.server
 import json
 import logging
+import mmap
 import os
+import queue
+import random
 import re
+import selectors
+import shutil
 import signal
 import socket
 import sqlite3
+import struct
 import sys
 import threading
 import time
 import uuid
+import zlib
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass, field
-from datetime import datetime, timezone
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from typing import Optional
 
 try:
@@ -60,6 +87,7 @@ except ImportError:
 
 API_BASE_URL = os.getenv("BIONEXUS_API_URL", "http://localhost:8000")
 CAPTURE_ENDPOINT = "/api/persistence/capture/"
+CAPTURE_BATCH_ENDPOINT = "/api/persistence/capture/batch/"
 DEVICE_ID = os.getenv("BIONEXUS_DEVICE_ID", "box-gateway-001")
 
 # SQLite offline queue
@@ -67,12 +95,70 @@ DB_PATH = os.getenv("BIONEXUS_QUEUE_DB", "/var/lib/bionexus/queue.db")
 if not os.path.isdir(os.path.dirname(DB_PATH)):
     DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queue.db")
 
+# Retention: synced rows stay in the hot queue this long, then move to
+# gzip archive segments (ARCHIVE_SEGMENT_ROWS rows each) under the
+# archive directory. Maintenance (archiving, incremental vacuum, WAL
+# checkpoint) runs every MAINTENANCE_INTERVAL_S.
+RETENTION_DAYS = float(os.getenv("BIONEXUS_RETENTION_DAYS", "7"))
+ARCHIVE_SEGMENT_ROWS = 5000
+MAINTENANCE_INTERVAL_S = 3600.0
+MAINTENANCE_PRESSURE_INTERVAL_S = 30.0
+VACUUM_PAGES_PER_PASS = 2000
+
+# Disk budget: the queue DB may use QUEUE_BUDGET_MB (0 = unbounded) and
+# must leave QUEUE_MIN_FREE_MB free on its filesystem. Past either limit,
+# new readings spill to append-only segments of SPILL_SEGMENT_MB (at most
+# SPILL_BUDGET_MB in total); past that, backpressure is asserted. Usage is
+# re-checked every QUEUE_USAGE_CHECK_S, and spilled rows are replayed once
+# the DB is back under QUEUE_LOW_WATER of its budget.
+QUEUE_BUDGET_MB = float(os.getenv("BIONEXUS_QUEUE_BUDGET_MB", "1024"))
+QUEUE_MIN_FREE_MB = 64.0
+SPILL_BUDGET_MB = float(os.getenv("BIONEXUS_SPILL_BUDGET_MB", "256"))
+SPILL_SEGMENT_MB = 4.0
+QUEUE_USAGE_CHECK_S = 1.0
+QUEUE_LOW_WATER = 0.9
+# How often a listener paused by backpressure re-checks the queue.
+BACKPRESSURE_POLL_S = 0.2
+
 # Retry settings
 BACKOFF_BASE_S = 1.0
 BACKOFF_MAX_S = 300.0
 BACKOFF_JITTER_S = 0.5
 MAX_RETRIES = 10
+# The sender wakes as soon as a reading is queued; this is only the idle
+# re-check period (and the pause after a failed push).
 SYNC_INTERVAL_S = 5.0
+# How often the sender logs its capture-to-ACK latency summary.
+LATENCY_LOG_INTERVAL_S = 60.0
+
+# Batched cloud push: rows per POST to CAPTURE_BATCH_ENDPOINT (the server
+# caps batches at PERSISTENCE["CAPTURE_BATCH_MAX"], 500 by default), and
+# the body size above which requests are gzip-compressed.
+SYNC_BATCH_SIZE = 200
+# Due retries pushed per pass, in their own request after the fresh lane.
+SYNC_RETRY_BATCH_SIZE = 50
+GZIP_MIN_BYTES = 1024
+HTTP_TIMEOUT_S = 10
+
+# Cloud backpressure: a 429 from the server pauses the sender for its
+# Retry-After (CLOUD_BUSY_DEFAULT_S if absent) plus up to CLOUD_BUSY_JITTER
+# of it, so boxes turned away together do not come back together, and
+# caps the send rate at the X-BioNexus-Rate hint for RATE_HINT_TTL_S.
+RATE_HEADER = "X-BioNexus-Rate"
+CLOUD_BUSY_DEFAULT_S = 5.0
+CLOUD_BUSY_JITTER = 0.25
+RATE_HINT_TTL_S = 60.0
+
+# Local status endpoint (GET /status JSON, GET /metrics Prometheus text),
+# bound to loopback by default; port 0 disables it. Parse rates are
+# averaged over METRICS_RATE_WINDOW_S; push round-trips are bucketed into
+# PUSH_LATENCY_BUCKETS_S. With the cloud reachable, an unsent reading
+# older than STATUS_BACKLOG_AGE_S marks the box as saturated.
+STATUS_HOST = os.getenv("BIONEXUS_STATUS_HOST", "127.0.0.1")
+STATUS_PORT = int(os.getenv("BIONEXUS_STATUS_PORT", "9700"))
+METRICS_RATE_WINDOW_S = 60
+PUSH_LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATUS_BACKLOG_AGE_S = 300.0
 
 # Logging
 logging.basicConfig(
@@ -119,9 +205,12 @@ class CaptureContext:
         return asdict(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedReading:
-    """Raw output of a parser — the instrument-side part of the measurement."""
+    """Raw output of a parser — the instrument-side part of the measurement.
+
+    Slotted: one is built per instrument line, so no per-instance __dict__.
+    """
     parameter: str
     value: str
     unit: str
@@ -159,6 +248,44 @@ def compute_capture_hash(reading: ParsedReading, context: CaptureContext) -> str
     return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
 
+# ---------------------------------------------------------------------------
+# Merkle batch root — one hash commits to a whole sync batch
+# ---------------------------------------------------------------------------
+
+# Sent with every batch push; the server recomputes it over the items it
+# received and rejects the batch on mismatch, then echoes its own root.
+MERKLE_ROOT_HEADER = "X-BioNexus-Merkle-Root"
+
+
+def merkle_leaf(idempotency_key, data_hash) -> bytes:
+    """Leaf of one reading (RFC 6962: 0x00 prefix, distinct from nodes)."""
+    return hashlib.sha256(
+        b"\x00" + f"{idempotency_key or ''}:{data_hash or ''}".encode("utf-8")
+    ).digest()
+
+
+def merkle_root(items: list[dict]) -> str:
+    """Hex Merkle root over items' (idempotency_key, data_hash), in order.
+
+    Same construction as the server (modules/persistence/merkle.py):
+    nodes are SHA256(0x01 || left || right) and an odd node is promoted,
+    not duplicated. Per-reading data_hash values are unchanged; the root
+    only adds a batch-level commitment on top of them.
+    """
+    level = [merkle_leaf(m.get("idempotency_key"), m.get("data_hash")) for m in items]
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        paired = [
+            hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
 # ---------------------------------------------------------------------------
 # Parsers — BaseParser contract + Mettler SICS, Sartorius SBI, Generic CSV
 # ---------------------------------------------------------------------------
@@ -170,6 +297,10 @@ class BaseParser(ABC):
       - can_parse(line) → bool
       - extract(line)   → ParsedReading | None   (raw extraction, no context)
 
+    ``extract`` is strict: it performs every check ``can_parse`` does, so a
+    non-None reading IS the match. The dispatcher relies on this to run
+    each candidate parser exactly once per line.
+
     The base class provides parse() that orchestrates extraction, context
     enrichment, and hash computation — so every parser emits the same
     payload shape.
@@ -177,6 +308,13 @@ class BaseParser(ABC):
 
     name: str = "base"
     protocol: str = "base"
+    # True when no parser ranked above this one in PARSERS can accept a
+    # line this parser accepts, so its match is final on its own and
+    # ParserDispatcher may try it first (parser affinity).
+    affinity_safe: bool = False
+    # True when extract() accepts multi-line blocks assembled by the
+    # StreamFramer; only such parsers are offered block frames.
+    multiline: bool = False
 
     @classmethod
     @abstractmethod
@@ -212,12 +350,24 @@ class BaseParser(ABC):
         reading = cls.extract(line)
         if reading is None:
             return None
+        return cls.build_payload(reading, context)
 
+    @classmethod
+    def build_payload(
+        cls,
+        reading: ParsedReading,
+        context: CaptureContext,
+        idempotency_key: Optional[str] = None,
+    ) -> dict:
+        """Enrich an already-extracted reading with context and hash.
+
+        ``idempotency_key`` defaults to a fresh UUID4 (live capture).
+        """
         now = datetime.now(timezone.utc).isoformat()
         data_hash = compute_capture_hash(reading, context)
 
         return {
-            "idempotency_key": str(uuid.uuid4()),
+            "idempotency_key": idempotency_key or str(uuid.uuid4()),
             "sample_id": context.sample_id,
             "instrument_id": context.instrument_id,
             "parameter": reading.parameter,
@@ -256,6 +406,7 @@ class MettlerSICSParser(BaseParser):
 
     name = "mettler_sics_v1"
     protocol = "SICS"
+    affinity_safe = True
 
     PATTERN = re.compile(r"^([A-Z]+)\s+([A-Z])\s+([-\d.]+)\s+(\S+)\s*$")
 
@@ -298,6 +449,7 @@ class SartoriusSBIParser(BaseParser):
 
     name = "sartorius_sbi_v1"
     protocol = "SBI"
+    affinity_safe = True
 
     PATTERN = re.compile(r"^([+-]?)\s*([\d.]+)\s+(\S+)\s*$")
 
@@ -391,21 +543,38 @@ class KarlFischerParser(BaseParser):
     trailing fields land in ``protocol_meta`` so they ride along into
     the audit trail without polluting the canonical Measurement row.
 
-    Multi-line text exports (``Sample: ...\\nWater content: 0.123 %``)
-    are NOT supported by this parser ; the Box gateway dispatches one
-    line at a time, so legacy multi-line printouts must be reformatted
-    upstream. This matches what real KF transfer-mode output looks like
-    when the instrument is configured for CSV export.
+    Multi-line report printouts are accepted too, once the StreamFramer
+    has assembled them into one block (lines joined with ``\\n``)::
+
+        Sample: Sample-001
+        Volume: 12.34 ml
+        Drift: 5.0 ug/min
+        Water content: 0.123 %
+
+    ``Water content`` is required; ``Sample`` / ``Volume`` / ``Drift`` map
+    to the same ``protocol_meta`` keys as the CSV trailing fields.
     """
 
     name = "karl_fischer_v1"
     protocol = "KF"
+    affinity_safe = True
+    multiline = True
     _PREFIX = "KF"
     _MIN_FIELDS = 4
     _MAX_FIELDS = 7
+    # Report-block labels (lower-cased) → protocol_meta key.
+    _REPORT_FIELDS = {
+        "sample": "sample_id",
+        "sample id": "sample_id",
+        "volume": "volume_ml",
+        "drift": "drift_ug_per_min",
+    }
+    _REPORT_RESULT = "water content"
 
     @classmethod
     def can_parse(cls, line: str) -> bool:
+        if "\n" in line.strip():
+            return cls._extract_report(line) is not None
         stripped = line.strip()
         if not stripped or stripped.startswith("#"):
             return False
@@ -423,8 +592,12 @@ class KarlFischerParser(BaseParser):
 
     @classmethod
     def extract(cls, line: str) -> Optional[ParsedReading]:
+        if "\n" in line.strip():
+            return cls._extract_report(line)
         parts = [p.strip() for p in line.strip().split(",")]
-        if len(parts) < cls._MIN_FIELDS or parts[0] != cls._PREFIX:
+        if parts[0] != cls._PREFIX:
+            return None
+        if not (cls._MIN_FIELDS <= len(parts) <= cls._MAX_FIELDS):
             return None
 
         try:
@@ -459,6 +632,47 @@ class KarlFischerParser(BaseParser):
             protocol_meta=protocol_meta,
         )
 
+    @classmethod
+    def _extract_report(cls, block: str) -> Optional[ParsedReading]:
+        fields: dict[str, str] = {}
+        for row in block.strip().splitlines():
+            label, sep, value = row.partition(":")
+            if not sep:
+                return None
+            fields[label.strip().lower()] = value.strip()
+
+        result = fields.get(cls._REPORT_RESULT, "").split()
+        if len(result) != 2:
+            return None
+        value_str, unit = result
+        try:
+            float(value_str)
+        except ValueError:
+            return None
+
+        protocol_meta: dict = {}
+        for label, key in cls._REPORT_FIELDS.items():
+            raw_value = fields.get(label)
+            if not raw_value:
+                continue
+            if key == "sample_id":
+                protocol_meta[key] = raw_value
+                continue
+            number = raw_value.split()[0]
+            try:
+                protocol_meta[key] = float(number)
+            except ValueError:
+                protocol_meta[key] = raw_value
+
+        return ParsedReading(
+            parameter="water_content",
+            value=value_str,
+            unit=unit,
+            source_timestamp=datetime.now(timezone.utc).isoformat(),
+            raw=block.strip("\r\n"),
+            protocol_meta=protocol_meta,
+        )
+
 
 class AgilentChemStationParser(BaseParser):
     """Parse Agilent ChemStation peak report CSV output.
@@ -516,7 +730,10 @@ class AgilentChemStationParser(BaseParser):
 
     @classmethod
     def extract(cls, line: str) -> Optional[ParsedReading]:
-        parts = [p.strip() for p in line.strip().split(",")]
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            return None
+        parts = [p.strip() for p in stripped.split(",")]
         if len(parts) != cls._EXPECTED_FIELDS:
             return None
 
@@ -614,9 +831,14 @@ class WatersEmpowerParser(BaseParser):
 
     @classmethod
     def extract(cls, line: str) -> Optional[ParsedReading]:
-        parts = [p.strip() for p in line.strip().split("|")]
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            return None
+        parts = [p.strip() for p in stripped.split("|")]
         if len(parts) != cls._EXPECTED_FIELDS:
             return None
+        if parts[cls._IDX_SAMPLE_NAME].lower() == "samplename":
+            return None
 
         try:
             sample_name = parts[cls._IDX_SAMPLE_NAME]
@@ -684,6 +906,7 @@ class DissolutionASCIIParser(BaseParser):
 
     name = "dissolution_ascii_v1"
     protocol = "DissolutionASCII"
+    affinity_safe = True
 
     _PREFIX = "DISS"
     _IDX_PREFIX = 0
@@ -717,6 +940,8 @@ class DissolutionASCIIParser(BaseParser):
         parts = [p.strip() for p in line.strip().split(",")]
         if len(parts) != cls._EXPECTED_FIELDS:
             return None
+        if parts[cls._IDX_PREFIX].upper() != cls._PREFIX:
+            return None
 
         try:
             vessel = int(parts[cls._IDX_VESSEL])
@@ -759,37 +984,847 @@ PARSERS: list[type[BaseParser]] = [
 ]
 
 
-def parse_line(line: str, context: CaptureContext) -> Optional[dict]:
-    """Try all parsers, return first match's full capture payload."""
-    for parser in PARSERS:
-        if parser.can_parse(line):
-            result = parser.parse(line, context)
-            if result:
-                log.info(
-                    "Parsed [%s]: %s = %s %s (op=%s lot=%s hash=%s...)",
-                    parser.name,
-                    result["parameter"],
-                    result["value"],
-                    result["unit"],
-                    context.operator or "-",
-                    context.lot_number or "-",
-                    result["data_hash"][:12],
-                )
-                return result
-    log.warning("No parser matched line: %r", line.strip())
-    return None
+_WHITESPACE = re.compile(r"\s")
+_NUMERIC_LEAD = frozenset("+-.0123456789")
+
+
+class ParserDispatcher:
+    """Single-pass parser dispatch with a shape index and parser affinity.
+
+    Walking PARSERS with ``can_parse`` then ``extract`` runs the same regex
+    or ``split`` + ``float()`` twice per parser, and an unmatched line pays
+    for every parser. The dispatcher instead:
+
+      1. classifies the stripped line ONCE into a shape key — leading
+         token (``KF``, ``DISS``, SICS status letter, sign/digit, ``#``),
+         whitespace present, comma count, 10-field pipe row (multi-line
+         blocks from the StreamFramer get a key of their own);
+      2. looks up the memoized candidate tuple for that key — only the
+         parsers whose discriminator can accept that shape, still in
+         PARSERS priority order;
+      3. calls each candidate's strict ``extract`` exactly once, so the
+         reading comes from the same match that claimed the line.
+
+    Keep one dispatcher per instrument connection: it remembers the last
+    winning parser (parser affinity) and tries it before classifying the
+    next line. Affinity only applies to ``affinity_safe`` parsers (SICS,
+    SBI, KF, DISS): none of the parsers ranked above them can accept
+    their lines, so a hit is final and the dispatch result is identical
+    to the ordered walk. Empower / Agilent / GenericCSV overlap with
+    higher-priority shapes and always go through the index.
+    """
+
+    def __init__(self, parsers: Optional[list[type[BaseParser]]] = None):
+        self.parsers: tuple[type[BaseParser], ...] = tuple(
+            parsers if parsers is not None else PARSERS
+        )
+        self._index: dict[tuple, tuple[type[BaseParser], ...]] = {}
+        self._affinity: Optional[type[BaseParser]] = None
+
+    @staticmethod
+    def classify(stripped: str) -> tuple:
+        """Return the shape key of a stripped, non-empty line."""
+        if "\n" in stripped:
+            return ("block", True, 0, False)
+        head = stripped[0]
+        commas = stripped.count(",")
+        lead = "other"
+        if head == "#":
+            lead = "#"
+        elif head in _NUMERIC_LEAD:
+            lead = "num"
+        else:
+            if commas:
+                token = stripped[:stripped.index(",")].strip()
+                if token == KarlFischerParser._PREFIX:
+                    lead = "KF"
+                elif token.upper() == DissolutionASCIIParser._PREFIX:
+                    lead = "DISS"
+            if lead == "other" and "A" <= head <= "Z":
+                lead = "upper"
+        spaced = _WHITESPACE.search(stripped) is not None
+        return (lead, spaced, min(commas, 7), stripped.count("|") == 9)
+
+    def candidates(self, key: tuple) -> tuple[type[BaseParser], ...]:
+        """Parsers that can accept lines of shape ``key``, in priority order."""
+        found = self._index.get(key)
+        if found is None:
+            found = tuple(p for p in self.parsers if self._admits(p, key))
+            self._index[key] = found
+        return found
+
+    @staticmethod
+    def _admits(parser: type[BaseParser], key: tuple) -> bool:
+        lead, spaced, commas, pipe_row = key
+        if lead == "block":
+            return parser.multiline
+        if parser is MettlerSICSParser:
+            return lead == "upper" and spaced
+        if parser is SartoriusSBIParser:
+            return lead == "num" and spaced
+        if parser is KarlFischerParser:
+            return lead == "KF" and 3 <= commas <= 6
+        if parser is DissolutionASCIIParser:
+            return lead == "DISS" and commas == 4
+        if parser is WatersEmpowerParser:
+            return pipe_row and lead != "#"
+        if parser is AgilentChemStationParser:
+            return commas == 5 and lead != "#"
+        if parser is GenericCSVParser:
+            return commas >= 2
+        # Unknown parser (registered by an integrator): always a candidate.
+        return True
+
+    def match(
+        self, line: str,
+    ) -> tuple[Optional[type[BaseParser]], Optional[ParsedReading]]:
+        """Return ``(parser, reading)`` for the winning parser, or (None, None)."""
+        stripped = line.strip()
+        if not stripped:
+            return None, None
+
+        preferred = self._affinity
+        if preferred is not None:
+            reading = preferred.extract(line)
+            if reading is not None:
+                return preferred, reading
+
+        for parser in self.candidates(self.classify(stripped)):
+            if parser is preferred:
+                continue
+            reading = parser.extract(line)
+            if reading is not None:
+                self._affinity = parser if parser.affinity_safe else None
+                return parser, reading
+        return None, None
+
+
+# Process-wide dispatcher for callers that do not track a connection.
+_DEFAULT_DISPATCHER = ParserDispatcher()
+
+
+def parse_line(
+    line: str,
+    context: CaptureContext,
+    dispatcher: Optional[ParserDispatcher] = None,
+    reading_filter: Optional["ReadingFilter"] = None,
+    source_timestamp: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[dict]:
+    """Dispatch a line to its parser, return the full capture payload.
+
+    With a ``reading_filter``, readings it drops return None before any
+    hashing or payload building happens. ``source_timestamp`` (a recorded
+    line being replayed) replaces the parser's receive time;
+    ``idempotency_key`` (a replayed line's stable key) replaces the fresh one.
+    """
+    parser, reading = (dispatcher or _DEFAULT_DISPATCHER).match(line)
+    if parser is None:
+        METRICS.unmatched()
+        log.warning("No parser matched line: %r", line.strip())
+        return None
+    METRICS.parsed(parser.name)
+    if source_timestamp:
+        reading.source_timestamp = source_timestamp
+    if reading_filter is not None and not reading_filter.admit(reading):
+        return None
+
+    result = parser.build_payload(reading, context, idempotency_key)
+    log.info(
+        "Parsed [%s]: %s = %s %s (op=%s lot=%s hash=%s...)",
+        parser.name,
+        result["parameter"],
+        result["value"],
+        result["unit"],
+        context.operator or "-",
+        context.lot_number or "-",
+        result["data_hash"][:12],
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Reading filter — stability / change / rate debounce before the queue
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class FilterPolicy:
+    """Which readings of one instrument are worth queueing.
+
+    Every enabled rule must pass:
+      - ``stable_only``  : drop readings tagged ``stability: dynamic``
+        (SICS ``S D``); readings without a stability flag pass;
+      - ``tolerance``    : forward a reading only when its numeric value
+        moved by more than ``tolerance`` since the last forwarded reading
+        of the same parameter / unit (0 = any change);
+      - ``window_s``     : forward at most one reading per parameter /
+        unit every ``window_s`` seconds.
+    The default policy forwards everything.
+    """
+
+    stable_only: bool = False
+    tolerance: Optional[float] = None
+    window_s: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.stable_only or self.tolerance is not None or self.window_s is not None
+
+    def describe(self) -> str:
+        if not self.active:
+            return "all"
+        rules = []
+        if self.stable_only:
+            rules.append("stable")
+        if self.tolerance is not None:
+            rules.append(f"change>{self.tolerance:g}")
+        if self.window_s is not None:
+            rules.append(f"1/{self.window_s:g}s")
+        return "+".join(rules)
+
+
+FILTER_REASONS = ("unstable", "unchanged", "window")
+
+
+class ReadingFilter:
+    """Per-instrument debounce stage between parsing and the queue.
+
+    Runs on the extracted ParsedReading, so a dropped frame never pays
+    for hashing, payload building, the queue or the cloud. Drops are
+    counted per reason; the counts since the previous forwarded reading
+    of the same stream ride along in its ``protocol_meta["filtered"]``,
+    so the audit record shows how many frames each reading stands for.
+    """
+
+    def __init__(self, policy: Optional[FilterPolicy] = None, clock=time.monotonic):
+        self.policy = policy or FilterPolicy()
+        self.forwarded = 0
+        self.dropped = dict.fromkeys(FILTER_REASONS, 0)
+        self._clock = clock
+        # (parameter, unit) → [last value, last forward time, drops since]
+        self._streams: dict[tuple, list] = {}
+
+    def admit(self, reading: ParsedReading) -> bool:
+        """True to forward ``reading``; False when the policy drops it."""
+        policy = self.policy
+        if not policy.active:
+            self.forwarded += 1
+            return True
+
+        key = (reading.parameter, reading.unit)
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = [None, None, {}]
+        last_value, last_at, since = stream
+
+        reason = None
+        if policy.stable_only and reading.protocol_meta.get("stability") == "dynamic":
+            reason = "unstable"
+        value = None
+        if reason is None and policy.tolerance is not None:
+            try:
+                value = float(reading.value)
+            except (TypeError, ValueError):
+                value = None
+            if (
+                value is not None and last_value is not None
+                and abs(value - last_value) <= policy.tolerance
+            ):
+                reason = "unchanged"
+        now = self._clock()
+        if (
+            reason is None and policy.window_s is not None
+            and last_at is not None and now - last_at < policy.window_s
+        ):
+            reason = "window"
+
+        if reason is not None:
+            self.dropped[reason] += 1
+            since[reason] = since.get(reason, 0) + 1
+            return False
+
+        if since:
+            reading.protocol_meta["filtered"] = {
+                "policy": policy.describe(), **since,
+            }
+        stream[0] = value if value is not None else last_value
+        stream[1] = now
+        stream[2] = {}
+        self.forwarded += 1
+        return True
+
+    def summary(self) -> str:
+        return "forwarded=%d %s" % (
+            self.forwarded,
+            " ".join(f"{reason}={n}" for reason, n in self.dropped.items()),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Stream framing — bytes in, frames (line or report block) out
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class FrameProfile:
+    """How an instrument delimits its output.
+
+    - ``delimiter``      : frame terminator (``\\r`` / ``\\n`` are trimmed
+      from both ends of every frame, so LF also covers CRLF);
+    - ``header_prefix``  : report header lines (``# Method: USP-007.M``);
+      they are not parsed as readings, their ``Key: value`` pairs listed
+      in ``header_fields`` are attached to the ``protocol_meta`` of every
+      following reading until the next header block;
+    - ``block_start`` / ``block_end`` : line prefixes opening and closing
+      a multi-line report (KF printouts). The end line is part of the
+      block, which is emitted as ONE frame with lines joined by ``\\n``.
+    """
+
+    name: str
+    delimiter: bytes = b"\n"
+    header_prefix: bytes = b"#"
+    header_fields: tuple = (("method", "method"), ("instrument", "instrument"))
+    block_start: tuple = (b"Sample:", b"Sample ID:")
+    block_end: tuple = (b"Water content:",)
+    max_block_lines: int = 32
+
+
+FRAME_PROFILES: dict[str, FrameProfile] = {
+    # LF / CRLF terminated text: SICS, SBI, CSV, KF, ChemStation, Empower, DISS
+    "line": FrameProfile("line"),
+    # Bare CR terminated (older Sartorius / Ohaus balance firmware)
+    "cr": FrameProfile("cr", delimiter=b"\r"),
+    # STX ... ETX framed output (printer-port style transfer)
+    "etx": FrameProfile("etx", delimiter=b"\x03"),
+}
+
+# Bytes buffered without a frame delimiter before the buffer is discarded
+# as garbage (a sender that never terminates its frames).
+MAX_LINE_BYTES = 64 * 1024
+
+_FRAME_TRIM = frozenset(b" \t\r\n\x02\x03\x00")
+
+
+@dataclass
+class Frame:
+    """One unit handed to the parsers: a line or an assembled report block."""
+    text: str
+    meta: dict = field(default_factory=dict)
+
+
+class StreamFramer:
+    """Incremental byte-level framer for one instrument stream.
+
+    Received bytes are appended to a ``bytearray``; frame boundaries and
+    trimming are found by index on the buffer, and each frame is decoded
+    exactly once from a ``memoryview`` slice — no per-line ``bytes`` copy,
+    ``decode`` + ``strip`` round trip. Consumed bytes are dropped from
+    the buffer once per ``feed``.
+
+    Keep one framer per connection / serial port: it carries the partial
+    frame, the open report block and the current header metadata.
+    """
+
+    def __init__(self, profile: Optional[FrameProfile] = None):
+        self.profile = profile or FRAME_PROFILES["line"]
+        self.buffer = bytearray()
+        self.meta: dict = {}
+        self.discarded = 0
+        self._block: list[str] = []
+        self._in_header = False
+        self._header_fields = {
+            label.encode("ascii"): key for label, key in self.profile.header_fields
+        }
+
+    def feed(self, data: bytes) -> list[Frame]:
+        """Add received bytes; return every frame they complete."""
+        buffer = self.buffer
+        buffer += data
+        delimiter = self.profile.delimiter
+        frames: list[Frame] = []
+        start = 0
+        with memoryview(buffer) as view:
+            while True:
+                end = buffer.find(delimiter, start)
+                if end < 0:
+                    break
+                self._frame(buffer, view, start, end, frames)
+                start = end + len(delimiter)
+        del buffer[:start]
+        if len(buffer) > MAX_LINE_BYTES:
+            log.warning("Discarded %d bytes without a frame delimiter", len(buffer))
+            self.discarded += 1
+            buffer.clear()
+        return frames
+
+    def _frame(self, buffer: bytearray, view: memoryview, start: int, end: int,
+               frames: list[Frame]) -> None:
+        while start < end and buffer[start] in _FRAME_TRIM:
+            start += 1
+        while end > start and buffer[end - 1] in _FRAME_TRIM:
+            end -= 1
+        if start == end:
+            return
+        profile = self.profile
+
+        if profile.header_prefix and buffer.startswith(profile.header_prefix, start):
+            self._header(buffer, view, start + len(profile.header_prefix), end)
+            return
+        self._in_header = False
+
+        if self._block:
+            self._block.append(str(view[start:end], "utf-8", "replace"))
+            if any(buffer.startswith(p, start) for p in profile.block_end):
+                frames.append(Frame("\n".join(self._block), self.meta))
+                self._block = []
+            elif len(self._block) >= profile.max_block_lines:
+                log.warning("Report block exceeded %d lines — discarded", len(self._block))
+                self.discarded += 1
+                self._block = []
+            return
+
+        if any(buffer.startswith(p, start) for p in profile.block_start):
+            self._block = [str(view[start:end], "utf-8", "replace")]
+            return
+
+        frames.append(Frame(str(view[start:end], "utf-8", "replace"), self.meta))
+
+    def _header(self, buffer: bytearray, view: memoryview, start: int, end: int) -> None:
+        if not self._in_header:
+            # First header line after data: a new report begins.
+            self._in_header = True
+            self.meta = {}
+        colon = buffer.find(b":", start, end)
+        if colon < 0:
+            return
+        key = self._header_fields.get(bytes(buffer[start:colon]).strip().lower())
+        if key is None:
+            return
+        value_start = colon + 1
+        while value_start < end and buffer[value_start] in _FRAME_TRIM:
+            value_start += 1
+        # Copy-on-write: frames already emitted keep the metadata they saw.
+        self.meta = {**self.meta, key: str(view[value_start:end], "utf-8", "replace")}
+
+
+# ---------------------------------------------------------------------------
+# Queue Record Format — compact binary rows, JSON only at the network edge
+# ---------------------------------------------------------------------------
+
+# Record layout (little-endian), stored as a BLOB in pending_queue.payload:
+#
+#   header  B  version          (RECORD_VERSION)
+#           B  flags            (REC_* bits below)
+#           H  reserved
+#           I  context ref      (contexts.id — operational context, interned)
+#           q  instrument_id
+#           q  sample_id
+#           q  source_timestamp (µs since epoch, UTC)
+#           q  hub_received_at  (µs since epoch, UTC)
+#          16s idempotency_key  (UUID bytes)
+#          32s data_hash        (SHA-256 digest)
+#   body    u32-length-prefixed UTF-8 fields: parameter, value, unit,
+#           [verbatim fallbacks], raw, protocol_meta JSON, [extra keys JSON]
+#           — zlib-compressed as a whole when REC_ZLIB is set.
+#
+# A header field that would not round-trip byte-for-byte (a non-UTC or
+# non-ISO timestamp, a non-UUID key, ...) sets its REC_*_TEXT flag and is
+# carried verbatim in the body instead: the hash covers these strings, so
+# the decoded record must be identical to what was captured. Rows written
+# before this format are TEXT JSON and are still decoded transparently.
+
+RECORD_VERSION = 1
+_RECORD_HEADER = struct.Struct("<BBHIqqqq16s32s")
+_FIELD_LEN = struct.Struct("<I")
+
+REC_ZLIB = 0x01
+REC_SOURCE_TS_TEXT = 0x02
+REC_HUB_TS_TEXT = 0x04
+REC_KEY_TEXT = 0x08
+REC_HASH_TEXT = 0x10
+REC_EXTRA = 0x20
+_REC_TEXT_FLAGS = (REC_SOURCE_TS_TEXT, REC_HUB_TS_TEXT, REC_KEY_TEXT, REC_HASH_TEXT)
+
+# Bodies shorter than this are stored uncompressed (zlib would not pay
+# for its own header on a typical balance line).
+RECORD_COMPRESS_MIN_BYTES = 256
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+_RECORD_KEYS = frozenset({
+    "idempotency_key", "sample_id", "instrument_id", "parameter", "value", "unit",
+    "source_timestamp", "hub_received_at", "raw", "data_hash", "context",
+    "protocol_meta",
+})
+
+
+def _ts_to_us(text) -> Optional[int]:
+    """Epoch microseconds for an ISO UTC timestamp, None if not lossless."""
+    if not isinstance(text, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.utcoffset() != timedelta(0):
+        return None
+    us = (dt - _EPOCH) // _US
+    return us if _us_to_ts(us) == text else None
+
+
+def _us_to_ts(us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+def _uuid_bytes(text) -> Optional[bytes]:
+    try:
+        value = uuid.UUID(text)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    return value.bytes if str(value) == text else None
+
+
+def _hash_bytes(text) -> Optional[bytes]:
+    if not isinstance(text, str) or len(text) != 64:
+        return None
+    try:
+        digest = bytes.fromhex(text)
+    except ValueError:
+        return None
+    return digest if digest.hex() == text else None
+
+
+class RecordCodec:
+    """Encode measurements into compact queue records and back.
+
+    The operational context is identical for every reading of a capture
+    session, so it is stored once in the ``contexts`` table and each record
+    carries only its 4-byte reference; the codec caches both directions.
+    Methods take the connection explicitly, so one codec serves the
+    QueueWriter thread and a read-only connection elsewhere (archiving,
+    benchmarks) alike — but a codec must not be shared between threads.
+    """
+
+    def __init__(self, compress_min: Optional[int] = RECORD_COMPRESS_MIN_BYTES):
+        # None disables compression.
+        self.compress_min = compress_min
+        self._refs: dict[tuple, int] = {}
+        self._contexts: dict[int, dict] = {}
+
+    # --- Contexts ----------------------------------------------------------
+
+    def context_ref(self, conn: sqlite3.Connection, context: dict) -> int:
+        body = None
+        try:
+            key = tuple(context.items())
+            ref = self._refs.get(key)
+        except TypeError:  # unhashable values: key on the serialized form
+            body = json.dumps(context, separators=(",", ":"), default=str)
+            key = (body,)
+            ref = self._refs.get(key)
+        if ref is not None:
+            return ref
+        if body is None:
+            body = json.dumps(context, separators=(",", ":"), default=str)
+        conn.execute("INSERT OR IGNORE INTO contexts (body) VALUES (?)", (body,))
+        ref = conn.execute("SELECT id FROM contexts WHERE body = ?", (body,)).fetchone()[0]
+        self._refs[key] = ref
+        self._contexts[ref] = context
+        return ref
+
+    def context(self, conn: sqlite3.Connection, ref: int) -> dict:
+        context = self._contexts.get(ref)
+        if context is None:
+            row = conn.execute("SELECT body FROM contexts WHERE id = ?", (ref,)).fetchone()
+            context = json.loads(row[0]) if row else {}
+            self._contexts[ref] = context
+        return dict(context)
+
+    # --- Records -----------------------------------------------------------
+
+    def encode(self, conn: sqlite3.Connection, measurement: dict) -> bytes:
+        flags = 0
+        texts = []
+        source_us = _ts_to_us(measurement["source_timestamp"])
+        hub_us = _ts_to_us(measurement["hub_received_at"])
+        key = _uuid_bytes(measurement["idempotency_key"])
+        digest = _hash_bytes(measurement["data_hash"])
+        for flag, encoded, name in (
+            (REC_SOURCE_TS_TEXT, source_us, "source_timestamp"),
+            (REC_HUB_TS_TEXT, hub_us, "hub_received_at"),
+            (REC_KEY_TEXT, key, "idempotency_key"),
+            (REC_HASH_TEXT, digest, "data_hash"),
+        ):
+            if encoded is None:
+                flags |= flag
+                texts.append(str(measurement[name]))
+
+        fields = [
+            str(measurement["parameter"]), str(measurement["value"]),
+            str(measurement["unit"]), *texts, str(measurement.get("raw", "")),
+            json.dumps(measurement.get("protocol_meta") or {},
+                       separators=(",", ":"), default=str),
+        ]
+        extra = {k: v for k, v in measurement.items() if k not in _RECORD_KEYS}
+        if extra:
+            flags |= REC_EXTRA
+            fields.append(json.dumps(extra, separators=(",", ":"), default=str))
+
+        parts = []
+        for text in fields:
+            data = text.encode("utf-8")
+            parts.append(_FIELD_LEN.pack(len(data)))
+            parts.append(data)
+        body = b"".join(parts)
+        if self.compress_min is not None and len(body) >= self.compress_min:
+            packed = zlib.compress(body, 6)
+            if len(packed) < len(body):
+                body = packed
+                flags |= REC_ZLIB
+
+        header = _RECORD_HEADER.pack(
+            RECORD_VERSION, flags, 0,
+            self.context_ref(conn, measurement.get("context") or {}),
+            int(measurement["instrument_id"]), int(measurement["sample_id"]),
+            source_us or 0, hub_us or 0, key or b"", digest or b"",
+        )
+        return header + body
+
+    def decode(self, conn: sqlite3.Connection, payload, full: bool = True) -> dict:
+        """Rebuild the measurement dict of a queue row.
+
+        ``full=False`` stops after the fields the cloud endpoint accepts
+        (see build_capture_payload), skipping raw, context and metadata.
+        """
+        if isinstance(payload, str):
+            return json.loads(payload)  # row queued before the binary format
+        (version, flags, _, ref, instrument_id, sample_id,
+         source_us, hub_us, key, digest) = _RECORD_HEADER.unpack_from(payload)
+        if version != RECORD_VERSION:
+            raise ValueError(f"Unsupported queue record version: {version}")
+        body = memoryview(payload)[_RECORD_HEADER.size:]
+        if flags & REC_ZLIB:
+            body = memoryview(zlib.decompress(body))
+
+        offset = 0
+
+        def take() -> str:
+            nonlocal offset
+            (length,) = _FIELD_LEN.unpack_from(body, offset)
+            offset += _FIELD_LEN.size + length
+            return str(body[offset - length:offset], "utf-8")
+
+        parameter, value, unit = take(), take(), take()
+        texts = {flag: take() for flag in _REC_TEXT_FLAGS if flags & flag}
+        data_hash = texts[REC_HASH_TEXT] if flags & REC_HASH_TEXT else digest.hex()
+        measurement = {
+            "idempotency_key": (
+                texts[REC_KEY_TEXT] if flags & REC_KEY_TEXT else str(uuid.UUID(bytes=key))
+            ),
+            "sample_id": sample_id,
+            "instrument_id": instrument_id,
+            "parameter": parameter,
+            "value": value,
+            "unit": unit,
+            "source_timestamp": (
+                texts[REC_SOURCE_TS_TEXT] if flags & REC_SOURCE_TS_TEXT
+                else _us_to_ts(source_us)
+            ),
+            "hub_received_at": (
+                texts[REC_HUB_TS_TEXT] if flags & REC_HUB_TS_TEXT else _us_to_ts(hub_us)
+            ),
+        }
+        if not full:
+            measurement["data_hash"] = data_hash
+            return measurement
+        measurement["raw"] = take()
+        measurement["data_hash"] = data_hash
+        measurement["context"] = self.context(conn, ref)
+        measurement["protocol_meta"] = json.loads(take())
+        if flags & REC_EXTRA:
+            measurement.update(json.loads(take()))
+        return measurement
+
+
+# ---------------------------------------------------------------------------
+# Queue Budget — disk quota, overflow spill, backpressure
+# ---------------------------------------------------------------------------
+
+QUEUE_OK = "ok"              # rows go to the queue DB
+QUEUE_SPILLING = "spilling"  # DB over budget: rows go to spill segments
+QUEUE_FULL = "full"          # spill over budget too: backpressure asserted
+
+
+@dataclass(frozen=True)
+class QueueBudget:
+    """Disk limits for the offline queue (0 disables a limit)."""
+    db_mb: float = QUEUE_BUDGET_MB
+    min_free_mb: float = QUEUE_MIN_FREE_MB
+    spill_mb: float = SPILL_BUDGET_MB
+    segment_mb: float = SPILL_SEGMENT_MB
+
+    @property
+    def db_bytes(self) -> int:
+        return int(self.db_mb * 1024 * 1024)
+
+    @property
+    def min_free_bytes(self) -> int:
+        return int(self.min_free_mb * 1024 * 1024)
+
+    @property
+    def spill_bytes(self) -> int:
+        return int(self.spill_mb * 1024 * 1024)
+
+    @property
+    def segment_bytes(self) -> int:
+        return max(1, int(self.segment_mb * 1024 * 1024))
+
+
+class SpillLog:
+    """Rotating append-only overflow segments (``spill-<seq>.jsonl``).
+
+    Used while the queue DB is over its budget: appending a JSON line
+    costs no B-tree or WAL growth, and the directory may sit on another
+    volume. Segments are replayed into the DB oldest first once there is
+    room again and deleted only after that commit; replaying a segment
+    twice (crash in between) is harmless, rows dedupe on idempotency_key.
+    A torn last line (power loss mid-append) is skipped on replay.
+    """
+
+    PREFIX = "spill-"
+    SUFFIX = ".jsonl"
+
+    def __init__(self, spill_dir: str, segment_bytes: int, budget_bytes: int = 0):
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        self.segment_bytes = segment_bytes
+        self.budget_bytes = budget_bytes
+        segments = self.segments()
+        self.bytes = sum(os.path.getsize(path) for path in segments)
+        self._seq = 0
+        if segments:
+            name = os.path.basename(segments[-1])
+            self._seq = int(name[len(self.PREFIX):-len(self.SUFFIX)])
+        self._fh = None
+        self._path = ""
+        self._size = 0
+
+    def segments(self) -> list[str]:
+        names = sorted(
+            name for name in os.listdir(self.spill_dir)
+            if name.startswith(self.PREFIX) and name.endswith(self.SUFFIX)
+        )
+        return [os.path.join(self.spill_dir, name) for name in names]
+
+    @property
+    def full(self) -> bool:
+        return bool(self.budget_bytes) and self.bytes >= self.budget_bytes
+
+    def append(self, measurement: dict) -> None:
+        line = (json.dumps(measurement, separators=(",", ":"), default=str) + "\n").encode()
+        if self._fh is None or self._size >= self.segment_bytes:
+            self._rotate()
+        self._fh.write(line)
+        self._size += len(line)
+        self.bytes += len(line)
+
+    def sync(self) -> None:
+        """Make appended lines durable (called with each queue commit)."""
+        if self._fh is not None:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def pop_oldest(self) -> Optional[tuple[str, list[dict]]]:
+        """Oldest segment's path and rows; ``discard`` it once they are stored."""
+        segments = self.segments()
+        if not segments:
+            return None
+        path = segments[0]
+        if path == self._path:
+            self.close()
+        rows = []
+        with open(path, "rb") as fh:
+            for line in fh:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    log.warning("Spill segment %s: skipping torn line", os.path.basename(path))
+        return path, rows
+
+    def discard(self, path: str) -> None:
+        self.bytes = max(0, self.bytes - os.path.getsize(path))
+        os.remove(path)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self.sync()
+            self._fh.close()
+        self._fh = None
+        self._path = ""
+        self._size = 0
+
+    def _rotate(self) -> None:
+        self.close()
+        self._seq += 1
+        self._path = os.path.join(self.spill_dir, f"{self.PREFIX}{self._seq:08d}{self.SUFFIX}")
+        self._fh = open(self._path, "ab")
+        self._size = 0
+
+
+class QueueAlarm:
+    """Local alarm raised while the queue is not in the ``ok`` state.
+
+    Logs every transition and, with a path, keeps a JSON status file
+    present for as long as the alarm is active, for a watchdog, LED
+    driver or operator check (``cat``) to pick up without the network.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.active = False
+
+    def update(self, state: str, stats: dict) -> None:
+        if state == QUEUE_OK:
+            if self.active:
+                log.warning("Queue alarm cleared (%s)", _describe_usage(stats))
+                if self.path and os.path.exists(self.path):
+                    os.remove(self.path)
+            self.active = False
+            return
+        self.active = True
+        log.error("QUEUE ALARM: %s (%s)", state, _describe_usage(stats))
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({**stats, "since": datetime.now(timezone.utc).isoformat()}, fh)
+            os.replace(tmp_path, self.path)
+
+
+def _describe_usage(stats: dict) -> str:
+    return (
+        f"db {stats['used_bytes'] / 1048576:.1f}/{stats['budget_bytes'] / 1048576:.1f} MiB, "
+        f"spill {stats['spill_bytes'] / 1048576:.1f} MiB, "
+        f"{stats['spilled']} spilled, {stats['replayed']} replayed, {stats['lost']} lost"
+    )
 
 
 # ---------------------------------------------------------------------------
 # SQLite Offline Queue
 # ---------------------------------------------------------------------------
 
-def init_db(db_path: str) -> sqlite3.Connection:
-    """Initialize local SQLite queue for offline buffering."""
+def init_db(db_path: str, synchronous: str = "NORMAL") -> sqlite3.Connection:
+    """Initialize local SQLite queue for offline buffering.
+
+    The returned connection is bound to the calling thread; in the running
+    collector that thread is the QueueWriter, the connection's only owner.
+    """
     os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path)
+    # Must precede table creation to take effect on a new file; older
+    # queues are converted once below.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
     conn.execute("PRAGMA journal_mode=WAL")
-    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
     conn.execute("""
         CREATE TABLE IF NOT EXISTS pending_queue (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -799,109 +1834,957 @@ def init_db(db_path: str) -> sqlite3.Connection:
             retry_count INTEGER DEFAULT 0,
             last_error TEXT DEFAULT '',
             created_at TEXT DEFAULT (datetime('now')),
-            updated_at TEXT DEFAULT (datetime('now'))
+            updated_at TEXT DEFAULT (datetime('now')),
+            next_attempt_at REAL NOT NULL DEFAULT 0
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(pending_queue)")}
+    if "next_attempt_at" not in columns:
+        # Queue created before retries were scheduled: existing failed
+        # rows become due immediately.
+        conn.execute(
+            "ALTER TABLE pending_queue ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0"
+        )
+    # Interned operational contexts referenced by binary queue records.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS contexts (
+            id INTEGER PRIMARY KEY,
+            body TEXT UNIQUE NOT NULL
         )
     """)
     conn.execute("""
         CREATE INDEX IF NOT EXISTS idx_pending_status
         ON pending_queue (status, created_at)
     """)
+    # Serves both sync lanes: fresh rows (status='pending', all at 0, so
+    # in rowid order) and due retries (status='failed', by due time).
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pending_due
+        ON pending_queue (status, next_attempt_at)
+    """)
     conn.commit()
-    log.info("SQLite queue initialized: %s (WAL mode)", db_path)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        log.info("Converting queue to incremental auto-vacuum (one-time VACUUM)...")
+        conn.execute("VACUUM")
+    log.info("SQLite queue initialized: %s (WAL mode, synchronous=%s)", db_path, synchronous)
     return conn
 
 
-def queue_measurement(conn: sqlite3.Connection, measurement: dict) -> None:
-    """Store measurement in local offline queue."""
-    payload = json.dumps(measurement, default=str)
-    try:
-        conn.execute(
-            "INSERT OR IGNORE INTO pending_queue (idempotency_key, payload) VALUES (?, ?)",
-            (measurement["idempotency_key"], payload),
-        )
-        conn.commit()
-        log.debug("Queued: %s", measurement["idempotency_key"][:8])
-    except sqlite3.Error as e:
-        log.error("SQLite queue error: %s", e)
+# The statement helpers below do NOT commit: the QueueWriter decides when
+# a group of them becomes durable.
+
+QUEUE_STATUSES = ("pending", "failed", "synced", "dead")
+# Rows still owed to the cloud.
+UNSENT_STATUSES = ("pending", "failed")
+
+def queue_measurement(
+    conn: sqlite3.Connection, measurement: dict, codec: Optional[RecordCodec] = None,
+) -> Optional[int]:
+    """Store measurement in local offline queue; returns the new row id.
+
+    With a ``codec`` the row is a compact binary record; without one it
+    is the legacy JSON text form. Returns None when the idempotency_key
+    was already queued.
+    """
+    if codec is not None:
+        payload = codec.encode(conn, measurement)
+    else:
+        payload = json.dumps(measurement, default=str)
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO pending_queue (idempotency_key, payload) VALUES (?, ?)",
+        (measurement["idempotency_key"], payload),
+    )
+    return cursor.lastrowid if cursor.rowcount == 1 else None
 
 
-def get_pending(conn: sqlite3.Connection, limit: int = 50) -> list:
-    """Get pending measurements ready for sync."""
+def get_fresh(conn: sqlite3.Connection, limit: int = 50) -> list:
+    """Fast lane: readings never attempted yet, oldest first."""
     cursor = conn.execute(
         """SELECT id, idempotency_key, payload, retry_count
            FROM pending_queue
-           WHERE status IN ('pending', 'failed')
-           ORDER BY created_at ASC
+           WHERE status = 'pending'
+           ORDER BY next_attempt_at, id
            LIMIT ?""",
         (limit,),
     )
     return cursor.fetchall()
 
 
-def mark_synced(conn: sqlite3.Connection, row_id: int) -> None:
-    conn.execute(
-        "UPDATE pending_queue SET status='synced', updated_at=datetime('now') WHERE id=?",
-        (row_id,),
+def get_due_retries(
+    conn: sqlite3.Connection, limit: int = 50, now: Optional[float] = None,
+) -> list:
+    """Retry lane: failed readings whose backoff has elapsed."""
+    cursor = conn.execute(
+        """SELECT id, idempotency_key, payload, retry_count
+           FROM pending_queue
+           WHERE status = 'failed' AND next_attempt_at <= ?
+           ORDER BY next_attempt_at
+           LIMIT ?""",
+        (time.time() if now is None else now, limit),
     )
-    conn.commit()
+    return cursor.fetchall()
+
+
+def next_retry_at(conn: sqlite3.Connection) -> Optional[float]:
+    """Epoch time the earliest scheduled retry becomes due (None if none)."""
+    row = conn.execute(
+        "SELECT MIN(next_attempt_at) FROM pending_queue WHERE status = 'failed'"
+    ).fetchone()
+    return row[0]
+
+
+def get_pending(
+    conn: sqlite3.Connection, limit: int = 50, now: Optional[float] = None,
+) -> list:
+    """Get measurements ready for sync: fresh rows first, then due retries."""
+    rows = get_fresh(conn, limit)
+    if len(rows) < limit:
+        rows += get_due_retries(conn, limit - len(rows), now)
+    return rows
+
+
+def queue_depth(conn: sqlite3.Connection) -> dict[str, int]:
+    """Row count per status (full scan: startup and recovery only)."""
+    depth = dict.fromkeys(QUEUE_STATUSES, 0)
+    depth.update(conn.execute(
+        "SELECT status, COUNT(*) FROM pending_queue GROUP BY status"
+    ).fetchall())
+    return depth
+
+
+def oldest_unsent(conn: sqlite3.Connection) -> Optional[tuple[int, float]]:
+    """``(row id, epoch)`` of the oldest pending / failed row (index seeks)."""
+    oldest = None
+    for status in UNSENT_STATUSES:
+        row = conn.execute(
+            """SELECT id, created_at FROM pending_queue
+               WHERE status = ? ORDER BY created_at, id LIMIT 1""",
+            (status,),
+        ).fetchone()
+        if row is not None and (oldest is None or row[1] < oldest[1]):
+            oldest = row
+    if oldest is None:
+        return None
+    created = datetime.strptime(oldest[1], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    return oldest[0], created.timestamp()
+
+
+# Status changes return ``(previous status, new status)``, or None when the
+# row was not in a status the change applies to, so QueueWriter can keep its
+# depth counters without reading the row back.
+StatusChange = Optional[tuple[str, str]]
+
+
+def _update_from(
+    conn: sqlite3.Connection, row_id: int, sets: str, params: tuple, statuses: tuple,
+) -> Optional[str]:
+    """``UPDATE ... SET <sets>`` guarded by each candidate previous status in turn.
+
+    Returns the status the row had (the first guard that matched a row),
+    or None. The usual case — a fresh 'pending' row — costs one UPDATE.
+    """
+    for status in statuses:
+        cursor = conn.execute(
+            f"UPDATE pending_queue SET {sets} WHERE id=? AND status=?",
+            (*params, row_id, status),
+        )
+        if cursor.rowcount:
+            return status
+    return None
+
+
+def mark_synced(conn: sqlite3.Connection, row_id: int) -> StatusChange:
+    before = _update_from(
+        conn, row_id, "status='synced', updated_at=datetime('now')", (), UNSENT_STATUSES,
+    )
+    return (before, "synced") if before else None
+
+
+def backoff_delay(retry_count: int) -> float:
+    """Exponential backoff with jitter."""
+    delay = min(BACKOFF_BASE_S * (2 ** retry_count), BACKOFF_MAX_S)
+    jitter = random.uniform(-BACKOFF_JITTER_S, BACKOFF_JITTER_S)
+    return max(0.1, delay + jitter)
 
 
-def mark_failed(conn: sqlite3.Connection, row_id: int, error: str) -> None:
+def mark_failed(conn: sqlite3.Connection, row_id: int, error: str) -> StatusChange:
+    """Schedule the next attempt after backoff, or dead-letter the row."""
+    row = conn.execute(
+        "SELECT idempotency_key, retry_count, status FROM pending_queue WHERE id=?",
+        (row_id,),
+    ).fetchone()
+    if row is None or row[2] not in UNSENT_STATUSES:
+        return None
+    idem_key, retry_count, before = row[0], row[1] + 1, row[2]
+    if retry_count > MAX_RETRIES:
+        log.error(
+            "Max retries (%d) exceeded for %s — dead-lettered", MAX_RETRIES, idem_key[:8],
+        )
+        conn.execute(
+            """UPDATE pending_queue
+               SET status='dead', retry_count=?, last_error=?, updated_at=datetime('now')
+               WHERE id=?""",
+            (retry_count, error, row_id),
+        )
+        return before, "dead"
     conn.execute(
         """UPDATE pending_queue
-           SET status='failed', retry_count=retry_count+1,
+           SET status='failed', retry_count=?, next_attempt_at=?,
                last_error=?, updated_at=datetime('now')
            WHERE id=?""",
-        (error, row_id),
+        (retry_count, time.time() + backoff_delay(retry_count), error, row_id),
     )
-    conn.commit()
+    return before, "failed"
 
 
-# ---------------------------------------------------------------------------
-# Cloud Sync — Push queued measurements to API
-# ---------------------------------------------------------------------------
+def mark_dead(conn: sqlite3.Connection, row_id: int, error: str = "") -> StatusChange:
+    before = _update_from(
+        conn, row_id,
+        "status='dead', last_error=COALESCE(NULLIF(?, ''), last_error), "
+        "updated_at=datetime('now')",
+        (error,), ("pending", "failed", "synced"),
+    )
+    return (before, "dead") if before else None
+
+
+DURABILITY_STRICT = "strict"
+DURABILITY_GROUPED = "grouped"
+DURABILITY_CHOICES = (DURABILITY_STRICT, DURABILITY_GROUPED)
+
+# Group commit bounds (grouped durability): a commit happens as soon as
+# either bound is hit, so a reading is durable at most GROUP_COMMIT_MS
+# after it was parsed.
+GROUP_COMMIT_ROWS = 64
+GROUP_COMMIT_MS = 200
+
+
+class _QueueOp:
+    """One unit of work submitted to the QueueWriter thread."""
+
+    __slots__ = ("fn", "args", "done", "result", "error")
+
+    def __init__(self, fn, args: tuple, wait: bool):
+        self.fn = fn
+        self.args = args
+        self.done = threading.Event() if wait else None
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class QueueWriter:
+    """Single owner of the SQLite offline queue, with group commit.
+
+    Every statement — inserts from the listeners, status updates and
+    reads from the sync loop — is executed on ONE writer thread that owns
+    the connection, replacing the shared ``check_same_thread=False``
+    handle. Writes accumulate in an open transaction and are committed
+    together, so an HPLC peak-table burst costs one fsync per group
+    instead of one per line.
+
+    Durability levels:
+      - ``strict``  : ``synchronous=FULL``; ``enqueue`` returns only once
+        its row is committed. Concurrent producers still share a commit
+        (the writer commits as soon as its inbox is empty).
+      - ``grouped`` : ``synchronous=NORMAL``; ``enqueue`` returns
+        immediately and rows are committed every ``flush_rows`` rows or
+        ``flush_ms`` milliseconds, whichever comes first.
+
+    Rows are stored as compact binary records (RecordCodec); ``fetch``
+    and ``get_pending`` hand them back decoded.
+
+    Reads (``get_pending``, ``fetch``, ``call``) flush pending writes
+    first, so the sync loop always sees every row already handed to the
+    writer.
+
+    With a ``budget`` the writer re-checks disk usage every
+    QUEUE_USAGE_CHECK_S and moves between three states:
+      - ``ok``       : rows go to the queue DB;
+      - ``spilling`` : the DB is over budget (or the disk nearly full);
+        rows go to SpillLog segments, and keep doing so until every
+        spilled row has been replayed, so capture order is preserved;
+      - ``full``     : the spill is over budget too; ``backpressure`` is
+        set for the listeners (XOFF / stop reading) and the few rows
+        still arriving use the DB's headroom rather than being dropped.
+    Transitions raise or clear the QueueAlarm; ``stats()`` reports usage
+    and the spilled / replayed / lost counters.
+
+    ``stats()`` also reports the queue depth per status and the age of the
+    oldest unsent reading. Both are kept up to date by the writer itself
+    as rows are inserted, change status or are deleted: each status update
+    is guarded by the row's previous status, and its rowcount says which
+    counters to move, so no read is added to the write path. Reading them
+    never queries SQLite; the table is only counted at start-up and after
+    a failed commit.
+    """
 
-# Fields the server-side /api/persistence/capture/ endpoint accepts today.
-# Anything outside this allow-list is stripped at send time to keep the
-# existing endpoint contract stable. Context + protocol_meta are still
-# preserved locally for audit and future server-side ingestion.
-_CAPTURE_ALLOWED_KEYS = {
-    "idempotency_key",
-    "sample_id",
-    "instrument_id",
-    "parameter",
-    "value",
-    "unit",
-    "data_hash",
-    "source_timestamp",
-    "hub_received_at",
-}
+    _STOP = object()
+
+    def __init__(
+        self,
+        db_path: str,
+        durability: str = DURABILITY_GROUPED,
+        flush_rows: int = GROUP_COMMIT_ROWS,
+        flush_ms: int = GROUP_COMMIT_MS,
+        compress_min: Optional[int] = RECORD_COMPRESS_MIN_BYTES,
+        budget: Optional[QueueBudget] = None,
+        spill_dir: str = "",
+        alarm: Optional[QueueAlarm] = None,
+    ):
+        if durability not in DURABILITY_CHOICES:
+            raise ValueError(f"Unknown durability level: {durability!r}")
+        self.db_path = db_path
+        self.durability = durability
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = max(0, flush_ms) / 1000.0
+        self.commits = 0
+        # Used on the writer thread only (encode on enqueue, decode in fetch).
+        self.codec = RecordCodec(compress_min)
+        self.budget = budget
+        self.spill_dir = spill_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), "spill",
+        )
+        self.alarm = alarm or QueueAlarm()
+        self.state = QUEUE_OK
+        self.used_bytes = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.lost = 0
+        self.depth: dict[str, int] = dict.fromkeys(QUEUE_STATUSES, 0)
+        self._oldest: Optional[tuple[int, float]] = None
+        self._oldest_stale = False
+        self._spill: Optional[SpillLog] = None
+        self._checked_at = 0.0
+        self._inbox: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._new_rows = threading.Event()
+        self._ready = threading.Event()
+        self._init_error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._run, name="queue-writer", daemon=True,
+        )
 
+    # --- Lifecycle ---------------------------------------------------------
 
-def build_capture_payload(measurement: dict) -> dict:
-    """Build the POST body the cloud endpoint currently accepts.
+    def start(self) -> "QueueWriter":
+        self._thread.start()
+        self._ready.wait()
+        if self._init_error is not None:
+            raise self._init_error
+        return self
 
-    Kept narrow to maintain backward compatibility with the existing
-    /api/persistence/capture/ contract. Metadata travels via a separate
-    call in a later sprint.
-    """
-    return {k: v for k, v in measurement.items() if k in _CAPTURE_ALLOWED_KEYS}
+    def stop(self, timeout: float = 5.0) -> None:
+        """Commit whatever is buffered and close the connection."""
+        if self._thread.is_alive():
+            self._inbox.put(self._STOP)
+            self._thread.join(timeout=timeout)
 
+    # --- Producer API ------------------------------------------------------
 
-def push_to_cloud(api_url: str, measurement: dict) -> bool:
+    def enqueue(self, measurement: dict) -> None:
+        """Queue a parsed measurement (blocks until durable when strict)."""
+        self._submit(
+            self._store, (measurement,),
+            wait=self.durability == DURABILITY_STRICT,
+        )
+        self._new_rows.set()
+        log.debug("Queued: %s", measurement["idempotency_key"][:8])
+
+    def wait_for_rows(self, timeout: Optional[float] = None) -> bool:
+        """Block until a reading is enqueued (or ``notify``); True if woken.
+
+        The wake-up flag is consumed, so rows enqueued while the caller is
+        busy syncing wake the next wait immediately instead of being lost.
+        """
+        woken = self._new_rows.wait(timeout)
+        self._new_rows.clear()
+        return woken
+
+    def notify(self) -> None:
+        """Wake a sender blocked in ``wait_for_rows`` (e.g. on shutdown)."""
+        self._new_rows.set()
+
+    @property
+    def backpressure(self) -> bool:
+        """True while the listeners should stop accepting instrument data."""
+        return self.state == QUEUE_FULL
+
+    def stats(self) -> dict:
+        spill = self._spill
+        oldest = self._oldest
+        return {
+            "state": self.state,
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget.db_bytes if self.budget else 0,
+            "spill_bytes": spill.bytes if spill else 0,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "lost": self.lost,
+            "depth": dict(self.depth),
+            "oldest_pending_age_s": (
+                round(max(0.0, time.time() - oldest[1]), 3) if oldest else None
+            ),
+        }
+
+    def check_budget(self) -> str:
+        """Re-check disk usage now (normally periodic); returns the state."""
+        return self.call(self._check_budget)
+
+    def mark_synced(self, row_id: int) -> None:
+        self._submit(self._transition, (mark_synced, row_id))
+
+    def mark_failed(self, row_id: int, error: str) -> None:
+        self._submit(self._transition, (mark_failed, row_id, error))
+
+    def mark_dead(self, row_id: int, error: str = "") -> None:
+        self._submit(self._transition, (mark_dead, row_id, error))
+
+    def delete_synced(self, row_ids: list[int]) -> None:
+        """Delete archived rows (all ``synced``) and commit."""
+        self.call(self._delete_synced, row_ids)
+
+    def get_pending(self, limit: int = 50, now: Optional[float] = None) -> list:
+        return self.fetch(get_pending, limit, now)
+
+    def fetch(self, query, *args, full: bool = True) -> list:
+        """Run a row query on the writer thread, decoding each payload.
+
+        ``query(conn, *args)`` returns rows whose third column is the
+        queue payload; it comes back as a measurement dict (see
+        RecordCodec.decode for ``full``). Rows that fail to decode are
+        marked dead and left out.
+        """
+        def run(conn: sqlite3.Connection) -> list:
+            decode = self.codec.decode
+            rows = []
+            for row in query(conn, *args):
+                try:
+                    measurement = decode(conn, row[2], full)
+                except Exception as e:  # corrupt row: never retried, never blocks
+                    log.error("Queue row %s cannot be decoded, marking dead: %s", row[0], e)
+                    self._transition(conn, mark_dead, row[0], f"undecodable: {e}")
+                    continue
+                rows.append((*row[:2], measurement, *row[3:]))
+            return rows
+        return self.call(run)
+
+    def call(self, fn, *args):
+        """Run ``fn(conn, *args)`` on the writer thread after a flush.
+
+        Anything ``fn`` writes is committed before ``call`` returns.
+        """
+        op = self._submit(fn, args, wait=True, read=True)
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is committed."""
+        self.call(lambda conn: None)
+
+    def _submit(self, fn, args: tuple, wait: bool = False, read: bool = False):
+        op = _QueueOp(fn, args, wait)
+        self._inbox.put((op, read))
+        if op.done is not None:
+            op.done.wait()
+        return op
+
+    # --- Writer thread -----------------------------------------------------
+
+    def _run(self) -> None:
+        synchronous = "FULL" if self.durability == DURABILITY_STRICT else "NORMAL"
+        try:
+            conn = init_db(self.db_path, synchronous=synchronous)
+            self._recount(conn)
+            if self.budget is not None:
+                self._spill = SpillLog(
+                    self.spill_dir, self.budget.segment_bytes, self.budget.spill_bytes,
+                )
+                self._check_budget(conn)
+        except BaseException as e:  # surfaced to start()
+            self._init_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        uncommitted: list[_QueueOp] = []
+        first_at = 0.0
+        while True:
+            timeout = None
+            if uncommitted:
+                timeout = max(0.0, first_at + self.flush_s - time.monotonic())
+            if self.budget is not None:
+                timeout = QUEUE_USAGE_CHECK_S if timeout is None else min(
+                    timeout, QUEUE_USAGE_CHECK_S,
+                )
+            try:
+                item = self._inbox.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._commit(conn, uncommitted)
+                break
+
+            if item is not None:
+                op, read = item
+                if read:
+                    # Reads must observe every write handed over before them.
+                    try:
+                        self._commit(conn, uncommitted)
+                        self._execute(conn, op)
+                        if conn.in_transaction:
+                            self._commit(conn, [op])
+                    finally:
+                        op.done.set()
+                    continue
+                self._execute(conn, op)
+                if not uncommitted:
+                    first_at = time.monotonic()
+                uncommitted.append(op)
+
+            if uncommitted and (
+                len(uncommitted) >= self.flush_rows
+                or time.monotonic() - first_at >= self.flush_s
+                or (self.durability == DURABILITY_STRICT and self._inbox.empty())
+            ):
+                self._commit(conn, uncommitted)
+            if (
+                self.budget is not None and not uncommitted
+                and time.monotonic() - self._checked_at >= QUEUE_USAGE_CHECK_S
+            ):
+                self._check_budget(conn)
+
+        if self._spill is not None:
+            self._spill.close()
+        conn.close()
+        log.info("Queue writer stopped (%d group commits)", self.commits)
+
+    @staticmethod
+    def _execute(conn: sqlite3.Connection, op: _QueueOp) -> None:
+        # Any failure stays with its op: the writer thread must survive it,
+        # or every later call() / strict enqueue would wait forever.
+        try:
+            op.result = op.fn(conn, *op.args)
+        except sqlite3.Error as e:
+            op.error = e
+            log.error("SQLite queue error: %s", e)
+        except Exception as e:
+            op.error = e
+            log.exception("Queue operation %s failed", getattr(op.fn, "__name__", op.fn))
+
+    def _store(self, conn: sqlite3.Connection, measurement: dict) -> None:
+        spill = self._spill
+        if self.state == QUEUE_SPILLING and spill is not None and not spill.full:
+            try:
+                spill.append(measurement)
+                self.spilled += 1
+                return
+            except OSError as e:
+                log.error("Spill append failed (%s), storing in the queue DB", e)
+        try:
+            self._inserted(queue_measurement(conn, measurement, self.codec))
+        except Exception:
+            self.lost += 1
+            raise
+
+    def _inserted(self, row_id: Optional[int]) -> None:
+        if row_id is None:
+            return
+        self.depth["pending"] += 1
+        if self._oldest is None:
+            self._oldest = (row_id, time.time())
+
+    def _transition(self, conn: sqlite3.Connection, fn, row_id: int, *args) -> None:
+        """Run a status update and move the row between depth counters."""
+        change = fn(conn, row_id, *args)
+        if change is None or change[0] == change[1]:
+            return
+        before, after = change
+        self.depth[before] = self.depth.get(before, 0) - 1
+        self.depth[after] = self.depth.get(after, 0) + 1
+        if (
+            after not in UNSENT_STATUSES and self._oldest is not None
+            and self._oldest[0] == row_id
+        ):
+            self._oldest_stale = True
+
+    def _delete_synced(self, conn: sqlite3.Connection, row_ids: list[int]) -> None:
+        self.depth["synced"] -= delete_rows(conn, row_ids)
+
+    def _recount(self, conn: sqlite3.Connection) -> None:
+        try:
+            self.depth = queue_depth(conn)
+            self._oldest = oldest_unsent(conn)
+            self._oldest_stale = False
+        except sqlite3.Error as e:
+            log.error("Queue depth count failed: %s", e)
+
+    def _check_budget(self, conn: sqlite3.Connection) -> str:
+        self._checked_at = time.monotonic()
+        budget, spill = self.budget, self._spill
+        if budget is None or spill is None:
+            return self.state
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            wal_path = self.db_path + "-wal"
+            wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+            self.used_bytes = (pages - free_pages) * page_size + wal_bytes
+            disk_free = shutil.disk_usage(os.path.dirname(os.path.abspath(self.db_path))).free
+        except (OSError, sqlite3.Error) as e:
+            log.error("Queue usage check failed: %s", e)
+            return self.state
+
+        # Spilling onto a nearly full disk would not help: go straight to full.
+        low_disk = disk_free < budget.min_free_bytes
+        limit = budget.db_bytes
+        over = low_disk or (limit and self.used_bytes >= limit)
+        if spill.bytes and not over and (not limit or self.used_bytes < limit * QUEUE_LOW_WATER):
+            self._replay(conn)
+
+        if low_disk or spill.full:
+            state = QUEUE_FULL
+        elif over or spill.bytes:
+            state = QUEUE_SPILLING
+        else:
+            state = QUEUE_OK
+        if state != self.state:
+            self.state = state
+            self.alarm.update(state, self.stats())
+        return state
+
+    def _replay(self, conn: sqlite3.Connection) -> None:
+        """Move the oldest spill segment back into the queue DB."""
+        try:
+            popped = self._spill.pop_oldest()
+            if popped is None:
+                return
+            path, rows = popped
+            inserted = [queue_measurement(conn, measurement, self.codec) for measurement in rows]
+            conn.commit()
+            self.commits += 1
+            self._spill.discard(path)
+        except (OSError, sqlite3.Error) as e:
+            log.error("Spill replay failed: %s", e)
+            if conn.in_transaction:
+                conn.rollback()
+            return
+        for row_id in inserted:
+            self._inserted(row_id)
+        self.replayed += len(rows)
+        self._new_rows.set()
+        log.info("Replayed %d spilled row(s) from %s", len(rows), os.path.basename(path))
+
+    def _commit(self, conn: sqlite3.Connection, ops: list[_QueueOp]) -> None:
+        if not ops:
+            return
+        if self._spill is not None:
+            try:
+                self._spill.sync()
+            except OSError as e:
+                log.error("Spill sync failed: %s", e)
+        try:
+            conn.commit()
+            self.commits += 1
+        except sqlite3.Error as e:
+            log.error("SQLite queue error: commit of %d op(s) failed: %s", len(ops), e)
+            conn.rollback()
+            self._recount(conn)
+            for op in ops:
+                op.error = e
+        if self._oldest_stale:
+            # The oldest unsent row left the queue: look up its successor
+            # once per commit rather than once per status change.
+            try:
+                self._oldest = oldest_unsent(conn)
+                self._oldest_stale = False
+            except sqlite3.Error as e:
+                log.error("Oldest unsent lookup failed: %s", e)
+        for op in ops:
+            if op.done is not None:
+                op.done.set()
+        ops.clear()
+
+
+# ---------------------------------------------------------------------------
+# Queue Retention — archive synced rows, keep the hot table small
+# ---------------------------------------------------------------------------
+
+ARCHIVE_MANIFEST = "MANIFEST.jsonl"
+
+
+def get_archivable(conn: sqlite3.Connection, retention_days: float, limit: int) -> list:
+    """Synced rows captured more than ``retention_days`` ago, oldest first."""
+    cursor = conn.execute(
+        """SELECT id, idempotency_key, payload, status, retry_count, last_error,
+                  created_at, updated_at
+           FROM pending_queue
+           WHERE status = 'synced' AND created_at < datetime('now', ?)
+           ORDER BY created_at, id
+           LIMIT ?""",
+        (f"-{retention_days} days", limit),
+    )
+    return cursor.fetchall()
+
+
+def delete_rows(conn: sqlite3.Connection, row_ids: list[int]) -> int:
+    cursor = conn.executemany("DELETE FROM pending_queue WHERE id=?", [(i,) for i in row_ids])
+    return cursor.rowcount
+
+
+def compact_queue(conn: sqlite3.Connection, pages: int = VACUUM_PAGES_PER_PASS) -> tuple:
+    """Return freed pages to the OS in bounded steps and truncate the WAL.
+
+    Returns ``(free pages left, WAL checkpoint result)``.
+    """
+    # executescript steps the pragma to completion; a plain execute()
+    # frees a single page.
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    checkpoint = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return freelist, checkpoint
+
+
+def _last_manifest_hash(manifest_path: str) -> str:
+    last = ""
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    last = json.loads(line)["entry_hash"]
+    return last
+
+
+def _manifest_entry_hash(entry: dict) -> str:
+    body = {k: v for k, v in entry.items() if k != "entry_hash"}
+    return hashlib.sha256(
+        json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def write_archive_segment(archive_dir: str, rows: list) -> dict:
+    """Write rows to a gzip JSON-lines segment and chain it into the manifest.
+
+    ``rows`` come from ``QueueWriter.fetch(get_archivable, ...)``, i.e.
+    with decoded payloads: segments hold plain JSON, readable without the
+    queue's context table.
+
+    The segment is written to a temporary file, fsync'd and renamed, then
+    recorded in MANIFEST.jsonl with its SHA-256 and the previous entry's
+    hash, so a missing, altered or reordered segment is detectable
+    (see verify_archive). Returns the manifest entry.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    first_id, last_id = rows[0][0], rows[-1][0]
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    name = f"segment-{stamp}-{first_id}-{last_id}.jsonl.gz"
+    path = os.path.join(archive_dir, name)
+
+    lines = []
+    for row_id, idem_key, payload, status, retries, error, created, updated in rows:
+        lines.append(json.dumps({
+            "id": row_id,
+            "idempotency_key": idem_key,
+            "payload": payload,
+            "status": status,
+            "retry_count": retries,
+            "last_error": error,
+            "created_at": created,
+            "updated_at": updated,
+        }, separators=(",", ":")))
+    data = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), compresslevel=9)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+    manifest_path = os.path.join(archive_dir, ARCHIVE_MANIFEST)
+    entry = {
+        "segment": name,
+        "rows": len(rows),
+        "first_id": first_id,
+        "last_id": last_id,
+        "first_created_at": rows[0][6],
+        "last_created_at": rows[-1][6],
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+        "prev_hash": _last_manifest_hash(manifest_path),
+    }
+    entry["entry_hash"] = _manifest_entry_hash(entry)
+    with open(manifest_path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry, sort_keys=True) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    return entry
+
+
+def verify_archive(archive_dir: str) -> list[str]:
+    """Check every segment against the manifest chain; returns problems found."""
+    manifest_path = os.path.join(archive_dir, ARCHIVE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return []
+    problems = []
+    prev_hash = ""
+    with open(manifest_path, encoding="utf-8") as fh:
+        entries = [json.loads(line) for line in fh if line.strip()]
+    for entry in entries:
+        name = entry["segment"]
+        if entry.get("prev_hash") != prev_hash:
+            problems.append(f"{name}: manifest chain broken")
+        if _manifest_entry_hash(entry) != entry.get("entry_hash"):
+            problems.append(f"{name}: manifest entry altered")
+        prev_hash = entry.get("entry_hash", "")
+        try:
+            with open(os.path.join(archive_dir, name), "rb") as seg:
+                data = seg.read()
+        except OSError:
+            problems.append(f"{name}: segment missing")
+            continue
+        if hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            problems.append(f"{name}: segment hash mismatch")
+    return problems
+
+
+def archive_synced(
+    writer: QueueWriter,
+    archive_dir: str,
+    retention_days: float = RETENTION_DAYS,
+    segment_rows: int = ARCHIVE_SEGMENT_ROWS,
+) -> int:
+    """Move synced rows past retention into archive segments; returns rows moved.
+
+    Only the SELECT and DELETE run on the writer thread; compressing and
+    writing a segment happens on the caller's thread, so capture keeps
+    flowing while an archive is built. Rows are deleted only after their
+    segment and manifest entry are on disk. A crash in between archives
+    those rows again in a later segment; readers dedupe on
+    idempotency_key.
+    """
+    moved = 0
+    while not _shutdown.is_set():
+        rows = writer.fetch(get_archivable, retention_days, segment_rows)
+        if not rows:
+            break
+        entry = write_archive_segment(archive_dir, rows)
+        writer.delete_synced([row[0] for row in rows])
+        moved += len(rows)
+        log.info("Archived %d synced row(s) to %s", len(rows), entry["segment"])
+        if len(rows) < segment_rows:
+            break
+    return moved
+
+
+def maintenance_loop(
+    writer: QueueWriter,
+    archive_dir: str,
+    retention_days: float = RETENTION_DAYS,
+) -> None:
+    """Background thread: archive past-retention rows, vacuum, checkpoint.
+
+    While the queue is over its disk budget, passes run every
+    MAINTENANCE_PRESSURE_INTERVAL_S and archive every synced row
+    regardless of retention, to make room for the spilled ones.
+    """
+    log.info(
+        "Maintenance thread started (retention: %g day(s), archive: %s)",
+        retention_days, archive_dir,
+    )
+    while not _shutdown.is_set():
+        pressure = writer.state != QUEUE_OK
+        try:
+            moved = archive_synced(writer, archive_dir, 0 if pressure else retention_days)
+            freelist, checkpoint = writer.call(compact_queue)
+            if moved:
+                log.info(
+                    "Queue maintenance: %d row(s) archived, %d free page(s) left, "
+                    "WAL checkpoint %s", moved, freelist, checkpoint,
+                )
+        except (OSError, sqlite3.Error) as e:
+            log.error("Queue maintenance failed: %s", e)
+        _shutdown.wait(
+            timeout=MAINTENANCE_PRESSURE_INTERVAL_S if pressure else MAINTENANCE_INTERVAL_S,
+        )
+    log.info("Maintenance thread stopped")
+
+
+# ---------------------------------------------------------------------------
+# Cloud Sync — Push queued measurements to API
+# ---------------------------------------------------------------------------
+
+# Fields the server-side /api/persistence/capture/ endpoint accepts today.
+# Anything outside this allow-list is stripped at send time to keep the
+# existing endpoint contract stable. Context + protocol_meta are still
+# preserved locally for audit and future server-side ingestion.
+_CAPTURE_ALLOWED_KEYS = {
+    "idempotency_key",
+    "sample_id",
+    "instrument_id",
+    "parameter",
+    "value",
+    "unit",
+    "data_hash",
+    "source_timestamp",
+    "hub_received_at",
+}
+
+
+def build_capture_payload(measurement: dict) -> dict:
+    """Build the POST body the cloud endpoint currently accepts.
+
+    Kept narrow to maintain backward compatibility with the existing
+    /api/persistence/capture/ contract. Metadata travels via a separate
+    call in a later sprint.
+    """
+    return {k: v for k, v in measurement.items() if k in _CAPTURE_ALLOWED_KEYS}
+
+
+def make_session() -> requests.Session:
+    """Keep-alive HTTP session for cloud pushes.
+
+    Reusing one connection saves a TCP (and, in production, TLS)
+    handshake per request. Sessions are not shared between threads:
+    each pushing thread creates its own.
+    """
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "X-Device-ID": DEVICE_ID,
+    })
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def encode_body(payload) -> tuple[bytes, dict]:
+    """Serialize a JSON body, gzip-compressed when it is worth it."""
+    body = json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+    if len(body) < GZIP_MIN_BYTES:
+        return body, {}
+    return gzip.compress(body, compresslevel=6), {"Content-Encoding": "gzip"}
+
+
+def push_to_cloud(
+    api_url: str,
+    measurement: dict,
+    session: Optional[requests.Session] = None,
+) -> bool:
     """POST a single measurement to /api/persistence/capture/."""
     url = f"{api_url.rstrip('/')}{CAPTURE_ENDPOINT}"
     payload = build_capture_payload(measurement)
 
     try:
-        resp = requests.post(
+        resp = (session or requests).post(
             url,
             json=payload,
             headers={
                 "Content-Type": "application/json",
                 "X-Device-ID": DEVICE_ID,
             },
-            timeout=10,
+            timeout=HTTP_TIMEOUT_S,
         )
         if resp.status_code in (200, 201):
             log.info(
@@ -912,9 +2795,13 @@ def push_to_cloud(api_url: str, measurement: dict) -> bool:
                 measurement["unit"],
             )
             return True
+        elif resp.status_code == 429:
+            raise CloudBusy.from_response(resp)
         else:
             log.warning("  -> Cloud %d: %s", resp.status_code, resp.text[:200])
             return False
+    except CloudBusy:
+        raise
     except requests.exceptions.ConnectionError:
         log.warning("  -> Cloud OFFLINE — buffered locally")
         return False
@@ -926,143 +2813,966 @@ def push_to_cloud(api_url: str, measurement: dict) -> bool:
         return False
 
 
-def backoff_delay(retry_count: int) -> float:
-    """Exponential backoff with jitter."""
-    import random
-    delay = min(BACKOFF_BASE_S * (2 ** retry_count), BACKOFF_MAX_S)
-    jitter = random.uniform(-BACKOFF_JITTER_S, BACKOFF_JITTER_S)
-    return max(0.1, delay + jitter)
+class BatchEndpointUnavailable(Exception):
+    """The cloud does not expose CAPTURE_BATCH_ENDPOINT (older server)."""
 
 
-def sync_loop(conn: sqlite3.Connection, api_url: str) -> None:
-    """Background thread: push pending measurements to cloud."""
-    log.info("Sync thread started (interval: %.1fs)", SYNC_INTERVAL_S)
+class CloudBusy(Exception):
+    """The cloud answered 429: wait ``retry_after_s``, send at most ``rate`` rows/s."""
 
-    while not _shutdown.is_set():
-        pending = get_pending(conn, limit=50)
+    def __init__(self, retry_after_s: float, rate: Optional[float] = None):
+        super().__init__(f"cloud busy, retry after {retry_after_s:.0f}s")
+        self.retry_after_s = retry_after_s
+        self.rate = rate
+
+    @classmethod
+    def from_response(cls, resp) -> "CloudBusy":
+        retry_after = CLOUD_BUSY_DEFAULT_S
+        value = resp.headers.get("Retry-After")
+        if value:
+            try:
+                retry_after = max(0.0, float(value))
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(value)
+                    retry_after = max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    pass
+        try:
+            rate = float(resp.headers.get(RATE_HEADER))
+        except (TypeError, ValueError):
+            rate = None
+        return cls(retry_after, rate if rate and rate > 0 else None)
+
+
+class CloudPacer:
+    """Sender-side state of the cloud's backpressure (429 responses).
+
+    ``busy()`` records a 429: the sender pauses until ``wait_s()`` is 0,
+    and while the server's rate hint is fresh, ``pace_s(rows)`` is the
+    time a push of ``rows`` readings must take to stay under it.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.resume_at = 0.0
+        self.rate: Optional[float] = None
+        self.rate_until = 0.0
+
+    def busy(self, exc: CloudBusy) -> float:
+        """Pause after a 429; returns the (jittered) pause in seconds."""
+        pause = exc.retry_after_s * (1.0 + random.uniform(0.0, CLOUD_BUSY_JITTER))
+        now = self.clock()
+        self.resume_at = max(self.resume_at, now + pause)
+        if exc.rate:
+            self.rate = exc.rate
+            self.rate_until = now + RATE_HINT_TTL_S
+        return pause
+
+    def wait_s(self) -> float:
+        return max(0.0, self.resume_at - self.clock())
+
+    def pace_s(self, rows: int) -> float:
+        if self.rate is None or self.clock() >= self.rate_until:
+            self.rate = None
+            return 0.0
+        return rows / self.rate
+
+
+def push_batch_to_cloud(
+    api_url: str,
+    measurements: list[dict],
+    session: requests.Session,
+) -> Optional[dict[str, dict]]:
+    """POST measurements to /api/persistence/capture/batch/ in one request.
+
+    The request carries the batch's Merkle root (MERKLE_ROOT_HEADER); a
+    server that echoes a different root received something else, and the
+    batch is treated as failed.
+
+    Returns the per-item results keyed by idempotency_key, or None when
+    the batch failed as a whole (offline, timeout, HTTP error). Raises
+    BatchEndpointUnavailable on 404/405 so the caller can fall back to
+    per-reading pushes, and CloudBusy on 429 so the caller backs off
+    without counting the readings as failed.
+    """
+    url = f"{api_url.rstrip('/')}{CAPTURE_BATCH_ENDPOINT}"
+    items = [build_capture_payload(m) for m in measurements]
+    body, headers = encode_body(items)
+    root = merkle_root(items)
+    headers[MERKLE_ROOT_HEADER] = root
+
+    try:
+        resp = session.post(url, data=body, headers=headers, timeout=HTTP_TIMEOUT_S)
+    except requests.exceptions.ConnectionError:
+        log.warning("  -> Cloud OFFLINE — %d reading(s) stay buffered", len(measurements))
+        return None
+    except requests.exceptions.Timeout:
+        log.warning("  -> Cloud TIMEOUT — batch of %d will retry", len(measurements))
+        return None
+    except Exception as e:
+        log.error("  -> Cloud ERROR: %s", e)
+        return None
+
+    if resp.status_code in (404, 405):
+        raise BatchEndpointUnavailable(f"HTTP {resp.status_code}")
+    if resp.status_code == 429:
+        raise CloudBusy.from_response(resp)
+    if resp.status_code != 200:
+        log.warning("  -> Cloud %d: %s", resp.status_code, resp.text[:200])
+        return None
+    echoed = resp.headers.get(MERKLE_ROOT_HEADER)
+    if echoed is not None and echoed.lower() != root:
+        log.error(
+            "  -> Cloud Merkle root %s != local %s — batch of %d will retry",
+            echoed[:16], root[:16], len(measurements),
+        )
+        return None
+    try:
+        return {str(r.get("idempotency_key")): r for r in resp.json()}
+    except (ValueError, AttributeError) as e:
+        log.error("  -> Cloud returned an unreadable batch response: %s", e)
+        return None
+
+
+class LatencyTracker:
+    """Capture-to-ACK latency of readings acknowledged by the cloud.
+
+    Latency is measured from ``hub_received_at`` (stamped when the line
+    was parsed) to the moment the cloud's acknowledgement is processed,
+    so it covers queueing, group commit, batching and the round-trip.
+    Percentiles are computed over the last ``window`` acknowledgements.
+    """
+
+    def __init__(self, window: int = 2048):
+        self.count = 0
+        self.max_s = 0.0
+        self._recent: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        seconds = max(0.0, seconds)
+        with self._lock:
+            self.count += 1
+            self.max_s = max(self.max_s, seconds)
+            self._recent.append(seconds)
+
+    def record_since(self, hub_received_at: Optional[str]) -> None:
+        """Record the latency of a reading from its ``hub_received_at``."""
+        if not hub_received_at:
+            return
+        try:
+            received = datetime.fromisoformat(hub_received_at)
+        except (TypeError, ValueError):
+            return
+        self.record((datetime.now(timezone.utc) - received).total_seconds())
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            recent = sorted(self._recent)
+        if not recent:
+            return None
+        index = min(len(recent) - 1, int(round(pct / 100.0 * (len(recent) - 1))))
+        return recent[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_s": self.percentile(50),
+            "p95_s": self.percentile(95),
+            "p99_s": self.percentile(99),
+            "max_s": self.max_s if self.count else None,
+        }
+
+
+def _sync_batch(
+    writer: QueueWriter,
+    api_url: str,
+    session: requests.Session,
+    batch: list[tuple[int, dict]],
+    latency: Optional[LatencyTracker] = None,
+) -> bool:
+    """Push one batch and record per-row outcomes. True if the cloud answered.
+
+    On CloudBusy (429) the rows are left as they were and the exception
+    propagates to the sender loop.
+    """
+    started = time.monotonic()
+    try:
+        results = push_batch_to_cloud(api_url, [m for _, m in batch], session)
+    except CloudBusy:
+        METRICS.throttled()
+        raise
+    METRICS.pushed(
+        time.monotonic() - started, results is not None, len(batch), "cloud_unreachable",
+    )
+    if results is None:
+        for row_id, _ in batch:
+            writer.mark_failed(row_id, "cloud_unreachable")
+        return False
+
+    synced = 0
+    for row_id, measurement in batch:
+        result = results.get(measurement["idempotency_key"])
+        if result is None:
+            writer.mark_failed(row_id, "missing_in_batch_response")
+        elif result.get("status") in ("created", "existing"):
+            writer.mark_synced(row_id)
+            if latency is not None:
+                latency.record_since(measurement.get("hub_received_at"))
+            synced += 1
+        else:
+            # Rejected by server-side validation: retrying cannot help.
+            writer.mark_dead(
+                row_id, f"rejected: {json.dumps(result.get('errors'), default=str)[:500]}",
+            )
+    log.info("  -> Cloud OK: %d/%d reading(s) acknowledged", synced, len(batch))
+    return True
 
-        if pending:
-            log.info("Syncing %d pending measurement(s)...", len(pending))
 
-        for row_id, idem_key, payload_json, retry_count in pending:
+def _log_latency(latency: LatencyTracker) -> None:
+    stats = latency.summary()
+    if not stats["count"]:
+        return
+    log.info(
+        "Capture-to-ACK latency: p50=%.3fs p95=%.3fs p99=%.3fs max=%.3fs (%d acked)",
+        stats["p50_s"], stats["p95_s"], stats["p99_s"], stats["max_s"], stats["count"],
+    )
+
+
+def sync_loop(
+    writer: QueueWriter,
+    api_url: str,
+    latency: Optional[LatencyTracker] = None,
+) -> None:
+    """Sender stage: push queued measurements to the cloud in batches.
+
+    The listeners only parse and enqueue; all network I/O happens here,
+    so a slow or unreachable cloud never stalls the serial / TCP reader.
+
+    Each pass serves two lanes, pushed as separate requests:
+      - fast lane  : readings never attempted (``status='pending'``);
+      - retry lane : failed readings whose ``next_attempt_at`` backoff
+        has elapsed, at most SYNC_RETRY_BATCH_SIZE per pass.
+    Fresh readings therefore never wait behind rows that keep failing,
+    and a retry batch that fails cannot drag fresh rows down with it.
+
+    The loop wakes as soon as the writer reports a new row, or when the
+    next scheduled retry falls due, and keeps draining without waiting
+    while full batches succeed. After a failed push it pauses
+    SYNC_INTERVAL_S rather than hammering an offline cloud on every new
+    reading. Falls back to per-reading pushes when the server predates
+    the batch endpoint.
+
+    A 429 from the cloud (admission control) is not a failure: the rows
+    keep their state, the loop pauses for the server's Retry-After (with
+    jitter) and, while the server's X-BioNexus-Rate hint is fresh, paces
+    pushes to stay under it (see CloudPacer).
+    """
+    log.info(
+        "Sync thread started (idle re-check: %.1fs, batch: %d, retry batch: %d)",
+        SYNC_INTERVAL_S, SYNC_BATCH_SIZE, SYNC_RETRY_BATCH_SIZE,
+    )
+    session = make_session()
+    batch_supported = True
+    latency = latency if latency is not None else LatencyTracker()
+    next_latency_log = time.monotonic() + LATENCY_LOG_INTERVAL_S
+    pacer = CloudPacer()
+
+    def push(rows: list) -> bool:
+        nonlocal batch_supported
+        batch = [(row_id, measurement) for row_id, _, measurement, _ in rows]
+        if batch_supported:
+            try:
+                return _sync_batch(writer, api_url, session, batch, latency)
+            except BatchEndpointUnavailable as e:
+                log.warning("Batch capture endpoint unavailable (%s), pushing one by one", e)
+                batch_supported = False
+        cloud_ok = False
+        for row_id, measurement in batch:
             if _shutdown.is_set():
                 break
+            started = time.monotonic()
+            ok = push_to_cloud(api_url, measurement, session)
+            METRICS.pushed(time.monotonic() - started, ok, 1, "cloud_unreachable")
+            if ok:
+                writer.mark_synced(row_id)
+                latency.record_since(measurement.get("hub_received_at"))
+                cloud_ok = True
+            else:
+                writer.mark_failed(row_id, "cloud_unreachable")
+        return cloud_ok
 
-            if retry_count > 0:
-                delay = backoff_delay(retry_count)
-                if retry_count > MAX_RETRIES:
-                    log.error(
-                        "Max retries (%d) exceeded for %s — dead-lettered",
-                        MAX_RETRIES, idem_key[:8],
-                    )
-                    conn.execute(
-                        "UPDATE pending_queue SET status='dead' WHERE id=?",
-                        (row_id,),
-                    )
-                    conn.commit()
-                    continue
+    while not _shutdown.is_set():
+        pause = pacer.wait_s()
+        if pause > 0:
+            _shutdown.wait(timeout=pause)
+            continue
 
-            measurement = json.loads(payload_json)
-            if push_to_cloud(api_url, measurement):
-                mark_synced(conn, row_id)
-            else:
-                mark_failed(conn, row_id, "cloud_unreachable")
+        # Only the fields the cloud accepts are decoded; JSON is produced
+        # once, for the request body.
+        fresh = writer.fetch(get_fresh, SYNC_BATCH_SIZE, full=False)
+        retries = writer.fetch(get_due_retries, SYNC_RETRY_BATCH_SIZE, full=False)
 
-        _shutdown.wait(timeout=SYNC_INTERVAL_S)
+        if fresh or retries:
+            log.info(
+                "Syncing %d new + %d retried measurement(s)...", len(fresh), len(retries),
+            )
 
+        failed = False
+        fresh_ok = False
+        try:
+            if fresh and not _shutdown.is_set():
+                fresh_ok = push(fresh)
+                failed = not fresh_ok
+            if retries and not failed and not _shutdown.is_set():
+                failed = not push(retries)
+        except CloudBusy as busy:
+            log.warning(
+                "  -> Cloud BUSY (429): pausing %.1fs, rate hint %s rows/s",
+                pacer.busy(busy), busy.rate,
+            )
+            continue
+
+        pace = pacer.pace_s(len(fresh) + len(retries))
+        if pace > 0 and not failed:
+            # Stay under the cloud's rate hint.
+            _shutdown.wait(timeout=pace)
+
+        if time.monotonic() >= next_latency_log:
+            _log_latency(latency)
+            next_latency_log = time.monotonic() + LATENCY_LOG_INTERVAL_S
+
+        if failed:
+            # Cloud unreachable: new readings must not trigger a retry storm.
+            _shutdown.wait(timeout=SYNC_INTERVAL_S)
+        elif not (fresh_ok and len(fresh) == SYNC_BATCH_SIZE):
+            # Drained: sleep until a reading is queued or a retry falls due.
+            timeout = SYNC_INTERVAL_S
+            due_at = writer.call(next_retry_at)
+            if due_at is not None:
+                timeout = min(timeout, max(0.0, due_at - time.time()))
+            writer.wait_for_rows(timeout=timeout)
+
+    _log_latency(latency)
+    session.close()
     log.info("Sync thread stopped")
 
 
+# ---------------------------------------------------------------------------
+# Status Endpoint — live box metrics over local HTTP
+# ---------------------------------------------------------------------------
+
+class RateWindow:
+    """Events per second over the last ``window_s`` seconds.
+
+    Counts go into one-second buckets, so recording is O(1) and reading
+    sums at most ``window_s`` buckets; nothing is kept per event.
+    """
+
+    __slots__ = ("window_s", "total", "_buckets")
+
+    def __init__(self, window_s: int = METRICS_RATE_WINDOW_S):
+        self.window_s = window_s
+        self.total = 0
+        self._buckets: "deque[list]" = deque()
+
+    def record(self, now: float, count: int = 1) -> None:
+        second = int(now)
+        self.total += count
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += count
+        else:
+            self._buckets.append([second, count])
+        self._expire(second)
+
+    def rate(self, now: float) -> float:
+        self._expire(int(now))
+        return sum(count for _, count in self._buckets) / self.window_s
+
+    def _expire(self, second: int) -> None:
+        while self._buckets and self._buckets[0][0] <= second - self.window_s:
+            self._buckets.popleft()
+
+
+class BoxMetrics:
+    """In-memory counters behind the status endpoint.
+
+    Updated on the hot paths as things happen — parse_line (per-parser
+    and unmatched lines) and the sender (push round-trips) — so a status
+    request only formats what is already counted. Queue depth and the
+    oldest unsent reading come from QueueWriter.stats(), maintained the
+    same way on the writer thread.
+    """
+
+    def __init__(
+        self,
+        window_s: int = METRICS_RATE_WINDOW_S,
+        buckets: tuple = PUSH_LATENCY_BUCKETS_S,
+        clock=time.time,
+    ):
+        self.clock = clock
+        self.window_s = window_s
+        self.started_at = clock()
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._parsed: dict[str, RateWindow] = {}
+        self._unmatched = RateWindow(window_s)
+        self._push_counts = [0] * (len(self.buckets) + 1)
+        self._push_sum_s = 0.0
+        self._push = Counter()
+        self._consecutive_failures = 0
+        self._last_push_ok: Optional[float] = None
+        self._last_push_error = ""
+
+    def parsed(self, parser_name: str) -> None:
+        with self._lock:
+            window = self._parsed.get(parser_name)
+            if window is None:
+                window = self._parsed[parser_name] = RateWindow(self.window_s)
+            window.record(self.clock())
+
+    def unmatched(self) -> None:
+        with self._lock:
+            self._unmatched.record(self.clock())
+
+    def pushed(self, seconds: float, ok: bool, rows: int = 1, error: str = "") -> None:
+        """Record one push request: its round-trip and whether the cloud answered."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._push_counts[index] += 1
+            self._push_sum_s += seconds
+            if ok:
+                self._push["ok"] += 1
+                self._push["rows"] += rows
+                self._consecutive_failures = 0
+                self._last_push_ok = self.clock()
+            else:
+                self._push["failed"] += 1
+                self._consecutive_failures += 1
+                self._last_push_error = error
+
+    def throttled(self) -> None:
+        """Record a push turned away by the cloud (429): busy, not down."""
+        with self._lock:
+            self._push["throttled"] += 1
+
+    def snapshot(self) -> dict:
+        now = self.clock()
+        with self._lock:
+            parsers = {
+                name: {"total": w.total, "rate_per_s": round(w.rate(now), 3)}
+                for name, w in sorted(self._parsed.items())
+            }
+            unmatched = {
+                "total": self._unmatched.total,
+                "rate_per_s": round(self._unmatched.rate(now), 3),
+            }
+            cumulative, histogram = 0, {}
+            for bound, count in zip((*self.buckets, "+Inf"), self._push_counts):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            push = {
+                "ok": self._push["ok"],
+                "failed": self._push["failed"],
+                "throttled": self._push["throttled"],
+                "rows_acknowledged": self._push["rows"],
+                "consecutive_failures": self._consecutive_failures,
+                "last_ok_age_s": (
+                    round(now - self._last_push_ok, 3) if self._last_push_ok else None
+                ),
+                "last_error": self._last_push_error,
+                "latency_s": {
+                    "buckets": histogram,
+                    "count": cumulative,
+                    "sum": round(self._push_sum_s, 6),
+                },
+            }
+        parsed_total = sum(p["total"] for p in parsers.values())
+        lines = parsed_total + unmatched["total"]
+        unmatched["ratio"] = round(unmatched["total"] / lines, 4) if lines else None
+        return {
+            "uptime_s": round(now - self.started_at, 3),
+            "window_s": self.window_s,
+            "parsers": parsers,
+            "unmatched": unmatched,
+            "push": push,
+        }
+
+
+# Process-wide metrics, updated by parse_line and the sender.
+METRICS = BoxMetrics()
+
+
+def box_status(
+    writer: QueueWriter,
+    metrics: BoxMetrics = METRICS,
+    latency: Optional[LatencyTracker] = None,
+) -> dict:
+    """Everything the status endpoint reports, plus a one-word verdict.
+
+    ``health`` separates the two failure modes seen on site:
+      - ``outage``    : the last push(es) failed — the cloud is unreachable
+        and readings are being buffered;
+      - ``saturated`` : the cloud answers but the box cannot keep up — the
+        queue is over budget (spilling / backpressure) or the oldest
+        unsent reading is older than STATUS_BACKLOG_AGE_S.
+    """
+    queue_stats = writer.stats()
+    queue_stats["backpressure"] = writer.backpressure
+    snapshot = metrics.snapshot()
+    oldest = queue_stats["oldest_pending_age_s"]
+    if snapshot["push"]["consecutive_failures"]:
+        health = "outage"
+    elif queue_stats["state"] != QUEUE_OK or (oldest or 0) > STATUS_BACKLOG_AGE_S:
+        health = "saturated"
+    else:
+        health = "ok"
+    return {
+        "device_id": DEVICE_ID,
+        "health": health,
+        "queue": queue_stats,
+        "dead_letter": queue_stats["depth"].get("dead", 0),
+        **snapshot,
+        "ack_latency": latency.summary() if latency is not None else None,
+    }
+
+
+def format_prometheus(status: dict) -> str:
+    """Render ``box_status()`` in the Prometheus text exposition format."""
+    out = [
+        f'bionexus_box_up{{health="{status["health"]}"}} 1',
+        f'bionexus_box_uptime_seconds {status["uptime_s"]}',
+    ]
+    queue_stats = status["queue"]
+    for name, count in queue_stats["depth"].items():
+        out.append(f'bionexus_box_queue_depth{{status="{name}"}} {count}')
+    out.append(
+        f"bionexus_box_oldest_pending_age_seconds {queue_stats['oldest_pending_age_s'] or 0}"
+    )
+    out.append(f"bionexus_box_backpressure {int(queue_stats['backpressure'])}")
+    out.append(f"bionexus_box_dead_letter_rows {status['dead_letter']}")
+    for name, parser in status["parsers"].items():
+        out.append(f'bionexus_box_parsed_lines_total{{parser="{name}"}} {parser["total"]}')
+        out.append(
+            f'bionexus_box_parse_rate_per_second{{parser="{name}"}} {parser["rate_per_s"]}'
+        )
+    out.append(f"bionexus_box_unmatched_lines_total {status['unmatched']['total']}")
+    out.append(f"bionexus_box_unmatched_rate_per_second {status['unmatched']['rate_per_s']}")
+    push = status["push"]
+    for outcome in ("ok", "failed", "throttled"):
+        out.append(f'bionexus_box_pushes_total{{outcome="{outcome}"}} {push[outcome]}')
+    histogram = push["latency_s"]
+    for bound, count in histogram["buckets"].items():
+        out.append(f'bionexus_box_push_latency_seconds_bucket{{le="{bound}"}} {count}')
+    out.append(f"bionexus_box_push_latency_seconds_sum {histogram['sum']}")
+    out.append(f"bionexus_box_push_latency_seconds_count {histogram['count']}")
+    return "\n".join(out) + "\n"
+
+
+class StatusServer:
+    """Local HTTP endpoint: ``GET /status`` (JSON) and ``GET /metrics``.
+
+    Runs on its own daemon thread and only reads counters that are
+    already maintained, so polling it never touches the queue DB nor
+    slows capture. Bound to loopback by default: the site technician (or
+    a local agent) reads it on the box itself.
+    """
+
+    def __init__(
+        self,
+        writer: QueueWriter,
+        metrics: BoxMetrics = METRICS,
+        latency: Optional[LatencyTracker] = None,
+        host: str = STATUS_HOST,
+        port: int = STATUS_PORT,
+    ):
+        status = self.status = lambda: box_status(writer, metrics, latency)
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0].rstrip("/") or "/status"
+                if path == "/status":
+                    body = json.dumps(status(), default=str).encode("utf-8")
+                    content_type = "application/json"
+                elif path == "/metrics":
+                    body = format_prometheus(status()).encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args) -> None:
+                log.debug("status endpoint: " + fmt, *args)
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "StatusServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="status", daemon=True,
+        )
+        self._thread.start()
+        log.info("Status endpoint on http://%s:%d/status", *self._server.server_address[:2])
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
 # ---------------------------------------------------------------------------
 # Input Listeners — TCP Socket or Serial Port
 # ---------------------------------------------------------------------------
 
-def listen_tcp(
-    port: int,
+class ContextResolver:
+    """Map an instrument connection to its CaptureContext and FilterPolicy.
+
+    Several Ethernet instruments can sit behind one box, each with its
+    own instrument / method context and its own debounce needs. Lookup
+    order: peer address, then the local port the instrument connected
+    to, then the defaults from the command line.
+
+    A context map file is JSON whose entries override default fields; an
+    optional ``filter`` object overrides the default FilterPolicy::
+
+        {
+          "ports": {"9601": {"instrument_id": 3, "method": "USP <711>",
+                             "filter": {"stable_only": true, "tolerance": 0.0005}}},
+          "peers": {"192.168.10.41": {"instrument_id": 7}}
+        }
+    """
+
+    def __init__(
+        self,
+        default: CaptureContext,
+        by_port: Optional[dict[int, CaptureContext]] = None,
+        by_peer: Optional[dict[str, CaptureContext]] = None,
+        default_policy: Optional[FilterPolicy] = None,
+        policy_by_port: Optional[dict[int, FilterPolicy]] = None,
+        policy_by_peer: Optional[dict[str, FilterPolicy]] = None,
+    ):
+        self.default = default
+        self.by_port = by_port or {}
+        self.by_peer = by_peer or {}
+        self.default_policy = default_policy or FilterPolicy()
+        self.policy_by_port = policy_by_port or {}
+        self.policy_by_peer = policy_by_peer or {}
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        default: CaptureContext,
+        default_policy: Optional[FilterPolicy] = None,
+    ) -> "ContextResolver":
+        with open(path, encoding="utf-8") as fh:
+            spec = json.load(fh)
+        contexts: dict[str, dict] = {"ports": {}, "peers": {}}
+        policies: dict[str, dict] = {"ports": {}, "peers": {}}
+        for section in ("ports", "peers"):
+            for target, overrides in spec.get(section, {}).items():
+                if section == "ports":
+                    target = int(target)
+                overrides = dict(overrides)
+                policy = overrides.pop("filter", None)
+                contexts[section][target] = replace(default, **overrides)
+                if policy is not None:
+                    policies[section][target] = FilterPolicy(**policy)
+        return cls(
+            default,
+            by_port=contexts["ports"],
+            by_peer=contexts["peers"],
+            default_policy=default_policy,
+            policy_by_port=policies["ports"],
+            policy_by_peer=policies["peers"],
+        )
+
+    def resolve(self, local_port: int, peer_host: str) -> CaptureContext:
+        return self.by_peer.get(peer_host) or self.by_port.get(local_port) or self.default
+
+    def policy(self, local_port: int, peer_host: str) -> FilterPolicy:
+        return (
+            self.policy_by_peer.get(peer_host)
+            or self.policy_by_port.get(local_port)
+            or self.default_policy
+        )
+
+
+def capture_line(
+    line: str,
     context: CaptureContext,
-    conn: sqlite3.Connection,
+    dispatcher: ParserDispatcher,
+    writer: QueueWriter,
+    meta: Optional[dict] = None,
+    reading_filter: Optional[ReadingFilter] = None,
+    source_timestamp: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[dict]:
+    """Capture stage: parse one instrument line (or report block) and queue it.
+
+    ``meta`` is the report header metadata from the StreamFramer; the
+    parser's own ``protocol_meta`` fields win on a name clash. Readings
+    dropped by ``reading_filter`` are never hashed nor queued. No
+    network I/O happens here — the sender stage (sync_loop) is woken by
+    the enqueue and pushes the reading, so the reader goes straight back
+    to draining the instrument.
+    """
+    measurement = parse_line(
+        line, context, dispatcher, reading_filter, source_timestamp, idempotency_key,
+    )
+    if measurement:
+        if meta:
+            measurement["protocol_meta"] = {**meta, **measurement["protocol_meta"]}
+        writer.enqueue(measurement)
+    return measurement
+
+
+class _InstrumentConnection:
+    """Per-socket state: framer, context, parser affinity and debounce."""
+
+    __slots__ = ("sock", "peer", "context", "dispatcher", "framer", "filter", "frames")
+
+    def __init__(
+        self,
+        sock: socket.socket,
+        peer: tuple,
+        context: CaptureContext,
+        profile: FrameProfile,
+        policy: FilterPolicy,
+    ):
+        self.sock = sock
+        self.peer = peer
+        self.context = context
+        self.dispatcher = ParserDispatcher()
+        self.framer = StreamFramer(profile)
+        self.filter = ReadingFilter(policy)
+        self.frames = 0
+
+
+class TcpListener:
+    """Event-driven TCP listener serving many instrument sockets at once.
+
+    One ``selectors`` loop multiplexes the listening sockets and every
+    connected instrument. Sockets are non-blocking, so a slow or stalled
+    sender only ever costs the loop a readiness check; it cannot hold
+    up lines arriving on the other connections. Each connection gets its
+    own StreamFramer, its own CaptureContext and ReadingFilter (via
+    ContextResolver) and its own ParserDispatcher.
+
+    ``on_frame(frame, context, dispatcher, reading_filter)`` is called for
+    every complete frame (line or report block).
+
+    While ``paused()`` returns True (queue backpressure) the loop stops
+    reading and accepting: the kernel buffers fill, the TCP window
+    closes and the instruments themselves hold their data.
+    """
+
+    def __init__(
+        self,
+        ports: list[int],
+        resolver: ContextResolver,
+        on_frame,
+        host: str = "0.0.0.0",
+        profile: Optional[FrameProfile] = None,
+        paused=None,
+    ):
+        self.ports = list(ports)
+        self.resolver = resolver
+        self.on_frame = on_frame
+        self.host = host
+        self.paused = paused
+        self.profile = profile or FRAME_PROFILES["line"]
+        self.bound_ports: list[int] = []
+        self._selector = selectors.DefaultSelector()
+        self._servers: list[socket.socket] = []
+        self._connections: dict[socket.socket, _InstrumentConnection] = {}
+
+    def bind(self) -> list[int]:
+        """Open the listening sockets; returns the actual bound ports."""
+        for port in self.ports:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((self.host, port))
+            server.listen(socket.SOMAXCONN)
+            server.setblocking(False)
+            self._selector.register(server, selectors.EVENT_READ, None)
+            self._servers.append(server)
+            self.bound_ports.append(server.getsockname()[1])
+        return self.bound_ports
+
+    def serve(self, stop: threading.Event) -> None:
+        """Run the event loop until ``stop`` is set."""
+        was_paused = False
+        try:
+            while not stop.is_set():
+                paused = self.paused is not None and self.paused()
+                if paused != was_paused:
+                    was_paused = paused
+                    log.warning(
+                        "TCP listener %s (queue backpressure)",
+                        "paused" if paused else "resumed",
+                    )
+                if paused:
+                    stop.wait(BACKPRESSURE_POLL_S)
+                    continue
+                for key, _ in self._selector.select(timeout=1.0):
+                    if key.data is None:
+                        self._accept(key.fileobj)
+                    else:
+                        self._read(key.data)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        for conn in list(self._connections.values()):
+            self._drop(conn)
+        for server in self._servers:
+            self._selector.unregister(server)
+            server.close()
+        self._servers.clear()
+        self._selector.close()
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+
+    def _accept(self, server: socket.socket) -> None:
+        try:
+            sock, peer = server.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        sock.setblocking(False)
+        local_port = server.getsockname()[1]
+        context = self.resolver.resolve(local_port, peer[0])
+        policy = self.resolver.policy(local_port, peer[0])
+        conn = _InstrumentConnection(sock, peer, context, self.profile, policy)
+        self._connections[sock] = conn
+        self._selector.register(sock, selectors.EVENT_READ, conn)
+        log.info(
+            "Instrument connected from %s:%d on port %d "
+            "(instrument=%d, filter=%s, %d open)",
+            peer[0], peer[1], local_port, context.instrument_id,
+            policy.describe(), len(self._connections),
+        )
+
+    def _read(self, conn: _InstrumentConnection) -> None:
+        try:
+            data = conn.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            log.info("Instrument %s connection error: %s", conn.peer[0], e)
+            self._drop(conn)
+            return
+        if not data:
+            log.info(
+                "Instrument %s disconnected (%d frames, %s)",
+                conn.peer[0], conn.frames, conn.filter.summary(),
+            )
+            self._drop(conn)
+            return
+
+        for frame in conn.framer.feed(data):
+            conn.frames += 1
+            self.on_frame(frame, conn.context, conn.dispatcher, conn.filter)
+
+    def _drop(self, conn: _InstrumentConnection) -> None:
+        self._connections.pop(conn.sock, None)
+        try:
+            self._selector.unregister(conn.sock)
+        except (KeyError, ValueError):
+            pass
+        conn.sock.close()
+
+
+def listen_tcp(
+    ports: list[int],
+    resolver: ContextResolver,
+    writer: QueueWriter,
     api_url: str,
     db_path: str = "",
+    profile: Optional[FrameProfile] = None,
 ) -> None:
-    """Listen for instrument data on TCP socket (demo mode)."""
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server.settimeout(1.0)
-    server.bind(("0.0.0.0", port))
-    server.listen(1)
+    """Listen for instrument data on one or more TCP ports (many instruments)."""
+
+    def on_frame(
+        frame: Frame,
+        context: CaptureContext,
+        dispatcher: ParserDispatcher,
+        reading_filter: ReadingFilter,
+    ) -> None:
+        capture_line(frame.text, context, dispatcher, writer, frame.meta, reading_filter)
+
+    listener = TcpListener(
+        ports, resolver, on_frame, profile=profile, paused=lambda: writer.backpressure,
+    )
+    bound = listener.bind()
+    context = resolver.default
 
     log.info("=" * 60)
     log.info("BioNexus Box Collector — TCP mode")
-    log.info("Listening on port %d for instrument data...", port)
+    log.info("Listening on port(s) %s for instrument data...", ", ".join(map(str, bound)))
     log.info("API target: %s", api_url)
-    log.info("Offline queue: %s", db_path)
+    log.info("Offline queue: %s (durability=%s)", db_path, writer.durability)
     log.info(
         "Context: instrument=%d sample=%d operator=%s lot=%s method=%s",
         context.instrument_id, context.sample_id,
         context.operator or "-", context.lot_number or "-",
         context.method or "-",
     )
+    if resolver.by_port or resolver.by_peer:
+        log.info(
+            "Context map: %d port override(s), %d peer override(s)",
+            len(resolver.by_port), len(resolver.by_peer),
+        )
     log.info("=" * 60)
 
-    while not _shutdown.is_set():
-        try:
-            client, addr = server.accept()
-            log.info("Instrument connected from %s", addr)
-            buffer = ""
+    listener.serve(_shutdown)
+    log.info("TCP listener stopped")
 
-            client.settimeout(1.0)
-            while not _shutdown.is_set():
-                try:
-                    data = client.recv(1024)
-                    if not data:
-                        log.info("Instrument disconnected")
-                        break
-
-                    buffer += data.decode("utf-8", errors="replace")
-
-                    while "\n" in buffer:
-                        line, buffer = buffer.split("\n", 1)
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        measurement = parse_line(line, context)
-                        if measurement:
-                            queue_measurement(conn, measurement)
-                            if not push_to_cloud(api_url, measurement):
-                                log.info(
-                                    "  -> Buffered offline (%s)",
-                                    measurement["idempotency_key"][:8],
-                                )
-
-                except socket.timeout:
-                    continue
-                except ConnectionResetError:
-                    log.info("Instrument connection reset")
-                    break
 
-            client.close()
+XON = b"\x11"
+XOFF = b"\x13"
 
-        except socket.timeout:
-            continue
-        except OSError:
-            if _shutdown.is_set():
-                break
-            raise
 
-    server.close()
-    log.info("TCP listener stopped")
+def serial_flow_control(ser, backpressure: bool, paused: bool) -> bool:
+    """Send XOFF / XON on a backpressure change; returns the new paused state."""
+    if backpressure == paused:
+        return paused
+    ser.write(XOFF if backpressure else XON)
+    log.warning("Serial %s sent (queue backpressure %s)",
+                "XOFF" if backpressure else "XON", "on" if backpressure else "off")
+    return backpressure
 
 
 def listen_serial(
     device: str,
     baud: int,
     context: CaptureContext,
-    conn: sqlite3.Connection,
+    writer: QueueWriter,
     api_url: str,
     db_path: str = "",
+    profile: Optional[FrameProfile] = None,
+    policy: Optional[FilterPolicy] = None,
+    xonxoff: bool = False,
 ) -> None:
-    """Listen for instrument data on RS232/USB serial port (production)."""
+    """Listen for instrument data on RS232/USB serial port (production).
+
+    With ``xonxoff`` the instrument is sent XOFF while the queue asserts
+    backpressure and XON once it clears; bytes still in flight after the
+    XOFF are read and stored as usual.
+    """
     try:
         import serial
     except ImportError:
@@ -1071,9 +3781,14 @@ def listen_serial(
 
     log.info("=" * 60)
     log.info("BioNexus Box Collector — Serial mode")
-    log.info("Device: %s @ %d baud", device, baud)
+    framer = StreamFramer(profile)
+    reading_filter = ReadingFilter(policy)
+    log.info(
+        "Device: %s @ %d baud (framing: %s, filter: %s)",
+        device, baud, framer.profile.name, reading_filter.policy.describe(),
+    )
     log.info("API target: %s", api_url)
-    log.info("Offline queue: %s", db_path)
+    log.info("Offline queue: %s (durability=%s)", db_path, writer.durability)
     log.info(
         "Context: instrument=%d sample=%d operator=%s lot=%s method=%s",
         context.instrument_id, context.sample_id,
@@ -1084,32 +3799,268 @@ def listen_serial(
 
     ser = serial.Serial(device, baud, timeout=1.0)
     log.info("Serial port open: %s", device)
+    dispatcher = ParserDispatcher()
+    paused = False
 
     while not _shutdown.is_set():
         try:
-            raw = ser.readline()
-            if not raw:
+            if xonxoff:
+                paused = serial_flow_control(ser, writer.backpressure, paused)
+            # Whatever has arrived (at least one byte, up to the timeout);
+            # the framer finds the boundaries, whatever the delimiter.
+            data = ser.read(ser.in_waiting or 1)
+            if not data:
                 continue
 
-            line = raw.decode("utf-8", errors="replace").strip()
-            if not line:
-                continue
-
-            measurement = parse_line(line, context)
-            if measurement:
-                queue_measurement(conn, measurement)
-                if not push_to_cloud(api_url, measurement):
-                    log.info(
-                        "  -> Buffered offline (%s)",
-                        measurement["idempotency_key"][:8],
-                    )
+            for frame in framer.feed(data):
+                capture_line(
+                    frame.text, context, dispatcher, writer, frame.meta, reading_filter,
+                )
 
         except Exception as e:
             log.error("Serial read error: %s", e)
             time.sleep(1)
 
     ser.close()
-    log.info("Serial listener stopped")
+    log.info("Serial listener stopped (%s)", reading_filter.summary())
+
+
+# ---------------------------------------------------------------------------
+# File Replay — recorded logs and exported result files
+# ---------------------------------------------------------------------------
+
+# Files are mapped and fed to the framer REPLAY_CHUNK_BYTES at a time. A
+# watched directory is rescanned every REPLAY_WATCH_INTERVAL_S; a new
+# file is picked up once its size is unchanged between two scans.
+REPLAY_CHUNK_BYTES = 1 << 20
+REPLAY_WATCH_INTERVAL_S = 2.0
+REPLAY_LEDGER = "replay-ledger.jsonl"
+# Replayed readings get uuid5 keys in this namespace over (file, frame
+# number, frame text): replaying the same file twice queues the same keys,
+# which the queue and the cloud deduplicate.
+REPLAY_KEY_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "urn:bionexus:box:replay")
+
+# Recorded log line: "<ISO-8601 timestamp>\t<instrument line>". The
+# timestamp becomes the reading's source_timestamp and drives --replay-speed.
+_RECORDED_PREFIX = re.compile(r"(\d{4}-\d{2}-\d{2}T[^\t]+)\t")
+
+
+@dataclass
+class ReplayStats:
+    path: str
+    frames: int = 0
+    readings: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def frames_per_s(self) -> float:
+        return self.frames / self.elapsed_s if self.elapsed_s else 0.0
+
+
+class _ReplayClock:
+    """Paces recorded frames to their original spacing, ``speed`` times faster."""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self._origin: Optional[tuple[float, float]] = None
+
+    def wait(self, recorded_at: float) -> None:
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = (recorded_at, now)
+            return
+        delay = self._origin[1] + (recorded_at - self._origin[0]) / self.speed - now
+        if delay > 0:
+            _shutdown.wait(delay)
+
+
+def replay_file(
+    path: str,
+    context: CaptureContext,
+    writer: QueueWriter,
+    profile: Optional[FrameProfile] = None,
+    policy: Optional[FilterPolicy] = None,
+    speed: float = 0.0,
+) -> ReplayStats:
+    """Replay one recorded log or export through parse → hash → queue.
+
+    The file is memory-mapped and handed to a StreamFramer in large
+    slices, so framing, header metadata, report blocks, filtering and
+    hashing are exactly those of a live serial / TCP stream. With
+    ``speed`` > 0, recorded lines are paced to their original timing
+    (1.0 = real time, 10 = ten times faster); 0 replays at full speed.
+
+    Each reading's idempotency key is derived from the file path and the
+    frame (see REPLAY_KEY_NAMESPACE), so a file replayed twice is not
+    duplicated. Like the live listeners, replay stops reading while the
+    queue asserts backpressure.
+    """
+    stats = ReplayStats(path)
+    framer = StreamFramer(profile)
+    reading_filter = ReadingFilter(policy)
+    dispatcher = ParserDispatcher()
+    clock = _ReplayClock(speed) if speed > 0 else None
+    source = os.path.abspath(path)
+    started = time.monotonic()
+
+    def handle(frames: list[Frame]) -> None:
+        for frame in frames:
+            if writer.backpressure:
+                log.warning("Replay of %s paused (queue backpressure)", os.path.basename(path))
+                while writer.backpressure and not _shutdown.is_set():
+                    _shutdown.wait(BACKPRESSURE_POLL_S)
+                log.warning("Replay of %s resumed", os.path.basename(path))
+            key = str(uuid.uuid5(
+                REPLAY_KEY_NAMESPACE, f"{source}\0{stats.frames}\0{frame.text}",
+            ))
+            text, recorded = frame.text, None
+            match = _RECORDED_PREFIX.match(text)
+            if match:
+                try:
+                    recorded_at = datetime.fromisoformat(match.group(1))
+                except ValueError:
+                    pass
+                else:
+                    text, recorded = text[match.end():], match.group(1)
+                    if clock is not None:
+                        clock.wait(recorded_at.timestamp())
+            stats.frames += 1
+            if capture_line(
+                text, context, dispatcher, writer, frame.meta, reading_filter, recorded, key,
+            ):
+                stats.readings += 1
+
+    size = os.path.getsize(path)
+    if size:  # an empty file cannot be mapped
+        with open(path, "rb") as fh, \
+                mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                memoryview(mapped) as view:
+            for offset in range(0, size, REPLAY_CHUNK_BYTES):
+                if _shutdown.is_set():
+                    break
+                with view[offset:offset + REPLAY_CHUNK_BYTES] as chunk:
+                    frames = framer.feed(chunk)
+                handle(frames)
+        # A last line without its delimiter is still a frame.
+        handle(framer.feed(framer.profile.delimiter))
+
+    stats.elapsed_s = time.monotonic() - started
+    log.info(
+        "Replayed %s: %d frame(s), %d reading(s) queued in %.2fs (%.0f frames/s, %s)",
+        os.path.basename(path), stats.frames, stats.readings, stats.elapsed_s,
+        stats.frames_per_s, reading_filter.summary(),
+    )
+    return stats
+
+
+def _load_replay_ledger(ledger_path: str) -> dict:
+    done = {}
+    if os.path.exists(ledger_path):
+        with open(ledger_path, encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    done[entry["path"]] = entry["size"]
+    return done
+
+
+def replay_directory(
+    directory: str,
+    context: CaptureContext,
+    writer: QueueWriter,
+    ledger_path: str,
+    profile: Optional[FrameProfile] = None,
+    policy: Optional[FilterPolicy] = None,
+    speed: float = 0.0,
+    watch: bool = False,
+) -> list[ReplayStats]:
+    """Replay every file of ``directory`` in name order, once.
+
+    Replayed files are recorded in a ledger (path, size) once their rows
+    are committed, so a restart — or a second backfill of the same
+    export — never queues the same readings twice under new idempotency
+    keys. A file that changes after it was replayed is reported, not
+    replayed again. With ``watch``, keeps picking up new files until
+    shutdown.
+    """
+    done = _load_replay_ledger(ledger_path)
+    seen_sizes: dict[str, int] = {}
+    results = []
+    while not _shutdown.is_set():
+        for name in sorted(os.listdir(directory)):
+            path = os.path.abspath(os.path.join(directory, name))
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            size = os.path.getsize(path)
+            if path in done:
+                if done[path] != size and seen_sizes.get(path) != size:
+                    log.warning("%s changed after replay; not replayed again", name)
+                seen_sizes[path] = size
+                continue
+            if watch and seen_sizes.get(path) != size:
+                seen_sizes[path] = size  # possibly still being written
+                continue
+            stats = replay_file(path, context, writer, profile, policy, speed)
+            if _shutdown.is_set():
+                break  # partially replayed: not recorded, replayed in full next time
+            writer.flush()
+            with open(ledger_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps({
+                    "path": path, "size": size, "frames": stats.frames,
+                    "readings": stats.readings,
+                    "replayed_at": datetime.now(timezone.utc).isoformat(),
+                }) + "\n")
+            done[path] = size
+            results.append(stats)
+        if not watch:
+            break
+        _shutdown.wait(REPLAY_WATCH_INTERVAL_S)
+    return results
+
+
+def listen_file(
+    input_path: str,
+    context: CaptureContext,
+    writer: QueueWriter,
+    api_url: str,
+    db_path: str = "",
+    profile: Optional[FrameProfile] = None,
+    policy: Optional[FilterPolicy] = None,
+    speed: float = 0.0,
+    watch: bool = False,
+    ledger_path: str = "",
+) -> None:
+    """Replay a file, or a (watched) directory of files, into the queue."""
+    log.info("=" * 60)
+    log.info("BioNexus Box Collector — File replay mode")
+    log.info(
+        "Input: %s%s (framing: %s, speed: %s)",
+        input_path, " (watching)" if watch else "",
+        (profile or FRAME_PROFILES["line"]).name,
+        f"{speed:g}x recorded timing" if speed > 0 else "full speed",
+    )
+    log.info("API target: %s", api_url)
+    log.info("Offline queue: %s (durability=%s)", db_path, writer.durability)
+    log.info("=" * 60)
+
+    if os.path.isdir(input_path):
+        ledger_path = ledger_path or os.path.join(
+            os.path.dirname(os.path.abspath(db_path or DB_PATH)), REPLAY_LEDGER,
+        )
+        results = replay_directory(
+            input_path, context, writer, ledger_path, profile, policy, speed, watch,
+        )
+    else:
+        results = [replay_file(input_path, context, writer, profile, policy, speed)]
+    writer.flush()
+
+    frames = sum(r.frames for r in results)
+    elapsed = sum(r.elapsed_s for r in results)
+    log.info(
+        "Replay done: %d file(s), %d frame(s), %d reading(s) queued, %.0f frames/s",
+        len(results), frames, sum(r.readings for r in results),
+        frames / elapsed if elapsed else 0.0,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -1132,16 +4083,86 @@ Examples:
 
   # Custom API endpoint
   python box_collector.py --mode tcp --port 9600 --api-url http://192.168.1.50:8000
+
+  # Several Ethernet instruments, one context per port
+  python box_collector.py --mode tcp --port 9600 9601 9602 --context-map instruments.json
+
+  # Weighing station in continuous mode: stable weights, on change only
+  python box_collector.py --mode serial --device /dev/ttyUSB0 \\
+      --stable-only --change-tolerance 0.0005
+
+  # Every reading fsync'd before the next one is read
+  python box_collector.py --mode serial --device /dev/ttyUSB0 --durability strict
+
+  # Backfill a directory of instrument exports, then keep watching it
+  python box_collector.py --mode file --input /srv/exports --watch
+
+  # Replay a recorded log at its original timing
+  python box_collector.py --mode file --input balance.log --replay-speed 1
+
+  # What is the box doing? (outage vs saturation, queue depth, rates)
+  curl -s http://127.0.0.1:9700/status
         """,
     )
 
     parser.add_argument(
-        "--mode", choices=["tcp", "serial"], default="tcp",
-        help="Input mode: tcp (demo) or serial (production). Default: tcp",
+        "--mode", choices=["tcp", "serial", "file"], default="tcp",
+        help=(
+            "Input mode: tcp (demo), serial (production) or file (replay "
+            "recorded logs / exports). Default: tcp"
+        ),
+    )
+    parser.add_argument(
+        "--input", default="",
+        help="File or directory to replay (file mode)",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="File mode: keep watching the --input directory for new files",
+    )
+    parser.add_argument(
+        "--replay-speed", type=float, default=0.0,
+        help=(
+            "File mode: pace recorded lines at N times their original timing "
+            "(1 = real time). Default: 0 (full speed)"
+        ),
+    )
+    parser.add_argument(
+        "--replay-ledger", default="",
+        help=f"File mode: ledger of replayed files. Default: {REPLAY_LEDGER} next to the queue DB",
+    )
+    parser.add_argument(
+        "--port", type=int, nargs="+", default=[9600],
+        help="TCP port(s) to listen on (tcp mode). Default: 9600",
+    )
+    parser.add_argument(
+        "--context-map", default="",
+        help=(
+            "JSON file mapping TCP ports / peer addresses to per-instrument "
+            "context overrides (tcp mode)."
+        ),
+    )
+    parser.add_argument(
+        "--framing", choices=sorted(FRAME_PROFILES), default="line",
+        help=(
+            "Frame delimiter: line (LF/CRLF), cr (bare CR) or etx (STX/ETX). "
+            "Default: line"
+        ),
+    )
+    parser.add_argument(
+        "--stable-only", action="store_true",
+        help="Queue only stable readings (drop SICS 'S D' dynamic weights).",
+    )
+    parser.add_argument(
+        "--change-tolerance", type=float, default=None,
+        help=(
+            "Queue a reading only when its value moved by more than this "
+            "since the last queued one (0 = any change)."
+        ),
     )
     parser.add_argument(
-        "--port", type=int, default=9600,
-        help="TCP port to listen on (tcp mode). Default: 9600",
+        "--min-interval", type=float, default=None,
+        help="Queue at most one reading per parameter every N seconds.",
     )
     parser.add_argument(
         "--device", default="/dev/ttyUSB0",
@@ -1167,6 +4188,68 @@ Examples:
         "--db", default=DB_PATH,
         help=f"SQLite queue path. Default: {DB_PATH}",
     )
+    parser.add_argument(
+        "--durability", choices=DURABILITY_CHOICES, default=DURABILITY_GROUPED,
+        help=(
+            "Queue commit policy: strict (every reading fsync'd before it is "
+            "acknowledged) or grouped (group commit bounded by --flush-rows / "
+            "--flush-ms). Default: grouped"
+        ),
+    )
+    parser.add_argument(
+        "--retention-days", type=float, default=RETENTION_DAYS,
+        help=(
+            "Keep synced readings in the queue this many days before moving "
+            f"them to archive segments (0 disables). Default: {RETENTION_DAYS:g}"
+        ),
+    )
+    parser.add_argument(
+        "--archive-dir", default="",
+        help="Archive segment directory. Default: 'archive' next to the queue DB",
+    )
+    parser.add_argument(
+        "--flush-rows", type=int, default=GROUP_COMMIT_ROWS,
+        help=f"Grouped durability: commit after this many rows. Default: {GROUP_COMMIT_ROWS}",
+    )
+    parser.add_argument(
+        "--flush-ms", type=int, default=GROUP_COMMIT_MS,
+        help=f"Grouped durability: commit at most this late (ms). Default: {GROUP_COMMIT_MS}",
+    )
+    parser.add_argument(
+        "--no-queue-compression", action="store_true",
+        help="Store queue record bodies uncompressed (saves CPU, costs flash)",
+    )
+    parser.add_argument(
+        "--queue-budget-mb", type=float, default=QUEUE_BUDGET_MB,
+        help="Disk budget of the queue DB before readings spill (0 = unbounded). "
+             f"Default: {QUEUE_BUDGET_MB:g} (env BIONEXUS_QUEUE_BUDGET_MB)",
+    )
+    parser.add_argument(
+        "--spill-budget-mb", type=float, default=SPILL_BUDGET_MB,
+        help="Disk budget of the overflow spill before backpressure (0 = unbounded). "
+             f"Default: {SPILL_BUDGET_MB:g} (env BIONEXUS_SPILL_BUDGET_MB)",
+    )
+    parser.add_argument(
+        "--spill-dir", default="",
+        help="Overflow spill directory. Default: 'spill' next to the queue DB",
+    )
+    parser.add_argument(
+        "--alarm-file", default="",
+        help="Status file kept present while the queue alarm is raised",
+    )
+    parser.add_argument(
+        "--xonxoff", action="store_true",
+        help="Serial mode: send XOFF/XON to the instrument on queue backpressure",
+    )
+    parser.add_argument(
+        "--status-port", type=int, default=STATUS_PORT,
+        help="Local status endpoint port, GET /status and /metrics (0 disables). "
+             f"Default: {STATUS_PORT} (env BIONEXUS_STATUS_PORT)",
+    )
+    parser.add_argument(
+        "--status-host", default=STATUS_HOST,
+        help=f"Status endpoint bind address. Default: {STATUS_HOST}",
+    )
     # --- Operational context (binds into SHA-256) ---
     parser.add_argument(
         "--operator", default="",
@@ -1189,7 +4272,15 @@ Examples:
         help="Free-text operator notes. Stored in context, not in hash.",
     )
 
+    parser.add_argument(
+        "--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging level (WARNING keeps full-speed replays off the console). Default: INFO",
+    )
+
     args = parser.parse_args()
+    log.setLevel(args.log_level)
+    if args.mode == "file" and not args.input:
+        parser.error("--mode file requires --input")
 
     db_path = args.db
 
@@ -1203,27 +4294,86 @@ Examples:
         notes=args.notes,
     )
 
-    # Initialize SQLite offline queue
-    conn = init_db(db_path)
-
-    # Start background sync thread
+    # Initialize SQLite offline queue (owned by the writer thread)
+    writer = QueueWriter(
+        db_path,
+        durability=args.durability,
+        flush_rows=args.flush_rows,
+        flush_ms=args.flush_ms,
+        compress_min=None if args.no_queue_compression else RECORD_COMPRESS_MIN_BYTES,
+        budget=QueueBudget(db_mb=args.queue_budget_mb, spill_mb=args.spill_budget_mb),
+        spill_dir=args.spill_dir,
+        alarm=QueueAlarm(args.alarm_file),
+    ).start()
+
+    # Start the sender stage (all cloud I/O happens on this thread)
+    ack_latency = LatencyTracker()
     sync_thread = threading.Thread(
         target=sync_loop,
-        args=(conn, args.api_url),
+        args=(writer, args.api_url, ack_latency),
+        name="sender",
         daemon=True,
     )
     sync_thread.start()
 
+    # Local status / metrics endpoint (reads in-memory counters only)
+    status_server = None
+    if args.status_port:
+        try:
+            status_server = StatusServer(
+                writer, METRICS, ack_latency, args.status_host, args.status_port,
+            ).start()
+        except OSError as e:
+            log.error("Status endpoint disabled: cannot bind %s:%d (%s)",
+                      args.status_host, args.status_port, e)
+
+    # Start queue maintenance (retention archive + compaction)
+    if args.retention_days > 0:
+        archive_dir = args.archive_dir or os.path.join(
+            os.path.dirname(os.path.abspath(db_path)), "archive",
+        )
+        threading.Thread(
+            target=maintenance_loop,
+            args=(writer, archive_dir, args.retention_days),
+            name="maintenance",
+            daemon=True,
+        ).start()
+
     # Start listener
+    profile = FRAME_PROFILES[args.framing]
+    policy = FilterPolicy(
+        stable_only=args.stable_only,
+        tolerance=args.change_tolerance,
+        window_s=args.min_interval,
+    )
     try:
         if args.mode == "tcp":
-            listen_tcp(args.port, context, conn, args.api_url, db_path)
+            resolver = (
+                ContextResolver.from_file(args.context_map, context, policy)
+                if args.context_map else ContextResolver(context, default_policy=policy)
+            )
+            listen_tcp(args.port, resolver, writer, args.api_url, db_path, profile)
+        elif args.mode == "file":
+            listen_file(
+                args.input, context, writer, args.api_url, db_path, profile, policy,
+                args.replay_speed, args.watch, args.replay_ledger,
+            )
+            # Give the sender the chance to push the backfill before exiting
+            # (Ctrl-C leaves the rest queued for the next start).
+            while not _shutdown.is_set() and writer.get_pending(limit=1):
+                _shutdown.wait(timeout=1.0)
         else:
-            listen_serial(args.device, args.baud, context, conn, args.api_url, db_path)
+            listen_serial(
+                args.device, args.baud, context, writer, args.api_url, db_path,
+                profile, policy, args.xonxoff,
+            )
     finally:
         _shutdown.set()
+        writer.notify()
         sync_thread.join(timeout=5)
-        conn.close()
+        if status_server is not None:
+            status_server.stop()
+        writer.stop()
         log.info("BioNexus Box Collector shut down cleanly")
 
 
@@ -122,6 +122,27 @@ def karl_fischer_frames(count: int) -> list[str]:
             f"KF,water_content,{water_content:.3f},%,"
             f"{sample},{volume_ml:.2f},{drift:.1f}"
         )
+    return frames
+
+
+def karl_fischer_report_frames(count: int) -> list[str]:
+    """Generate Karl Fischer multi-line report printouts.
+
+    Each frame is one printout block (``Sample`` … ``Water content``), as
+    sent by titrators configured for printer output instead of CSV. The
+    Box's StreamFramer reassembles the block before parsing.
+    """
+    frames = []
+    for i in range(count):
+        frames.append(
+            f"Sample: KF-Sample-{i + 1:03d}\n"
+            f"Volume: {random.uniform(5.0, 20.0):.2f} ml\n"
+            f"Drift: {random.uniform(2.0, 8.0):.1f} ug/min\n"
+            f"Water content: {random.uniform(0.05, 2.5):.3f} %"
+        )
+    return frames
+
+
 def agilent_chemstation_frames(count: int) -> list[str]:
     """Generate Agilent ChemStation peak report rows.
 
@@ -159,13 +180,59 @@ def agilent_chemstation_frames(count: int) -> list[str]:
     return frames
 
 
+def waters_empower_frames(count: int) -> list[str]:
+    """Generate Waters Empower pipe-delimited Result Set rows.
+
+    Format :
+        SampleName|SampleID|Method|Injection|PeakName|RetTime|Area|Height|Amount|Units
+    """
+    frames = [
+        "SampleName|SampleID|Method|Injection|PeakName|RetTime|Area|Height|Amount|Units",
+    ]
+    peaks = [("Caffeine", 2.456), ("Aspirin", 3.876)]
+
+    for i in range(count):
+        peak, base_rt = peaks[i % len(peaks)]
+        injection = i // len(peaks) + 1
+        area = random.uniform(50000, 150000)
+        height = area / random.uniform(40, 60)
+        amount = random.uniform(98.0, 101.5) if peak == "Caffeine" else random.uniform(0.05, 0.5)
+        frames.append(
+            f"QC-100|S-{injection:03d}|USP-007|{injection}|{peak}|"
+            f"{base_rt + random.uniform(-0.02, 0.02):.3f}|{area:.1f}|"
+            f"{height:.1f}|{amount:.2f}|%"
+        )
+
+    return frames
+
+
+def dissolution_frames(count: int) -> list[str]:
+    """Generate dissolution tester rows, 6 vessels per timepoint.
+
+    Format : ``DISS,<vessel>,<timepoint_min>,<value>,<unit>``
+    """
+    frames = []
+    timepoints = [5, 10, 15, 30, 45, 60]
+
+    for i in range(count):
+        vessel = i % 6 + 1
+        timepoint = timepoints[(i // 6) % len(timepoints)]
+        released = min(100.0, timepoint * 1.8 + random.uniform(-3.0, 3.0))
+        frames.append(f"DISS,{vessel},{timepoint},{released:.1f},%")
+
+    return frames
+
+
 PROTOCOLS = {
     "sics": ("Mettler Toledo SICS (Balance)", mettler_sics_frames),
     "sbi": ("Sartorius SBI (Balance)", sartorius_sbi_frames),
     "csv": ("Generic CSV (pH Meter)", csv_ph_frames),
     "spectro": ("CSV Spectrophotometer", csv_spectro_frames),
     "kf": ("Karl Fischer Titrator", karl_fischer_frames),
+    "kf-report": ("Karl Fischer Titrator (printout)", karl_fischer_report_frames),
     "agilent": ("Agilent ChemStation (HPLC)", agilent_chemstation_frames),
+    "empower": ("Waters Empower (HPLC)", waters_empower_frames),
+    "dissolution": ("Dissolution Tester", dissolution_frames),
 }
 
 
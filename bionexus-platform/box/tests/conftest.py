@@ -0,0 +1,42 @@
+"""Shared fixtures for the box_collector tests.
+
+- make_measurement: factory for a queued measurement dict, with overrides
+- writer: a started QueueWriter on a fresh queue DB, stopped on teardown
+"""
+
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import QueueWriter  # noqa: E402
+
+
+@pytest.fixture
+def make_measurement():
+    def make(**overrides) -> dict:
+        base = {
+            "idempotency_key": str(uuid.uuid4()),
+            "sample_id": 1,
+            "instrument_id": 1,
+            "parameter": "weight",
+            "value": "12.3456",
+            "unit": "g",
+            "source_timestamp": "2026-04-23T10:00:00+00:00",
+            "hub_received_at": "2026-04-23T10:00:00+00:00",
+            "data_hash": "a" * 64,
+        }
+        base.update(overrides)
+        return base
+
+    return make
+
+
+@pytest.fixture
+def writer(tmp_path):
+    w = QueueWriter(str(tmp_path / "queue.db")).start()
+    yield w
+    w.stop()
@@ -0,0 +1,196 @@
+"""Tests for the box_collector disk budget, overflow spill and backpressure.
+
+Covers:
+- Over budget, readings spill to append-only segments instead of the DB
+- Spill over budget asserts backpressure; rows use DB headroom, none lost
+- Spilled rows are replayed once there is room, and the alarm clears
+- SpillLog rotation and torn-line tolerance
+- TCP listener stops reading and serial sends XOFF/XON under backpressure
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    QUEUE_FULL,
+    QUEUE_OK,
+    QUEUE_SPILLING,
+    XOFF,
+    XON,
+    CaptureContext,
+    ContextResolver,
+    QueueAlarm,
+    QueueBudget,
+    QueueWriter,
+    SpillLog,
+    TcpListener,
+    serial_flow_control,
+)
+
+
+def _db_rows(writer: QueueWriter) -> int:
+    return writer.call(
+        lambda conn: conn.execute("SELECT COUNT(*) FROM pending_queue").fetchone()[0]
+    )
+
+
+@pytest.fixture
+def make_writer(tmp_path):
+    started = []
+
+    def make(db_mb=1e-6, spill_mb=0.0, segment_mb=1.0):
+        writer = QueueWriter(
+            str(tmp_path / "queue.db"),
+            budget=QueueBudget(
+                db_mb=db_mb, min_free_mb=0, spill_mb=spill_mb, segment_mb=segment_mb,
+            ),
+            spill_dir=str(tmp_path / "spill"),
+            alarm=QueueAlarm(str(tmp_path / "alarm.json")),
+        ).start()
+        started.append(writer)
+        return writer
+
+    yield make
+    for writer in started:
+        writer.stop()
+
+
+class TestQueueBudget:
+    def test_over_budget_spills_and_raises_alarm(
+        self, make_writer, tmp_path, make_measurement,
+    ) -> None:
+        writer = make_writer()
+        assert writer.state == QUEUE_SPILLING
+        for _ in range(10):
+            writer.enqueue(make_measurement())
+        writer.flush()
+
+        assert _db_rows(writer) == 0
+        assert writer.stats()["spilled"] == 10
+        assert writer.stats()["spill_bytes"] > 0
+        assert json.loads((tmp_path / "alarm.json").read_text())["state"] == QUEUE_SPILLING
+
+    def test_full_spill_asserts_backpressure_without_loss(
+        self, make_writer, make_measurement,
+    ) -> None:
+        writer = make_writer(spill_mb=1e-6)
+        writer.enqueue(make_measurement())
+        assert writer.check_budget() == QUEUE_FULL
+        assert writer.backpressure
+        for _ in range(5):
+            writer.enqueue(make_measurement())
+        writer.flush()
+
+        stats = writer.stats()
+        assert (stats["spilled"], stats["lost"]) == (1, 0)
+        assert _db_rows(writer) == 5
+
+    def test_spill_replayed_once_there_is_room(
+        self, make_writer, tmp_path, make_measurement,
+    ) -> None:
+        writer = make_writer(segment_mb=0.001)
+        keys = []
+        for _ in range(30):
+            m = make_measurement()
+            keys.append(m["idempotency_key"])
+            writer.enqueue(m)
+        writer.flush()
+        assert len(os.listdir(tmp_path / "spill")) > 1
+
+        writer.budget = QueueBudget(db_mb=100, min_free_mb=0, spill_mb=0)
+        deadline = time.monotonic() + 5
+        while writer.check_budget() != QUEUE_OK and time.monotonic() < deadline:
+            pass
+
+        assert writer.state == QUEUE_OK
+        assert writer.stats()["replayed"] == 30
+        assert os.listdir(tmp_path / "spill") == []
+        assert [row[2]["idempotency_key"] for row in writer.get_pending(limit=100)] == keys
+        assert not (tmp_path / "alarm.json").exists()
+
+    def test_unbounded_writer_never_spills(self, writer, make_measurement) -> None:
+        writer.enqueue(make_measurement())
+        assert writer.check_budget() == QUEUE_OK
+        assert _db_rows(writer) == 1
+
+
+class TestSpillLog:
+    def test_rotates_and_resumes_numbering(self, tmp_path, make_measurement) -> None:
+        spill = SpillLog(str(tmp_path), segment_bytes=300)
+        for _ in range(5):
+            spill.append(make_measurement())
+        spill.close()
+        segments = spill.segments()
+        assert len(segments) == 5
+
+        reopened = SpillLog(str(tmp_path), segment_bytes=300)
+        assert reopened.bytes == spill.bytes
+        reopened.append(make_measurement())
+        reopened.close()
+        assert reopened.segments()[-1].endswith("spill-00000006.jsonl")
+
+    def test_torn_last_line_skipped(self, tmp_path, make_measurement) -> None:
+        spill = SpillLog(str(tmp_path), segment_bytes=1 << 20)
+        spill.append(make_measurement())
+        spill.close()
+        with open(spill.segments()[0], "ab") as fh:
+            fh.write(b'{"idempotency_key": "tor')
+
+        path, rows = spill.pop_oldest()
+        assert len(rows) == 1
+        spill.discard(path)
+        assert spill.segments() == [] and spill.bytes == 0
+
+
+class TestFlowControl:
+    def test_serial_xoff_then_xon(self) -> None:
+        class FakeSerial:
+            def __init__(self):
+                self.sent = []
+
+            def write(self, data):
+                self.sent.append(data)
+
+        ser = FakeSerial()
+        paused = serial_flow_control(ser, True, False)
+        paused = serial_flow_control(ser, True, paused)
+        paused = serial_flow_control(ser, False, paused)
+        assert ser.sent == [XOFF, XON]
+        assert paused is False
+
+    def test_tcp_listener_stops_reading_while_paused(self) -> None:
+        frames = []
+        pause = threading.Event()
+        pause.set()
+        listener = TcpListener(
+            [0], ContextResolver(CaptureContext(instrument_id=1, sample_id=1)),
+            lambda frame, *_: frames.append(frame.text),
+            host="127.0.0.1", paused=pause.is_set,
+        )
+        port = listener.bind()[0]
+        stop = threading.Event()
+        thread = threading.Thread(target=listener.serve, args=(stop,))
+        thread.start()
+        sock = socket.create_connection(("127.0.0.1", port), timeout=2)
+        try:
+            sock.sendall(b"S S     1.0000 g\n")
+            time.sleep(0.3)
+            assert frames == []
+
+            pause.clear()
+            deadline = time.monotonic() + 3
+            while not frames and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert frames == ["S S     1.0000 g"]
+        finally:
+            sock.close()
+            stop.set()
+            thread.join(timeout=5)
@@ -0,0 +1,63 @@
+"""Parser / hash performance gate (bench_parsers.py, offline).
+
+Covers:
+- Every BaseParser subclass is measured on matching, non-matching and
+  adversarial lines, plus BaseParser.parse, compute_capture_hash and
+  parse_line dispatch
+- No case is slower than the stored baseline beyond the tolerance
+  (BIONEXUS_BENCH_TOLERANCE, default 3x normalized — short runs are noisy).
+  Timing gate only with BIONEXUS_BENCH=1: wall-clock numbers are not
+  reliable on shared CI runners
+- The comparison flags a slowdown and ignores cases without a baseline
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_parsers import compare, load_baseline, run_suite  # noqa: E402
+from box_collector import PARSERS  # noqa: E402
+
+TOLERANCE = float(os.getenv("BIONEXUS_BENCH_TOLERANCE", "3.0"))
+
+bench_only = pytest.mark.skipif(
+    os.getenv("BIONEXUS_BENCH") != "1", reason="timing gate: set BIONEXUS_BENCH=1",
+)
+
+
+@pytest.fixture(scope="module")
+def results() -> dict:
+    return run_suite(lines=300, repeat=3)
+
+
+def test_every_parser_and_stage_is_measured(results) -> None:
+    cases = results["cases"]
+    for parser in PARSERS:
+        for case in ("match", "miss", "adversarial"):
+            assert f"{parser.name}/{case}" in cases
+        assert f"parse/{parser.name}" in cases
+    assert {"compute_capture_hash", "parse_line/mixed", "parse_line/unmatched"} <= set(cases)
+    assert all(c["ns"] > 0 for c in cases.values())
+
+
+@bench_only
+def test_no_regression_against_baseline(results) -> None:
+    baseline = load_baseline()
+    assert baseline is not None, "run `python bench_parsers.py --update-baseline`"
+    assert set(baseline["cases"]) == set(results["cases"]), "baseline out of date"
+    regressions = compare(results, baseline, TOLERANCE)
+    assert regressions == [], "\n".join(regressions)
+
+
+def test_compare_flags_slowdown_only() -> None:
+    baseline = {"cases": {"a": {"ns": 100, "rel": 1.0}, "b": {"ns": 100, "rel": 1.0}}}
+    results = {"cases": {
+        "a": {"ns": 250, "rel": 2.5},
+        "b": {"ns": 150, "rel": 1.5},
+        "new": {"ns": 900, "rel": 9.0},
+    }}
+    regressions = compare(results, baseline, tolerance=2.0)
+    assert len(regressions) == 1 and regressions[0].startswith("a:")
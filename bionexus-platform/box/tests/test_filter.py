@@ -0,0 +1,127 @@
+"""Tests for the box_collector per-instrument ReadingFilter.
+
+Covers:
+- The default policy forwards everything
+- stable_only drops SICS dynamic weights before hashing / queueing
+- Change tolerance and one-per-window debounce per parameter
+- Drop counters per reason, and the per-reading audit trail
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    CaptureContext,
+    FilterPolicy,
+    ParserDispatcher,
+    ReadingFilter,
+    capture_line,
+)
+
+CTX = CaptureContext(instrument_id=1, sample_id=1, operator="OP-042")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.queued = []
+
+    def enqueue(self, measurement):
+        self.queued.append(measurement)
+
+
+def _capture(lines, policy, clock=None, step=0.0):
+    writer = RecordingWriter()
+    reading_filter = ReadingFilter(policy, clock=clock or FakeClock())
+    dispatcher = ParserDispatcher()
+    for line in lines:
+        capture_line(line, CTX, dispatcher, writer, reading_filter=reading_filter)
+        if clock is not None:
+            clock.now += step
+    return writer.queued, reading_filter
+
+
+class TestReadingFilter:
+    def test_default_policy_forwards_everything(self) -> None:
+        lines = ["S D     12.3400 g", "S D     12.3400 g", "S S     12.3456 g"]
+        queued, reading_filter = _capture(lines, FilterPolicy())
+        assert len(queued) == 3
+        assert reading_filter.forwarded == 3
+        assert "filtered" not in queued[0]["protocol_meta"]
+
+    def test_stable_only_drops_dynamic(self) -> None:
+        lines = ["S D     12.3400 g"] * 5 + ["S S     12.3456 g", "pH,7.42,pH"]
+        queued, reading_filter = _capture(lines, FilterPolicy(stable_only=True))
+
+        assert [m["value"] for m in queued] == ["12.3456", "7.42"]
+        assert reading_filter.dropped["unstable"] == 5
+        assert queued[0]["protocol_meta"]["filtered"] == {"policy": "stable", "unstable": 5}
+        # The counts reset once a reading carries them.
+        assert "filtered" not in queued[1]["protocol_meta"]
+
+    def test_change_tolerance(self) -> None:
+        values = ["12.3456", "12.3458", "12.3470", "12.3471", "12.3400"]
+        lines = [f"S S     {v} g" for v in values]
+        queued, reading_filter = _capture(lines, FilterPolicy(tolerance=0.001))
+
+        assert [m["value"] for m in queued] == ["12.3456", "12.3470", "12.3400"]
+        assert reading_filter.dropped["unchanged"] == 2
+
+    def test_zero_tolerance_forwards_changes_only(self) -> None:
+        lines = ["S S     1.0000 g"] * 10 + ["S S     1.0001 g"]
+        queued, _ = _capture(lines, FilterPolicy(tolerance=0.0))
+        assert [m["value"] for m in queued] == ["1.0000", "1.0001"]
+        assert queued[1]["protocol_meta"]["filtered"]["unchanged"] == 9
+
+    def test_one_per_window_per_parameter(self) -> None:
+        clock = FakeClock()
+        lines = []
+        for i in range(20):
+            lines += [f"S S     {i}.0000 g", f"pH,7.{i:02d},pH"]
+        queued, reading_filter = _capture(
+            lines, FilterPolicy(window_s=1.0), clock=clock, step=0.1,
+        )
+        # 20 pairs over 4 s of fake time: one weight and one pH per second.
+        weights = [m for m in queued if m["parameter"] == "weight"]
+        ph = [m for m in queued if m["parameter"] == "pH"]
+        assert len(weights) == 4
+        assert len(ph) == 4
+        assert reading_filter.dropped["window"] == 32
+
+    def test_rules_combine(self) -> None:
+        lines = [
+            "S D     5.0000 g",
+            "S S     5.0000 g",
+            "S S     5.0000 g",
+            "S D     6.0000 g",
+            "S S     6.0000 g",
+        ]
+        queued, reading_filter = _capture(
+            lines, FilterPolicy(stable_only=True, tolerance=0.0),
+        )
+        assert [m["value"] for m in queued] == ["5.0000", "6.0000"]
+        assert reading_filter.dropped == {"unstable": 2, "unchanged": 1, "window": 0}
+        assert queued[1]["protocol_meta"]["filtered"] == {
+            "policy": "stable+change>0", "unstable": 1, "unchanged": 1,
+        }
+
+    def test_dropped_readings_not_hashed(self, monkeypatch) -> None:
+        import box_collector
+
+        calls = []
+        original = box_collector.compute_capture_hash
+        monkeypatch.setattr(
+            box_collector, "compute_capture_hash",
+            lambda *a: calls.append(1) or original(*a),
+        )
+        _capture(["S D     1.0000 g"] * 50, FilterPolicy(stable_only=True))
+        assert calls == []
@@ -0,0 +1,162 @@
+"""Tests for the box_collector byte-level StreamFramer.
+
+Covers:
+- Frames split across reads, CRLF / bare CR / ETX delimiters
+- Whitespace and control bytes trimmed without emitting empty frames
+- ChemStation header metadata carried into following frames
+- Multi-line KF report blocks assembled into one frame and parsed
+- Runaway partial frames and blocks are discarded
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    FRAME_PROFILES,
+    MAX_LINE_BYTES,
+    CaptureContext,
+    ParserDispatcher,
+    StreamFramer,
+    capture_line,
+)
+
+CHEMSTATION_REPORT = (
+    b"# Agilent ChemStation Peak Report\n"
+    b"# Method: USP-007.M\n"
+    b"# Instrument: HPLC-Agilent-1260\n"
+    b"Peak,RetTime,Area,Height,Name,Unit\n"
+    b"1,2.345,12345.6,234.5,Caffeine,mAU*s\n"
+    b"2,3.876,8765.4,123.4,Aspirin,mAU*s\n"
+)
+
+KF_REPORT = (
+    b"Sample: Sample-001\r\n"
+    b"Volume: 12.34 ml\r\n"
+    b"Drift: 5.0 ug/min\r\n"
+    b"Water content: 0.123 %\r\n"
+)
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.queued = []
+
+    def enqueue(self, measurement):
+        self.queued.append(measurement)
+
+
+def _texts(frames) -> list[str]:
+    return [f.text for f in frames]
+
+
+class TestDelimiters:
+    def test_frames_split_across_reads(self) -> None:
+        framer = StreamFramer()
+        assert framer.feed(b"S S    12.3") == []
+        assert _texts(framer.feed(b"456 g\r\nS S")) == ["S S    12.3456 g"]
+        assert _texts(framer.feed(b"     1.0000 g\r\n")) == ["S S     1.0000 g"]
+        assert framer.buffer == bytearray()
+
+    def test_blank_and_whitespace_frames_skipped(self) -> None:
+        framer = StreamFramer()
+        assert _texts(framer.feed(b"\r\n   \n\t pH,7.42,pH \r\n\n")) == ["pH,7.42,pH"]
+
+    def test_bare_cr_profile(self) -> None:
+        framer = StreamFramer(FRAME_PROFILES["cr"])
+        assert _texts(framer.feed(b"+   100.0000 g\r+   100.5000 g\r")) == [
+            "+   100.0000 g", "+   100.5000 g",
+        ]
+
+    def test_etx_profile_strips_stx(self) -> None:
+        framer = StreamFramer(FRAME_PROFILES["etx"])
+        assert _texts(framer.feed(b"\x02S S     1.0000 g\x03\x02S S")) == ["S S     1.0000 g"]
+
+    def test_invalid_utf8_replaced(self) -> None:
+        framer = StreamFramer()
+        assert _texts(framer.feed(b"pH,7.42,\xffpH\n")) == ["pH,7.42,�pH"]
+
+    def test_runaway_partial_frame_discarded(self) -> None:
+        framer = StreamFramer()
+        framer.feed(b"x" * (MAX_LINE_BYTES + 1))
+        assert framer.discarded == 1
+        assert _texts(framer.feed(b"\npH,7.42,pH\n")) == ["pH,7.42,pH"]
+
+
+class TestHeaderMetadata:
+    def test_chemstation_header_attached_to_peaks(self) -> None:
+        frames = StreamFramer().feed(CHEMSTATION_REPORT)
+
+        assert _texts(frames)[0] == "Peak,RetTime,Area,Height,Name,Unit"
+        for frame in frames:
+            assert frame.meta == {
+                "method": "USP-007.M", "instrument": "HPLC-Agilent-1260",
+            }
+
+    def test_new_report_resets_metadata(self) -> None:
+        framer = StreamFramer()
+        first = framer.feed(CHEMSTATION_REPORT)
+        second = framer.feed(
+            b"# Agilent ChemStation Peak Report\n"
+            b"# Method: USP-011.M\n"
+            b"1,2.1,100.0,10.0,Caffeine,mAU*s\n"
+        )
+        assert second[0].meta == {"method": "USP-011.M"}
+        # Frames already handed out keep what they saw.
+        assert first[-1].meta["method"] == "USP-007.M"
+
+    def test_header_meta_reaches_protocol_meta(self) -> None:
+        writer = RecordingWriter()
+        ctx = CaptureContext(instrument_id=1, sample_id=1)
+        dispatcher = ParserDispatcher()
+        for frame in StreamFramer().feed(CHEMSTATION_REPORT):
+            capture_line(frame.text, ctx, dispatcher, writer, frame.meta)
+
+        assert len(writer.queued) == 2
+        meta = writer.queued[0]["protocol_meta"]
+        assert meta["method"] == "USP-007.M"
+        assert meta["instrument"] == "HPLC-Agilent-1260"
+        assert meta["parser"] == "agilent_chemstation_v1"
+        assert meta["retention_time_min"] == 2.345
+
+
+class TestReportBlocks:
+    def test_kf_printout_becomes_one_reading(self) -> None:
+        frames = StreamFramer().feed(KF_REPORT)
+        assert len(frames) == 1
+
+        writer = RecordingWriter()
+        capture_line(
+            frames[0].text, CaptureContext(instrument_id=1, sample_id=1),
+            ParserDispatcher(), writer, frames[0].meta,
+        )
+        (reading,) = writer.queued
+        assert (reading["parameter"], reading["value"], reading["unit"]) == (
+            "water_content", "0.123", "%",
+        )
+        assert reading["protocol_meta"]["sample_id"] == "Sample-001"
+        assert reading["protocol_meta"]["volume_ml"] == 12.34
+        assert reading["protocol_meta"]["drift_ug_per_min"] == 5.0
+        assert reading["raw"].startswith("Sample: Sample-001\nVolume:")
+
+    def test_block_split_across_reads(self) -> None:
+        framer = StreamFramer()
+        assert framer.feed(KF_REPORT[:30]) == []
+        assert framer.feed(KF_REPORT[30:60]) == []
+        assert len(framer.feed(KF_REPORT[60:])) == 1
+
+    def test_lines_around_blocks_still_framed(self) -> None:
+        frames = StreamFramer().feed(
+            b"KF,water_content,0.2,%\n" + KF_REPORT + b"KF,water_content,0.3,%\n"
+        )
+        assert len(frames) == 3
+        assert frames[0].text == "KF,water_content,0.2,%"
+        assert "\n" in frames[1].text
+        assert frames[2].text == "KF,water_content,0.3,%"
+
+    def test_unterminated_block_discarded(self) -> None:
+        framer = StreamFramer()
+        framer.feed(b"Sample: S-1\n" + b"Note: x\n" * 40)
+        assert framer.discarded == 1
+        assert _texts(framer.feed(b"KF,water_content,0.2,%\n")) == ["KF,water_content,0.2,%"]
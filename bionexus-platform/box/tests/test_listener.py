@@ -0,0 +1,201 @@
+"""Tests for the box_collector multi-connection TCP listener.
+
+Covers:
+- Several instruments connected at once, each with its own framer
+- A stalled sender (partial line, never finished) does not block others
+- Context mapping by local port and by peer address
+- Oversized partial lines are discarded
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    MAX_LINE_BYTES,
+    CaptureContext,
+    ContextResolver,
+    FilterPolicy,
+    TcpListener,
+)
+
+DEFAULT = CaptureContext(instrument_id=1, sample_id=1, operator="OP-042")
+
+
+class Running:
+    """A TcpListener served on a background thread, collecting lines."""
+
+    def __init__(self, ports, resolver):
+        self.lines: list[tuple[str, CaptureContext, object]] = []
+        self._lock = threading.Lock()
+        self.listener = TcpListener(ports, resolver, self._on_frame, host="127.0.0.1")
+        self.ports = self.listener.bind()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.listener.serve, args=(self.stop,))
+        self.thread.start()
+
+    def _on_frame(self, frame, context, dispatcher, reading_filter):
+        with self._lock:
+            self.lines.append((frame.text, context, dispatcher))
+
+    def wait_for(self, count: int, timeout: float = 3.0) -> list:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.lines) >= count:
+                    return list(self.lines)
+            time.sleep(0.01)
+        return list(self.lines)
+
+    def close(self):
+        self.stop.set()
+        self.thread.join(timeout=5)
+
+
+@pytest.fixture
+def running():
+    started = []
+
+    def start(ports=(0,), resolver=None):
+        r = Running(list(ports), resolver or ContextResolver(DEFAULT))
+        started.append(r)
+        return r
+
+    yield start
+    for r in started:
+        r.close()
+
+
+def _connect(port: int) -> socket.socket:
+    return socket.create_connection(("127.0.0.1", port), timeout=2)
+
+
+class TestTcpListener:
+    def test_stalled_sender_does_not_block_others(self, running) -> None:
+        r = running()
+        port = r.ports[0]
+        slow = _connect(port)
+        fast = _connect(port)
+        try:
+            slow.sendall(b"S S     12.34")  # never terminated
+            for i in range(5):
+                fast.sendall(f"S S     {i}.0000 g\r\n".encode())
+            lines = r.wait_for(5)
+            assert [line for line, _, _ in lines] == [
+                f"S S     {i}.0000 g" for i in range(5)
+            ]
+
+            slow.sendall(b"56 g\r\n")
+            lines = r.wait_for(6)
+            assert lines[-1][0] == "S S     12.3456 g"
+        finally:
+            slow.close()
+            fast.close()
+
+    def test_each_connection_has_its_own_dispatcher(self, running) -> None:
+        r = running()
+        a, b = _connect(r.ports[0]), _connect(r.ports[0])
+        try:
+            a.sendall(b"S S     1.0000 g\n")
+            r.wait_for(1)
+            b.sendall(b"S S     2.0000 g\n")
+            lines = r.wait_for(2)
+            assert lines[0][2] is not lines[1][2]
+        finally:
+            a.close()
+            b.close()
+
+    def test_split_reads_are_reassembled(self, running) -> None:
+        r = running()
+        sock = _connect(r.ports[0])
+        try:
+            for chunk in (b"S S  ", b"   1.2", b"345 g\r", b"\nS S     2.0000 g\n"):
+                sock.sendall(chunk)
+                time.sleep(0.02)
+            lines = r.wait_for(2)
+            assert [line for line, _, _ in lines] == ["S S     1.2345 g", "S S     2.0000 g"]
+        finally:
+            sock.close()
+
+    def test_context_by_port(self, running) -> None:
+        probe = socket.socket()
+        probe.bind(("127.0.0.1", 0))
+        free_port = probe.getsockname()[1]
+        probe.close()
+        resolver = ContextResolver(
+            DEFAULT, by_port={free_port: CaptureContext(instrument_id=9, sample_id=1)},
+        )
+        r = running(ports=(0, free_port), resolver=resolver)
+        default_sock, mapped_sock = _connect(r.ports[0]), _connect(free_port)
+        try:
+            default_sock.sendall(b"S S     1.0000 g\n")
+            r.wait_for(1)
+            mapped_sock.sendall(b"S S     2.0000 g\n")
+            lines = r.wait_for(2)
+            assert lines[0][1].instrument_id == 1
+            assert lines[1][1].instrument_id == 9
+        finally:
+            default_sock.close()
+            mapped_sock.close()
+
+    def test_oversized_partial_line_discarded(self, running) -> None:
+        r = running()
+        sock = _connect(r.ports[0])
+        try:
+            sock.sendall(b"x" * (MAX_LINE_BYTES + 10))
+            time.sleep(0.2)
+            sock.sendall(b"\nS S     1.0000 g\n")
+            lines = r.wait_for(1)
+            time.sleep(0.1)
+            assert [line for line, _, _ in r.lines] == ["S S     1.0000 g"]
+            assert lines
+        finally:
+            sock.close()
+
+
+class TestContextResolver:
+    def test_peer_wins_over_port(self) -> None:
+        resolver = ContextResolver(
+            DEFAULT,
+            by_port={9601: CaptureContext(instrument_id=2, sample_id=1)},
+            by_peer={"10.0.0.7": CaptureContext(instrument_id=3, sample_id=1)},
+        )
+        assert resolver.resolve(9601, "10.0.0.7").instrument_id == 3
+        assert resolver.resolve(9601, "10.0.0.8").instrument_id == 2
+        assert resolver.resolve(9600, "10.0.0.8") is DEFAULT
+
+    def test_from_file_overrides_default_fields(self, tmp_path) -> None:
+        path = tmp_path / "map.json"
+        path.write_text(json.dumps({
+            "ports": {"9601": {"instrument_id": 4, "method": "USP <711>"}},
+            "peers": {"10.0.0.7": {"lot_number": "LOT-7"}},
+        }))
+        resolver = ContextResolver.from_file(str(path), DEFAULT)
+
+        by_port = resolver.resolve(9601, "10.0.0.1")
+        assert (by_port.instrument_id, by_port.method, by_port.operator) == (
+            4, "USP <711>", "OP-042",
+        )
+        assert resolver.resolve(9600, "10.0.0.7").lot_number == "LOT-7"
+
+    def test_from_file_filter_policy_per_port(self, tmp_path) -> None:
+        path = tmp_path / "map.json"
+        path.write_text(json.dumps({
+            "ports": {"9601": {"instrument_id": 4,
+                               "filter": {"stable_only": True, "tolerance": 0.001}}},
+        }))
+        default_policy = FilterPolicy(window_s=2.0)
+        resolver = ContextResolver.from_file(str(path), DEFAULT, default_policy)
+
+        assert resolver.resolve(9601, "10.0.0.1").instrument_id == 4
+        assert resolver.policy(9601, "10.0.0.1") == FilterPolicy(
+            stable_only=True, tolerance=0.001,
+        )
+        assert resolver.policy(9600, "10.0.0.1") is default_policy
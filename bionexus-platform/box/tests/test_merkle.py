@@ -0,0 +1,42 @@
+"""Tests for the box_collector Merkle batch root.
+
+Covers:
+- The root matches the vector the server tests pin (same construction)
+- Any change to a key, a hash or the order changes the root
+- Odd batch sizes promote the last node instead of duplicating it
+"""
+
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import merkle_leaf, merkle_root  # noqa: E402
+
+# Shared with backend modules/persistence/tests/test_merkle.py.
+VECTOR_ITEMS = [
+    {"idempotency_key": f"00000000-0000-0000-0000-00000000000{i}", "data_hash": str(i) * 64}
+    for i in range(5)
+]
+VECTOR_ROOT = "b6010167a213d4960dceae841f4b8fa225314563dfc4c123e515c385b3924742"
+
+
+class TestMerkleRoot:
+    def test_matches_server_vector(self) -> None:
+        assert merkle_root(VECTOR_ITEMS) == VECTOR_ROOT
+
+    def test_any_change_changes_the_root(self) -> None:
+        items = [dict(item) for item in VECTOR_ITEMS]
+        items[2]["data_hash"] = "f" * 64
+        assert merkle_root(items) != VECTOR_ROOT
+        assert merkle_root(list(reversed(VECTOR_ITEMS))) != VECTOR_ROOT
+        assert merkle_root(VECTOR_ITEMS[:4]) != VECTOR_ROOT
+
+    def test_single_and_odd_batches(self) -> None:
+        one = VECTOR_ITEMS[:1]
+        assert merkle_root(one) == merkle_leaf(**one[0]).hex()
+
+        a, b, c = (merkle_leaf(**item) for item in VECTOR_ITEMS[:3])
+        ab = hashlib.sha256(b"\x01" + a + b).digest()
+        assert merkle_root(VECTOR_ITEMS[:3]) == hashlib.sha256(b"\x01" + ab + c).hexdigest()
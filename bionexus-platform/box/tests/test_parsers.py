@@ -3,7 +3,7 @@
 Covers:
 - BaseParser contract (can_parse, extract, parse)
 - MettlerSICSParser, SartoriusSBIParser, GenericCSVParser happy paths
-- Parser dispatch (parse_line)
+- Parser dispatch (parse_line, ParserDispatcher index + affinity)
 - Error handling (Mettler ES/EL/ET codes, malformed input)
 - SHA-256 scope: hash covers value + timestamp + instrument_id + operator + lot_number
 - Hash determinism (same inputs → same hash)
@@ -31,6 +31,7 @@ from box_collector import (  # noqa: E402
     MettlerSICSParser,
     ParsedReading,
     PARSERS,
+    ParserDispatcher,
     SartoriusSBIParser,
     WatersEmpowerParser,
     build_capture_payload,
@@ -263,6 +264,20 @@ class TestKarlFischerParser:
     def test_does_not_claim_generic_csv_rows(self) -> None:
         """A 3-field generic CSV row must still go to GenericCSVParser."""
         assert KarlFischerParser.can_parse("pH,7.42,pH") is False
+
+    REPORT = "Sample: Sample-002\nDrift: 4.2 ug/min\nWater content: 1.250 %"
+
+    def test_report_block_parsed(self, ctx: CaptureContext) -> None:
+        result = parse_line(self.REPORT, ctx)
+        assert result is not None
+        assert result["protocol_meta"]["parser"] == "karl_fischer_v1"
+        assert (result["value"], result["unit"]) == ("1.250", "%")
+        assert result["protocol_meta"]["sample_id"] == "Sample-002"
+        assert result["protocol_meta"]["drift_ug_per_min"] == 4.2
+
+    def test_report_block_without_result_rejected(self) -> None:
+        assert KarlFischerParser.can_parse("Sample: S-1\nDrift: 4.2 ug/min") is False
+        assert KarlFischerParser.extract("Sample: S-1\nWater content: n/a %") is None
 # AgilentChemStationParser
 # ---------------------------------------------------------------------------
 
@@ -550,6 +565,98 @@ class TestParseLineDispatch:
         assert parse_line("", ctx) is None
 
 
+class TestParserDispatcher:
+    """The indexed dispatcher must claim exactly what the ordered walk claims."""
+
+    # Lines crafted to sit on the boundaries between parsers.
+    EDGE_LINES = [
+        "S S     12.3456 g",
+        "ES S 0.0000 g",
+        "+   100.0000 g",
+        "   50.2500 g",
+        "pH,7.42,pH",
+        "# pH,7.42,pH",
+        "KF,water_content,0.123,%",
+        "KF,1,2,%",
+        "KF,1,x,%",
+        "KF,a,1,%,s,1,2,extra",
+        "DISS,1,15,78.5,%",
+        "diss,1,15,78.5,%",
+        "DISS,one,15,78.5,%",
+        "FOO,1,15,78.5,%",
+        "1,2.345,12345.6,234.5,Caffeine,mAU*s",
+        "x,1,y,z,a,b",
+        "Peak,RetTime,Area,Height,Name,Unit",
+        "# 1,2.345,12345.6,234.5,Caffeine,mAU*s",
+        "QC-100|S-001|USP-007|1|Caffeine|2.456|123456.7|2345.1|99.82|%",
+        "SampleName|S|M|1|P|1|2|3|4|%",
+        "S S 1.0 a|b|c|d|e|1|2|3|4|%",
+        "KF,a,1,%|b|c|d|e|1|2|3|4|%",
+        "Sample: S-1\nWater content: 0.123 %",
+        "Sample: S-1\nNote: a,b,c\nWater content: 0.123 %",
+        "Sample: S-1\nWater content: x %",
+        "!!! garbage !!!",
+        "",
+        "   ",
+    ]
+
+    @staticmethod
+    def _ordered_walk(line: str):
+        for parser in PARSERS:
+            if parser.can_parse(line):
+                reading = parser.extract(line)
+                if reading is not None:
+                    return parser
+        return None
+
+    def test_matches_ordered_walk_on_edge_lines(self) -> None:
+        dispatcher = ParserDispatcher()
+        for line in self.EDGE_LINES:
+            parser, _ = dispatcher.match(line)
+            assert parser is self._ordered_walk(line), line
+
+    def test_affinity_never_changes_the_winner(self) -> None:
+        """Interleave every edge line after every other one on one connection."""
+        dispatcher = ParserDispatcher()
+        for first in self.EDGE_LINES:
+            for second in self.EDGE_LINES:
+                dispatcher.match(first)
+                parser, _ = dispatcher.match(second)
+                assert parser is self._ordered_walk(second), (first, second)
+
+    def test_strict_extract_agrees_with_can_parse(self) -> None:
+        for parser in PARSERS:
+            for line in self.EDGE_LINES:
+                if parser.extract(line) is not None:
+                    assert parser.can_parse(line), (parser.__name__, line)
+
+    def test_affinity_kept_for_discriminated_parsers(self) -> None:
+        dispatcher = ParserDispatcher()
+        dispatcher.match("S S     12.3456 g")
+        assert dispatcher._affinity is MettlerSICSParser
+
+    def test_affinity_dropped_for_fall_through_parsers(self) -> None:
+        dispatcher = ParserDispatcher()
+        dispatcher.match("S S     12.3456 g")
+        dispatcher.match("pH,7.42,pH")
+        assert dispatcher._affinity is None
+
+    def test_candidates_pruned_by_shape(self) -> None:
+        dispatcher = ParserDispatcher()
+        key = dispatcher.classify("1,2.345,12345.6,234.5,Caffeine,mAU*s")
+        assert dispatcher.candidates(key) == (
+            AgilentChemStationParser, GenericCSVParser,
+        )
+        assert dispatcher.candidates(dispatcher.classify("!!! garbage !!!")) == ()
+
+    def test_parse_line_uses_given_dispatcher(self, ctx: CaptureContext) -> None:
+        dispatcher = ParserDispatcher()
+        result = parse_line("DISS,3,45,91.7,%", ctx, dispatcher)
+        assert result is not None
+        assert result["protocol_meta"]["parser"] == "dissolution_ascii_v1"
+        assert dispatcher._affinity is DissolutionASCIIParser
+
+
 # ---------------------------------------------------------------------------
 # SHA-256 — scope, determinism, sensitivity
 # ---------------------------------------------------------------------------
@@ -0,0 +1,415 @@
+"""Tests for the box_collector SQLite offline queue.
+
+Covers:
+- QueueWriter owns the connection and serves reads from its own thread
+- Grouped durability: rows share group commits, bounded by rows and time
+- Strict durability: enqueue returns only once the row is committed
+- Status transitions (synced / failed / dead) go through the writer
+- Reads flush buffered writes first
+- A failing operation or an undecodable row never stops the writer
+- Retries are scheduled via next_attempt_at; fresh rows use a fast lane
+- Rows are compact binary records that decode to the captured dict
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    BACKOFF_MAX_S,
+    BACKOFF_JITTER_S,
+    DURABILITY_GROUPED,
+    DURABILITY_STRICT,
+    MAX_RETRIES,
+    REC_HUB_TS_TEXT,
+    REC_KEY_TEXT,
+    REC_ZLIB,
+    ParsedReading,
+    QueueWriter,
+    RecordCodec,
+    get_due_retries,
+    get_fresh,
+    init_db,
+    next_retry_at,
+    queue_measurement,
+)
+
+
+def _measurement(**overrides) -> dict:
+    base = {
+        "idempotency_key": str(uuid.uuid4()),
+        "sample_id": 1,
+        "instrument_id": 1,
+        "parameter": "weight",
+        "value": "12.3456",
+        "unit": "g",
+        "source_timestamp": "2026-04-23T10:00:00+00:00",
+        "hub_received_at": "2026-04-23T10:00:00+00:00",
+        "data_hash": "a" * 64,
+    }
+    base.update(overrides)
+    return base
+
+
+def _committed_count(db_path: str) -> int:
+    """Count rows visible to an independent reader (i.e. committed)."""
+    reader = sqlite3.connect(db_path)
+    try:
+        return reader.execute("SELECT COUNT(*) FROM pending_queue").fetchone()[0]
+    finally:
+        reader.close()
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "queue.db")
+
+
+class TestQueueWriter:
+    def test_rejects_unknown_durability(self, db_path: str) -> None:
+        with pytest.raises(ValueError):
+            QueueWriter(db_path, durability="eventually")
+
+    def test_grouped_batches_rows_into_few_commits(self, db_path: str) -> None:
+        writer = QueueWriter(
+            db_path, durability=DURABILITY_GROUPED, flush_rows=50, flush_ms=10_000,
+        ).start()
+        try:
+            for _ in range(200):
+                writer.enqueue(_measurement())
+            writer.flush()
+            assert writer.commits <= 5
+            assert _committed_count(db_path) == 200
+        finally:
+            writer.stop()
+
+    def test_grouped_commit_is_bounded_in_time(self, db_path: str) -> None:
+        writer = QueueWriter(
+            db_path, durability=DURABILITY_GROUPED, flush_rows=1000, flush_ms=50,
+        ).start()
+        try:
+            writer.enqueue(_measurement())
+            deadline = time.monotonic() + 2.0
+            while _committed_count(db_path) == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert _committed_count(db_path) == 1
+        finally:
+            writer.stop()
+
+    def test_strict_enqueue_is_durable_on_return(self, db_path: str) -> None:
+        writer = QueueWriter(
+            db_path, durability=DURABILITY_STRICT, flush_rows=1000, flush_ms=10_000,
+        ).start()
+        try:
+            writer.enqueue(_measurement())
+            assert _committed_count(db_path) == 1
+        finally:
+            writer.stop()
+
+    def test_strict_concurrent_producers_share_commits(self, db_path: str) -> None:
+        writer = QueueWriter(db_path, durability=DURABILITY_STRICT).start()
+        try:
+            threads = [
+                threading.Thread(
+                    target=lambda: [writer.enqueue(_measurement()) for _ in range(25)]
+                )
+                for _ in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert _committed_count(db_path) == 100
+            assert writer.commits <= 100
+        finally:
+            writer.stop()
+
+    def test_duplicate_idempotency_key_ignored(self, db_path: str) -> None:
+        writer = QueueWriter(db_path).start()
+        try:
+            m = _measurement()
+            writer.enqueue(m)
+            writer.enqueue(m)
+            assert len(writer.get_pending()) == 1
+        finally:
+            writer.stop()
+
+    def test_reads_see_buffered_writes(self, db_path: str) -> None:
+        writer = QueueWriter(db_path, flush_rows=1000, flush_ms=60_000).start()
+        try:
+            writer.enqueue(_measurement())
+            assert len(writer.get_pending(limit=10)) == 1
+        finally:
+            writer.stop()
+
+    def test_status_transitions(self, db_path: str) -> None:
+        writer = QueueWriter(db_path).start()
+        try:
+            for _ in range(3):
+                writer.enqueue(_measurement())
+            ids = [row[0] for row in writer.get_pending()]
+            writer.mark_synced(ids[0])
+            writer.mark_failed(ids[1], "cloud_unreachable")
+            writer.mark_dead(ids[2])
+
+            rows = writer.call(
+                lambda conn: conn.execute(
+                    "SELECT id, status, retry_count, last_error FROM pending_queue ORDER BY id"
+                ).fetchall()
+            )
+            assert rows[0][1] == "synced"
+            assert rows[1][1:] == ("failed", 1, "cloud_unreachable")
+            assert rows[2][1] == "dead"
+            # The failed row is held back by its backoff, then becomes due.
+            assert writer.get_pending() == []
+            later = time.time() + BACKOFF_MAX_S + BACKOFF_JITTER_S + 1
+            assert [row[0] for row in writer.get_pending(now=later)] == [ids[1]]
+        finally:
+            writer.stop()
+
+    def test_stop_commits_buffered_rows(self, db_path: str) -> None:
+        writer = QueueWriter(db_path, flush_rows=1000, flush_ms=60_000).start()
+        writer.enqueue(_measurement())
+        writer.stop()
+        assert _committed_count(db_path) == 1
+
+    def test_call_runs_on_writer_thread(self, db_path: str) -> None:
+        writer = QueueWriter(db_path).start()
+        try:
+            name = writer.call(lambda conn: threading.current_thread().name)
+            assert name == "queue-writer"
+        finally:
+            writer.stop()
+
+    def test_call_commits_its_writes(self, db_path: str) -> None:
+        writer = QueueWriter(db_path, flush_rows=1000, flush_ms=60_000).start()
+        try:
+            writer.call(
+                lambda conn: conn.execute(
+                    "INSERT INTO pending_queue (idempotency_key, payload) VALUES ('k', '{}')"
+                )
+            )
+            assert _committed_count(db_path) == 1
+        finally:
+            writer.stop()
+
+    def test_failed_operations_do_not_stop_the_writer(self, db_path: str) -> None:
+        writer = QueueWriter(db_path, durability=DURABILITY_STRICT).start()
+        try:
+            writer.enqueue(_measurement(sample_id="not-a-number"))  # must not hang
+            with pytest.raises(ValueError):
+                writer.call(lambda conn: int("x"))
+            writer.enqueue(_measurement())
+            assert len(writer.get_pending()) == 1
+            assert writer.lost == 1
+        finally:
+            writer.stop()
+
+    def test_undecodable_row_is_marked_dead(self, db_path: str) -> None:
+        writer = QueueWriter(db_path).start()
+        try:
+            writer.call(
+                lambda conn: conn.execute(
+                    "INSERT INTO pending_queue (idempotency_key, payload) VALUES ('k', ?)",
+                    (b"\xff" * 64,),
+                )
+            )
+            writer.enqueue(_measurement())
+            assert [row[2]["parameter"] for row in writer.get_pending()] == ["weight"]
+            status, error = writer.call(
+                lambda conn: conn.execute(
+                    "SELECT status, last_error FROM pending_queue WHERE idempotency_key='k'"
+                ).fetchone()
+            )
+            assert status == "dead" and error.startswith("undecodable")
+            assert writer.stats()["depth"]["dead"] == 1
+        finally:
+            writer.stop()
+
+    def test_enqueue_wakes_waiting_sender(self, db_path: str) -> None:
+        writer = QueueWriter(db_path).start()
+        try:
+            assert not writer.wait_for_rows(timeout=0.01)
+            threading.Timer(0.05, writer.enqueue, args=(_measurement(),)).start()
+            started = time.monotonic()
+            assert writer.wait_for_rows(timeout=5)
+            assert time.monotonic() - started < 1.0
+            # The wake-up is consumed once.
+            assert not writer.wait_for_rows(timeout=0.01)
+        finally:
+            writer.stop()
+
+
+class TestRetrySchedule:
+    @pytest.fixture
+    def writer(self, db_path: str):
+        w = QueueWriter(db_path).start()
+        yield w
+        w.stop()
+
+    def _row(self, writer: QueueWriter, row_id: int) -> tuple:
+        return writer.call(
+            lambda conn: conn.execute(
+                "SELECT status, retry_count, next_attempt_at FROM pending_queue WHERE id=?",
+                (row_id,),
+            ).fetchone()
+        )
+
+    def test_failure_schedules_next_attempt_with_backoff(self, writer: QueueWriter) -> None:
+        writer.enqueue(_measurement())
+        row_id = writer.get_pending()[0][0]
+
+        before = time.time()
+        writer.mark_failed(row_id, "cloud_unreachable")
+        status, retries, first_due = self._row(writer, row_id)
+        assert (status, retries) == ("failed", 1)
+        assert first_due > before
+
+        writer.mark_failed(row_id, "cloud_unreachable")
+        _, retries, second_due = self._row(writer, row_id)
+        assert retries == 2
+        assert second_due > first_due
+        assert writer.call(next_retry_at) == second_due
+        assert writer.call(get_due_retries, 10) == []
+        assert len(writer.call(get_due_retries, 10, second_due)) == 1
+
+    def test_exceeding_max_retries_dead_letters(self, writer: QueueWriter) -> None:
+        writer.enqueue(_measurement())
+        row_id = writer.get_pending()[0][0]
+        for _ in range(MAX_RETRIES + 1):
+            writer.mark_failed(row_id, "cloud_unreachable")
+        status, retries, _ = self._row(writer, row_id)
+        assert (status, retries) == ("dead", MAX_RETRIES + 1)
+
+    def test_fresh_lane_not_blocked_by_old_failures(self, writer: QueueWriter) -> None:
+        for _ in range(50):
+            writer.enqueue(_measurement())
+        old_ids = [row[0] for row in writer.get_pending(limit=100)]
+        for row_id in old_ids:
+            writer.mark_failed(row_id, "cloud_unreachable")
+        writer.enqueue(_measurement())
+
+        fresh = writer.call(get_fresh, 10)
+        assert len(fresh) == 1
+        assert fresh[0][0] not in old_ids
+        # Even once the old rows are due, the fresh row comes first.
+        later = time.time() + BACKOFF_MAX_S + BACKOFF_JITTER_S + 1
+        assert writer.get_pending(limit=1, now=later)[0][0] == fresh[0][0]
+
+    def test_due_lookup_uses_index(self, writer: QueueWriter) -> None:
+        plan = writer.call(
+            lambda conn: conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM pending_queue "
+                "WHERE status = 'failed' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT 10",
+                (time.time(),),
+            ).fetchall()
+        )
+        assert "idx_pending_due" in " ".join(str(row[-1]) for row in plan)
+
+
+class TestRecordCodec:
+    @pytest.fixture
+    def conn(self, db_path: str):
+        c = init_db(db_path)
+        yield c
+        c.close()
+
+    def _full(self, **overrides) -> dict:
+        return _measurement(**{
+            "raw": "S S     12.3456 g",
+            "context": {"operator": "OP-042", "lot_number": "LOT-7", "instrument_id": 1},
+            "protocol_meta": {"protocol": "SICS", "parser": "mettler_sics"},
+            **overrides,
+        })
+
+    def test_round_trip_is_exact(self, conn) -> None:
+        m = self._full()
+        record = RecordCodec().encode(conn, m)
+        assert isinstance(record, bytes)
+        assert RecordCodec().decode(conn, record) == m
+        assert len(record) < len(json.dumps(m)) / 2
+
+    def test_context_is_interned_once(self, conn) -> None:
+        codec = RecordCodec()
+        for _ in range(20):
+            codec.encode(conn, self._full(idempotency_key=str(uuid.uuid4())))
+        assert conn.execute("SELECT COUNT(*) FROM contexts").fetchone()[0] == 1
+
+    def test_non_canonical_fields_kept_verbatim(self, conn) -> None:
+        m = self._full(
+            idempotency_key="BOX-0001",
+            hub_received_at="2026-04-23T12:00:00+02:00",
+            extra_field=[1, 2],
+        )
+        record = RecordCodec().encode(conn, m)
+        assert record[1] & REC_KEY_TEXT and record[1] & REC_HUB_TS_TEXT
+        assert RecordCodec().decode(conn, record) == m
+
+    def test_large_body_compressed(self, conn) -> None:
+        m = self._full(raw="Peak 1 " * 100)
+        record = RecordCodec().encode(conn, m)
+        assert record[1] & REC_ZLIB
+        assert RecordCodec().decode(conn, record) == m
+        assert not RecordCodec(compress_min=None).encode(conn, m)[1] & REC_ZLIB
+
+    def test_partial_decode_stops_at_capture_fields(self, conn) -> None:
+        m = self._full()
+        lean = RecordCodec().decode(conn, RecordCodec().encode(conn, m), full=False)
+        assert set(lean) == set(m) - {"raw", "context", "protocol_meta"}
+        assert all(lean[k] == m[k] for k in lean)
+
+    def test_legacy_json_rows_still_decode(self, db_path: str) -> None:
+        conn = init_db(db_path)
+        m = self._full()
+        queue_measurement(conn, m)  # no codec: legacy TEXT row
+        conn.commit()
+        conn.close()
+        writer = QueueWriter(db_path).start()
+        try:
+            writer.enqueue(self._full(idempotency_key=str(uuid.uuid4())))
+            rows = writer.get_pending()
+            assert rows[0][2] == m
+            assert rows[1][2]["context"] == m["context"]
+        finally:
+            writer.stop()
+
+    def test_parsed_reading_has_no_instance_dict(self) -> None:
+        reading = ParsedReading("weight", "1.0", "g", "2026-04-23T10:00:00+00:00", "raw")
+        assert not hasattr(reading, "__dict__")
+
+
+def test_init_db_migrates_queue_without_next_attempt_at(db_path: str) -> None:
+    legacy = sqlite3.connect(db_path)
+    legacy.execute("""
+        CREATE TABLE pending_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            idempotency_key TEXT UNIQUE NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            retry_count INTEGER DEFAULT 0,
+            last_error TEXT DEFAULT '',
+            created_at TEXT DEFAULT (datetime('now')),
+            updated_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    legacy.execute(
+        "INSERT INTO pending_queue (idempotency_key, payload, status, retry_count) "
+        "VALUES ('k1', '{}', 'failed', 3)"
+    )
+    legacy.commit()
+    legacy.close()
+
+    conn = init_db(db_path)
+    try:
+        assert len(get_due_retries(conn, 10)) == 1
+    finally:
+        conn.close()
@@ -0,0 +1,137 @@
+"""Tests for the box_collector file replay mode.
+
+Covers:
+- Recorded logs and exports go through framer → parser → hash → queue
+- Recorded timestamps become source_timestamp and drive --replay-speed
+- A last line without delimiter and an empty file are handled
+- Directory replay records a ledger, so files are never queued twice
+- Replayed readings get stable keys, so replaying a file twice is a no-op
+- Replay waits while the queue asserts backpressure
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    FRAME_PROFILES,
+    QUEUE_FULL,
+    QUEUE_OK,
+    CaptureContext,
+    ParsedReading,
+    QueueWriter,
+    compute_capture_hash,
+    replay_directory,
+    replay_file,
+)
+
+CONTEXT = CaptureContext(instrument_id=3, sample_id=7, operator="OP-042")
+
+
+def _queued(writer: QueueWriter) -> list[dict]:
+    return [row[2] for row in writer.get_pending(limit=1000)]
+
+
+class TestReplayFile:
+    def test_lines_are_parsed_hashed_and_queued(self, writer, tmp_path) -> None:
+        path = tmp_path / "balance.log"
+        path.write_bytes(b"S S     1.0000 g\r\nnot an instrument line\r\npH,7.01,pH\r\n")
+
+        stats = replay_file(str(path), CONTEXT, writer)
+
+        assert (stats.frames, stats.readings) == (3, 2)
+        queued = _queued(writer)
+        assert [m["raw"] for m in queued] == ["S S     1.0000 g", "pH,7.01,pH"]
+        assert all(m["instrument_id"] == 3 for m in queued)
+
+    def test_recorded_timestamp_becomes_source_timestamp(self, writer, tmp_path) -> None:
+        path = tmp_path / "recorded.log"
+        path.write_text("2025-11-03T08:15:00+00:00\tS S     2.5000 g\n")
+
+        replay_file(str(path), CONTEXT, writer)
+
+        [m] = _queued(writer)
+        assert m["source_timestamp"] == "2025-11-03T08:15:00+00:00"
+        assert m["raw"] == "S S     2.5000 g"
+        reading = ParsedReading(
+            m["parameter"], m["value"], m["unit"], m["source_timestamp"], m["raw"],
+        )
+        assert m["data_hash"] == compute_capture_hash(reading, CONTEXT)
+
+    def test_replay_speed_follows_recorded_timing(self, writer, tmp_path) -> None:
+        path = tmp_path / "recorded.log"
+        path.write_text("".join(
+            f"2025-11-03T08:15:0{i}+00:00\tS S     {i}.0000 g\n" for i in range(3)
+        ))
+
+        stats = replay_file(str(path), CONTEXT, writer, speed=10.0)
+
+        assert stats.readings == 3
+        assert stats.elapsed_s >= 0.18  # 2 s of recording at 10x
+
+    def test_unterminated_last_line_and_empty_file(self, writer, tmp_path) -> None:
+        path = tmp_path / "export.txt"
+        path.write_bytes(b"S S     1.0000 g\rS S     2.0000 g")
+        empty = tmp_path / "empty.txt"
+        empty.write_bytes(b"")
+
+        stats = replay_file(str(path), CONTEXT, writer, FRAME_PROFILES["cr"])
+
+        assert stats.readings == 2
+        assert replay_file(str(empty), CONTEXT, writer).frames == 0
+
+    def test_same_file_replayed_twice_is_queued_once(self, writer, tmp_path) -> None:
+        path = tmp_path / "balance.log"
+        path.write_text("S S     1.0000 g\nS S     1.0000 g\n")
+
+        replay_file(str(path), CONTEXT, writer)
+        first = {m["idempotency_key"] for m in _queued(writer)}
+        replay_file(str(path), CONTEXT, writer)
+
+        assert len(first) == 2
+        assert {m["idempotency_key"] for m in _queued(writer)} == first
+
+    def test_replay_waits_for_backpressure(self, writer, tmp_path) -> None:
+        path = tmp_path / "balance.log"
+        path.write_text("S S     1.0000 g\n")
+        writer.state = QUEUE_FULL
+
+        thread = threading.Thread(target=replay_file, args=(str(path), CONTEXT, writer))
+        thread.start()
+        time.sleep(0.3)
+        assert _queued(writer) == []
+
+        writer.state = QUEUE_OK
+        thread.join(timeout=5)
+        assert len(_queued(writer)) == 1
+
+
+class TestReplayDirectory:
+    def test_files_replayed_once_across_runs(self, writer, tmp_path) -> None:
+        exports = tmp_path / "exports"
+        exports.mkdir()
+        (exports / "a.log").write_text("S S     1.0000 g\n")
+        (exports / "b.log").write_text("S S     2.0000 g\nS S     3.0000 g\n")
+        ledger = str(tmp_path / "ledger.jsonl")
+
+        first = replay_directory(str(exports), CONTEXT, writer, ledger)
+        assert [os.path.basename(s.path) for s in first] == ["a.log", "b.log"]
+
+        (exports / "c.log").write_text("S S     4.0000 g\n")
+        second = replay_directory(str(exports), CONTEXT, writer, ledger)
+        assert [os.path.basename(s.path) for s in second] == ["c.log"]
+        assert len(_queued(writer)) == 4
+
+    def test_full_speed_throughput(self, writer, tmp_path) -> None:
+        path = tmp_path / "big.log"
+        path.write_bytes(b"S S     1.0000 g\n" * 2000)
+        started = time.monotonic()
+
+        stats = replay_file(str(path), CONTEXT, writer)
+
+        assert stats.readings == 2000
+        assert stats.frames_per_s > 0
+        assert time.monotonic() - started < 30
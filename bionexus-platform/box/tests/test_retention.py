@@ -0,0 +1,159 @@
+"""Tests for box_collector queue retention and archive segments.
+
+Covers:
+- Synced rows past retention move to gzip segments and leave the table
+- Pending / failed / recent rows are never archived
+- The manifest hash chain detects altered, missing or reordered segments
+- Compaction runs incremental vacuum and truncates the WAL
+"""
+
+import gzip
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from box_collector import (  # noqa: E402
+    ARCHIVE_MANIFEST,
+    QueueWriter,
+    archive_synced,
+    compact_queue,
+    init_db,
+    verify_archive,
+)
+
+
+def _age(writer: QueueWriter, days: int, status: str) -> None:
+    """Backdate every row and give it ``status``."""
+    writer.call(
+        lambda conn: conn.execute(
+            "UPDATE pending_queue SET status=?, created_at=datetime('now', ?)",
+            (status, f"-{days} days"),
+        )
+    )
+
+
+def _count(writer: QueueWriter) -> dict:
+    rows = writer.call(
+        lambda conn: conn.execute(
+            "SELECT status, COUNT(*) FROM pending_queue GROUP BY status"
+        ).fetchall()
+    )
+    return dict(rows)
+
+
+def _segments(archive_dir) -> list:
+    with open(os.path.join(archive_dir, ARCHIVE_MANIFEST)) as fh:
+        return [json.loads(line) for line in fh]
+
+
+class TestArchiveSynced:
+    def test_old_synced_rows_move_to_segments(self, writer, tmp_path, make_measurement) -> None:
+        archive_dir = str(tmp_path / "archive")
+        keys = []
+        for _ in range(25):
+            m = make_measurement()
+            keys.append(m["idempotency_key"])
+            writer.enqueue(m)
+        _age(writer, 30, "synced")
+
+        moved = archive_synced(writer, archive_dir, retention_days=7, segment_rows=10)
+
+        assert moved == 25
+        assert _count(writer) == {}
+        entries = _segments(archive_dir)
+        assert [e["rows"] for e in entries] == [10, 10, 5]
+        archived = []
+        for entry in entries:
+            with gzip.open(os.path.join(archive_dir, entry["segment"]), "rt") as fh:
+                archived += [json.loads(line) for line in fh]
+        assert [row["idempotency_key"] for row in archived] == keys
+        assert archived[0]["payload"]["value"] == "12.3456"
+        assert verify_archive(archive_dir) == []
+
+    def test_unsynced_and_recent_rows_stay(self, writer, tmp_path, make_measurement) -> None:
+        archive_dir = str(tmp_path / "archive")
+        for _ in range(3):
+            writer.enqueue(make_measurement())
+        _age(writer, 30, "failed")
+        writer.enqueue(make_measurement())
+        writer.call(
+            lambda conn: conn.execute(
+                "UPDATE pending_queue SET status='synced' WHERE status='pending'"
+            )
+        )
+
+        assert archive_synced(writer, archive_dir, retention_days=7) == 0
+        assert _count(writer) == {"failed": 3, "synced": 1}
+        assert not os.path.exists(os.path.join(archive_dir, ARCHIVE_MANIFEST))
+
+
+class TestVerifyArchive:
+    @pytest.fixture
+    def archive_dir(self, writer, tmp_path, make_measurement) -> str:
+        archive_dir = str(tmp_path / "archive")
+        for _ in range(6):
+            writer.enqueue(make_measurement())
+        _age(writer, 30, "synced")
+        archive_synced(writer, archive_dir, retention_days=7, segment_rows=2)
+        return archive_dir
+
+    def test_altered_segment_detected(self, archive_dir) -> None:
+        name = _segments(archive_dir)[1]["segment"]
+        with open(os.path.join(archive_dir, name), "ab") as fh:
+            fh.write(b"tampered")
+        assert verify_archive(archive_dir) == [f"{name}: segment hash mismatch"]
+
+    def test_missing_segment_detected(self, archive_dir) -> None:
+        name = _segments(archive_dir)[0]["segment"]
+        os.remove(os.path.join(archive_dir, name))
+        assert verify_archive(archive_dir) == [f"{name}: segment missing"]
+
+    def test_dropped_manifest_entry_breaks_chain(self, archive_dir) -> None:
+        path = os.path.join(archive_dir, ARCHIVE_MANIFEST)
+        with open(path) as fh:
+            lines = fh.readlines()
+        with open(path, "w") as fh:
+            fh.writelines([lines[0], lines[2]])
+        problems = verify_archive(archive_dir)
+        assert problems == [f"{json.loads(lines[2])['segment']}: manifest chain broken"]
+
+
+class TestCompaction:
+    def test_new_queue_uses_incremental_auto_vacuum(self, tmp_path) -> None:
+        conn = init_db(str(tmp_path / "queue.db"))
+        try:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        finally:
+            conn.close()
+
+    def test_legacy_queue_converted(self, tmp_path) -> None:
+        path = str(tmp_path / "queue.db")
+        legacy = sqlite3.connect(path)
+        legacy.execute("CREATE TABLE other (x INTEGER)")
+        legacy.commit()
+        legacy.close()
+
+        conn = init_db(path)
+        try:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        finally:
+            conn.close()
+
+    def test_compaction_releases_pages_and_truncates_wal(
+        self, writer, tmp_path, make_measurement,
+    ) -> None:
+        for _ in range(500):
+            writer.enqueue(make_measurement(raw="x" * 500))
+        _age(writer, 30, "synced")
+        archive_synced(writer, str(tmp_path / "archive"), retention_days=7)
+
+        freelist, checkpoint = writer.call(compact_queue)
+
+        assert freelist == 0
+        assert checkpoint[0] == 0  # not busy
+        assert os.path.getsize(str(tmp_path / "queue.db-wal")) == 0
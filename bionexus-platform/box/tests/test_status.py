@@ -0,0 +1,191 @@
+"""Tests for the box_collector status / metrics endpoint.
+
+Covers:
+- Queue depth per status and the oldest unsent age are kept up to date by
+  the writer (they match a full count after inserts, ACKs, failures,
+  dead-letters and archive deletes), without reading rows back
+- Parse rate per parser and unmatched-line rate over a sliding window
+- Push latency histogram (cumulative buckets) and outage tracking
+- Health verdict: ok / outage / saturated
+- GET /status (JSON) and GET /metrics (Prometheus text) over HTTP
+"""
+
+import json
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import box_collector  # noqa: E402
+from box_collector import (  # noqa: E402
+    QUEUE_SPILLING,
+    BoxMetrics,
+    CaptureContext,
+    LatencyTracker,
+    QueueWriter,
+    RateWindow,
+    StatusServer,
+    box_status,
+    parse_line,
+    queue_depth,
+)
+
+
+class TestQueueDepth:
+    def test_depth_follows_every_transition(self, writer, make_measurement) -> None:
+        for _ in range(6):
+            writer.enqueue(make_measurement())
+        rows = [row[0] for row in writer.get_pending(limit=10)]
+
+        writer.mark_synced(rows[0])
+        writer.mark_synced(rows[1])
+        writer.mark_failed(rows[2], "cloud_unreachable")
+        writer.mark_dead(rows[3], "rejected")
+        writer.flush()
+
+        depth = writer.stats()["depth"]
+        assert depth == {"pending": 2, "failed": 1, "synced": 2, "dead": 1}
+        assert depth == writer.call(queue_depth)
+
+        writer.delete_synced(rows[:2])
+        assert writer.stats()["depth"]["synced"] == 0
+        assert writer.stats()["depth"] == writer.call(queue_depth)
+
+    def test_status_updates_add_no_reads(self, writer, make_measurement) -> None:
+        for _ in range(3):
+            writer.enqueue(make_measurement())
+        rows = [row[0] for row in writer.get_pending(limit=10)]
+        statements: list[str] = []
+        writer.call(lambda conn: conn.set_trace_callback(statements.append))
+
+        writer.mark_synced(rows[1])
+        writer.mark_dead(rows[2], "rejected")
+        writer.mark_synced(rows[2])  # already dead: no change
+        writer.flush()
+        writer.call(lambda conn: conn.set_trace_callback(None))
+
+        assert not [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert writer.stats()["depth"] == writer.call(queue_depth)
+
+    def test_duplicate_key_not_counted(self, writer, make_measurement) -> None:
+        m = make_measurement()
+        writer.enqueue(m)
+        writer.enqueue(dict(m))
+        writer.flush()
+        assert writer.stats()["depth"]["pending"] == 1
+
+    def test_oldest_unsent_moves_on_when_it_is_synced(self, writer, make_measurement) -> None:
+        assert writer.stats()["oldest_pending_age_s"] is None
+        writer.enqueue(make_measurement())
+        writer.enqueue(make_measurement())
+        first, second = [row[0] for row in writer.get_pending(limit=10)]
+        assert writer.stats()["oldest_pending_age_s"] >= 0
+
+        writer.mark_synced(first)
+        writer.flush()
+        assert writer._oldest[0] == second
+
+        writer.mark_synced(second)
+        writer.flush()
+        assert writer.stats()["oldest_pending_age_s"] is None
+
+    def test_depth_recounted_on_restart(self, tmp_path, make_measurement) -> None:
+        path = str(tmp_path / "queue.db")
+        first = QueueWriter(path).start()
+        for _ in range(3):
+            first.enqueue(make_measurement())
+        first.stop()
+
+        reopened = QueueWriter(path).start()
+        try:
+            assert reopened.stats()["depth"]["pending"] == 3
+            assert reopened.stats()["oldest_pending_age_s"] is not None
+        finally:
+            reopened.stop()
+
+
+class TestMetrics:
+    def test_rate_window_forgets_old_events(self) -> None:
+        window = RateWindow(window_s=10)
+        for t in range(20):
+            window.record(1000.0 + t)
+        assert window.total == 20
+        assert window.rate(1019.5) == pytest.approx(1.0)
+        assert window.rate(1100.0) == 0.0
+
+    def test_parse_line_counts_per_parser_and_unmatched(self, monkeypatch) -> None:
+        metrics = BoxMetrics()
+        monkeypatch.setattr(box_collector, "METRICS", metrics)
+        context = CaptureContext(instrument_id=1, sample_id=1)
+
+        parse_line("S S     1.0000 g", context)
+        parse_line("S S     2.0000 g", context)
+        parse_line("garbage", context)
+
+        snap = metrics.snapshot()
+        assert snap["parsers"]["mettler_sics_v1"]["total"] == 2
+        assert snap["parsers"]["mettler_sics_v1"]["rate_per_s"] > 0
+        assert snap["unmatched"]["total"] == 1
+        assert snap["unmatched"]["ratio"] == pytest.approx(1 / 3, abs=1e-3)
+
+    def test_push_histogram_is_cumulative(self) -> None:
+        metrics = BoxMetrics(buckets=(0.1, 1.0))
+        metrics.pushed(0.05, True, rows=10)
+        metrics.pushed(0.5, True, rows=10)
+        metrics.pushed(3.0, False, error="cloud_unreachable")
+
+        push = metrics.snapshot()["push"]
+        assert push["latency_s"]["buckets"] == {"0.1": 1, "1.0": 2, "+Inf": 3}
+        assert push["latency_s"]["count"] == 3
+        assert (push["ok"], push["failed"], push["rows_acknowledged"]) == (2, 1, 20)
+        assert push["consecutive_failures"] == 1
+        assert push["last_error"] == "cloud_unreachable"
+
+
+class TestHealth:
+    def test_ok_outage_and_saturated(self, writer) -> None:
+        metrics = BoxMetrics()
+        assert box_status(writer, metrics)["health"] == "ok"
+
+        metrics.pushed(10.0, False)
+        assert box_status(writer, metrics)["health"] == "outage"
+
+        metrics.pushed(0.2, True)
+        writer.state = QUEUE_SPILLING
+        assert box_status(writer, metrics)["health"] == "saturated"
+
+    def test_dead_letter_count_reported(self, writer, make_measurement) -> None:
+        writer.enqueue(make_measurement())
+        [row] = writer.get_pending(limit=1)
+        writer.mark_dead(row[0], "rejected")
+        writer.flush()
+        assert box_status(writer, BoxMetrics())["dead_letter"] == 1
+
+
+class TestStatusServer:
+    def test_serves_status_and_metrics(self, writer, make_measurement) -> None:
+        metrics = BoxMetrics()
+        metrics.parsed("mettler_sics_v1")
+        metrics.pushed(0.2, True, rows=5)
+        writer.enqueue(make_measurement())
+        writer.flush()
+        server = StatusServer(
+            writer, metrics, LatencyTracker(), host="127.0.0.1", port=0,
+        ).start()
+        base = f"http://127.0.0.1:{server.port}"
+        try:
+            with urllib.request.urlopen(f"{base}/status", timeout=5) as resp:
+                status = json.loads(resp.read())
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as resp:
+                text = resp.read().decode()
+        finally:
+            server.stop()
+
+        assert status["health"] == "ok"
+        assert status["queue"]["depth"]["pending"] == 1
+        assert status["parsers"]["mettler_sics_v1"]["total"] == 1
+        assert 'bionexus_box_queue_depth{status="pending"} 1' in text
+        assert 'bionexus_box_push_latency_seconds_bucket{le="+Inf"} 1' in text
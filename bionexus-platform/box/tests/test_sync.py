@@ -0,0 +1,380 @@
+"""Tests for the box_collector cloud push path.
+
+Covers:
+- Request bodies are gzip-compressed above GZIP_MIN_BYTES
+- push_batch_to_cloud posts one array to the batch endpoint
+- Per-item results drive synced / failed / dead transitions
+- Older servers without the batch endpoint raise BatchEndpointUnavailable
+- Each batch carries its Merkle root; a different echoed root fails it
+- The sender wakes on new rows and reports capture-to-ACK latency
+- A 429 leaves rows untouched, pauses the sender for Retry-After (with
+  jitter) and paces pushes to the X-BioNexus-Rate hint
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import box_collector  # noqa: E402
+from box_collector import (  # noqa: E402
+    CAPTURE_BATCH_ENDPOINT,
+    MERKLE_ROOT_HEADER,
+    BatchEndpointUnavailable,
+    BoxMetrics,
+    CloudBusy,
+    CloudPacer,
+    LatencyTracker,
+    QueueWriter,
+    _sync_batch,
+    encode_body,
+    merkle_root,
+    push_batch_to_cloud,
+    sync_loop,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.text = json.dumps(body)
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Records posts and answers with a canned response per call."""
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.calls: list[dict] = []
+
+    def post(self, url, data=None, headers=None, timeout=None, **kwargs):
+        headers = headers or {}
+        body = data
+        if headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        items = json.loads(body)
+        self.calls.append({"url": url, "headers": headers, "items": items})
+        return self.responder(items)
+
+    def close(self):
+        pass
+
+
+def _all_created(items):
+    return FakeResponse(200, [
+        {"idempotency_key": i["idempotency_key"], "status": "created", "id": n}
+        for n, i in enumerate(items, 1)
+    ])
+
+
+def _statuses(writer: QueueWriter) -> dict:
+    rows = writer.call(
+        lambda conn: conn.execute(
+            "SELECT idempotency_key, status, last_error FROM pending_queue"
+        ).fetchall()
+    )
+    return {key: (status, error) for key, status, error in rows}
+
+
+class TestEncodeBody:
+    def test_small_body_sent_plain(self) -> None:
+        body, headers = encode_body({"a": 1})
+        assert headers == {}
+        assert json.loads(body) == {"a": 1}
+
+    def test_large_body_gzipped(self, make_measurement) -> None:
+        payload = [make_measurement() for _ in range(20)]
+        body, headers = encode_body(payload)
+        assert headers == {"Content-Encoding": "gzip"}
+        assert json.loads(gzip.decompress(body)) == payload
+
+
+class TestPushBatch:
+    def test_posts_one_array_to_batch_endpoint(self, make_measurement) -> None:
+        session = FakeSession(_all_created)
+        batch = [make_measurement(raw="S S     12.3456 g") for _ in range(10)]
+
+        results = push_batch_to_cloud("http://cloud/", batch, session)
+
+        assert len(session.calls) == 1
+        assert session.calls[0]["url"] == f"http://cloud{CAPTURE_BATCH_ENDPOINT}"
+        assert len(session.calls[0]["items"]) == 10
+        # Internal-only fields never leave the box
+        assert "raw" not in session.calls[0]["items"][0]
+        assert set(results) == {m["idempotency_key"] for m in batch}
+
+    def test_missing_endpoint_raises(self, make_measurement) -> None:
+        session = FakeSession(lambda items: FakeResponse(404, {"detail": "Not found"}))
+        with pytest.raises(BatchEndpointUnavailable):
+            push_batch_to_cloud("http://cloud", [make_measurement()], session)
+
+    def test_sends_merkle_root_and_checks_echo(self, make_measurement) -> None:
+        batch = [make_measurement() for _ in range(3)]
+        root = merkle_root(batch)
+
+        def echo(root_header):
+            def respond(items):
+                resp = _all_created(items)
+                resp.headers = {MERKLE_ROOT_HEADER: root_header}
+                return resp
+            return respond
+
+        session = FakeSession(echo(root))
+        assert push_batch_to_cloud("http://cloud", batch, session) is not None
+        assert session.calls[0]["headers"][MERKLE_ROOT_HEADER] == root
+
+        tampered = FakeSession(echo("0" * 64))
+        assert push_batch_to_cloud("http://cloud", batch, tampered) is None
+
+    def test_server_error_returns_none(self, make_measurement) -> None:
+        session = FakeSession(lambda items: FakeResponse(500, {"detail": "boom"}))
+        assert push_batch_to_cloud("http://cloud", [make_measurement()], session) is None
+
+
+class TestSyncBatch:
+    def test_per_item_results_drive_status(
+        self, writer: QueueWriter, make_measurement,
+    ) -> None:
+        batch = [make_measurement() for _ in range(3)]
+        for m in batch:
+            writer.enqueue(m)
+        rows = [(row[0], row[2]) for row in writer.get_pending()]
+        keys = [m["idempotency_key"] for _, m in rows]
+
+        def responder(items):
+            return FakeResponse(200, [
+                {"idempotency_key": keys[0], "status": "created", "id": 1},
+                {"idempotency_key": keys[1], "status": "existing", "id": 2},
+                {"idempotency_key": keys[2], "status": "invalid",
+                 "errors": {"value": ["A valid number is required."]}},
+            ])
+
+        assert _sync_batch(writer, "http://cloud", FakeSession(responder), rows)
+
+        statuses = _statuses(writer)
+        assert statuses[keys[0]][0] == "synced"
+        assert statuses[keys[1]][0] == "synced"
+        assert statuses[keys[2]][0] == "dead"
+        assert "valid number" in statuses[keys[2]][1]
+
+    def test_offline_marks_whole_batch_failed(
+        self, writer: QueueWriter, make_measurement,
+    ) -> None:
+        for _ in range(2):
+            writer.enqueue(make_measurement())
+        rows = [(row[0], row[2]) for row in writer.get_pending()]
+
+        def offline(items):
+            raise box_collector.requests.exceptions.ConnectionError("down")
+
+        assert not _sync_batch(writer, "http://cloud", FakeSession(offline), rows)
+        assert {s for s, _ in _statuses(writer).values()} == {"failed"}
+
+    def test_acknowledged_rows_record_latency(
+        self, writer: QueueWriter, make_measurement,
+    ) -> None:
+        received = (datetime.now(timezone.utc) - timedelta(seconds=2)).isoformat()
+        writer.enqueue(make_measurement(hub_received_at=received))
+        rows = [(row[0], row[2]) for row in writer.get_pending()]
+        latency = LatencyTracker()
+
+        _sync_batch(writer, "http://cloud", FakeSession(_all_created), rows, latency)
+
+        assert latency.count == 1
+        assert 2.0 <= latency.percentile(50) < 10.0
+
+
+class TestLatencyTracker:
+    def test_percentiles_over_recent_window(self) -> None:
+        latency = LatencyTracker(window=100)
+        for ms in range(1, 101):
+            latency.record(ms / 1000)
+        stats = latency.summary()
+        assert stats["count"] == 100
+        assert stats["p50_s"] == pytest.approx(0.050, abs=0.002)
+        assert stats["p99_s"] == pytest.approx(0.099, abs=0.002)
+        assert stats["max_s"] == pytest.approx(0.100)
+
+    def test_empty_summary(self) -> None:
+        assert LatencyTracker().summary()["p50_s"] is None
+
+    def test_unparseable_timestamp_ignored(self) -> None:
+        latency = LatencyTracker()
+        latency.record_since("not-a-date")
+        latency.record_since(None)
+        assert latency.count == 0
+
+
+class TestSenderStage:
+    def test_new_row_wakes_sender_without_polling(
+        self, writer: QueueWriter, monkeypatch, make_measurement,
+    ) -> None:
+        session = FakeSession(_all_created)
+        monkeypatch.setattr(box_collector, "make_session", lambda: session)
+        # A poll interval this long would fail the test if the sender polled.
+        monkeypatch.setattr(box_collector, "SYNC_INTERVAL_S", 60.0)
+        latency = LatencyTracker()
+        thread = threading.Thread(
+            target=sync_loop, args=(writer, "http://cloud", latency), daemon=True,
+        )
+        thread.start()
+        try:
+            time.sleep(0.1)  # sender is now idle, waiting for rows
+            writer.enqueue(make_measurement(
+                hub_received_at=datetime.now(timezone.utc).isoformat(),
+            ))
+            deadline = time.monotonic() + 2.0
+            while latency.count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert latency.count == 1
+            assert latency.percentile(50) < 1.0
+            assert {s for s, _ in _statuses(writer).values()} == {"synced"}
+        finally:
+            box_collector._shutdown.set()
+            writer.notify()
+            thread.join(timeout=5)
+            box_collector._shutdown.clear()
+        assert not thread.is_alive()
+
+    def test_failing_retries_do_not_hold_back_fresh_rows(
+        self, writer: QueueWriter, monkeypatch, make_measurement,
+    ) -> None:
+        for _ in range(5):
+            writer.enqueue(make_measurement())
+        stuck = {row[2]["idempotency_key"]: row[0] for row in writer.get_pending()}
+        # Due immediately: simulate rows whose backoff has already elapsed.
+        writer.call(
+            lambda conn: conn.execute(
+                "UPDATE pending_queue SET status='failed', retry_count=1, next_attempt_at=0"
+            )
+        )
+
+        def responder(items):
+            if any(i["idempotency_key"] in stuck for i in items):
+                return FakeResponse(500, {"detail": "boom"})
+            return _all_created(items)
+
+        session = FakeSession(responder)
+        monkeypatch.setattr(box_collector, "make_session", lambda: session)
+        monkeypatch.setattr(box_collector, "SYNC_INTERVAL_S", 0.05)
+        thread = threading.Thread(target=sync_loop, args=(writer, "http://cloud"), daemon=True)
+        thread.start()
+        try:
+            fresh = make_measurement()
+            writer.enqueue(fresh)
+            deadline = time.monotonic() + 2.0
+            while time.monotonic() < deadline:
+                if _statuses(writer)[fresh["idempotency_key"]][0] == "synced":
+                    break
+                time.sleep(0.01)
+        finally:
+            box_collector._shutdown.set()
+            writer.notify()
+            thread.join(timeout=5)
+            box_collector._shutdown.clear()
+
+        statuses = _statuses(writer)
+        assert statuses[fresh["idempotency_key"]][0] == "synced"
+        assert all(statuses[key][0] == "failed" for key in stuck)
+        # Fresh and retried rows never share a request.
+        for call in session.calls:
+            keys = {i["idempotency_key"] for i in call["items"]}
+            assert not (keys & set(stuck)) or keys <= set(stuck)
+
+
+class TestCloudBusy:
+    def test_429_raises_with_retry_after_and_rate(self, make_measurement) -> None:
+        session = FakeSession(lambda items: FakeResponse(
+            429, {"detail": "busy"}, {"Retry-After": "7", "X-BioNexus-Rate": "12.5"},
+        ))
+        with pytest.raises(CloudBusy) as exc:
+            push_batch_to_cloud("http://cloud", [make_measurement()], session)
+        assert (exc.value.retry_after_s, exc.value.rate) == (7.0, 12.5)
+
+    def test_http_date_and_missing_headers(self) -> None:
+        later = (datetime.now(timezone.utc) + timedelta(seconds=30)).strftime(
+            "%a, %d %b %Y %H:%M:%S GMT"
+        )
+        busy = CloudBusy.from_response(FakeResponse(429, headers={"Retry-After": later}))
+        assert 25 <= busy.retry_after_s <= 30 and busy.rate is None
+
+        busy = CloudBusy.from_response(FakeResponse(429))
+        assert busy.retry_after_s == box_collector.CLOUD_BUSY_DEFAULT_S
+
+    def test_throttled_batch_keeps_rows_pending(
+        self, writer, monkeypatch, make_measurement,
+    ) -> None:
+        metrics = BoxMetrics()
+        monkeypatch.setattr(box_collector, "METRICS", metrics)
+        writer.enqueue(make_measurement())
+        rows = [(row[0], row[2]) for row in writer.get_pending()]
+        session = FakeSession(lambda items: FakeResponse(429, headers={"Retry-After": "1"}))
+
+        with pytest.raises(CloudBusy):
+            _sync_batch(writer, "http://cloud", session, rows)
+
+        writer.flush()
+        assert {s for s, _ in _statuses(writer).values()} == {"pending"}
+        push = metrics.snapshot()["push"]
+        assert (push["throttled"], push["failed"], push["consecutive_failures"]) == (1, 0, 0)
+
+    def test_pacer_pause_jitter_and_rate_hint_expiry(self) -> None:
+        now = [1000.0]
+        pacer = CloudPacer(clock=lambda: now[0])
+
+        pause = pacer.busy(CloudBusy(4.0, rate=50.0))
+
+        assert 4.0 <= pause <= 4.0 * (1 + box_collector.CLOUD_BUSY_JITTER)
+        assert pacer.wait_s() == pytest.approx(pause)
+        assert pacer.pace_s(100) == pytest.approx(2.0)
+        now[0] += box_collector.RATE_HINT_TTL_S + 1
+        assert pacer.wait_s() == 0
+        assert pacer.pace_s(100) == 0
+
+    def test_sender_waits_out_retry_after(self, writer, monkeypatch, make_measurement) -> None:
+        calls = []
+
+        def responder(items):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                return FakeResponse(429, {"detail": "busy"}, {"Retry-After": "0.3"})
+            return _all_created(items)
+
+        session = FakeSession(responder)
+        monkeypatch.setattr(box_collector, "make_session", lambda: session)
+        monkeypatch.setattr(box_collector, "SYNC_INTERVAL_S", 0.05)
+        writer.enqueue(make_measurement())
+        writer.flush()
+        thread = threading.Thread(target=sync_loop, args=(writer, "http://cloud"), daemon=True)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 3.0
+            while len(calls) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            writer.flush()
+        finally:
+            box_collector._shutdown.set()
+            writer.notify()
+            thread.join(timeout=5)
+            box_collector._shutdown.clear()
+
+        assert len(calls) >= 2
+        assert calls[1] - calls[0] >= 0.3
+        retry_counts = writer.call(
+            lambda conn: conn.execute("SELECT retry_count FROM pending_queue").fetchall()
+        )
+        assert retry_counts == [(0,)]
+        assert {s for s, _ in _statuses(writer).values()} == {"synced"}